@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from dormitroty import benchmark
+from dormitroty.campus import generate_campus
+
+
+class Command(BaseCommand):
+    help = ("Compare the read endpoints under WSGI and ASGI: seed a campus in a throwaway test database, then "
+            "let the same concurrent readers browse dorms, rooms, bookings and complaint messages through a "
+            "pool of sync workers and through async views on one event loop. Reports throughput, "
+            "p50/p95/p99 latency and queries per request for each step.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--clients', type=int, default=200, help="Concurrent readers")
+        parser.add_argument('--threads', type=int, default=8, help="WSGI worker threads")
+        parser.add_argument('--rounds', type=int, default=5, help="Passes over the read steps per reader")
+        parser.add_argument('--dorms', type=int, default=2)
+        parser.add_argument('--floors', type=int, default=3)
+        parser.add_argument('--rooms-per-floor', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true', help="Print the reports as JSON")
+
+    def handle(self, *args, **options):
+        if min(options['students'], options['clients'], options['threads'], options['rounds']) < 1:
+            raise CommandError("--students, --clients, --threads and --rounds must be positive")
+
+        connection = connections['default']
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            generate_campus(students=options['students'], dorms=options['dorms'], floors=options['floors'],
+                            rooms_per_floor=options['rooms_per_floor'], complaints=max(options['students'] // 10, 1),
+                            password=benchmark.PASSWORD, seed=options['seed'])
+            result = benchmark.run_reads(options['clients'], threads=options['threads'], rounds=options['rounds'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+        for kind, report in result.items():
+            self.stdout.write(f"{kind.upper()}: {report['requests']} requests in {report['elapsed']:.1f}s, "
+                              f"{report['throughput']:.1f} req/s")
+            self.stdout.write(f"{'step':<12}{'requests':>9}{'errors':>8}{'req/s':>9}"
+                              f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}")
+            for step, s in report['steps'].items():
+                self.stdout.write(f"{step:<12}{s['requests']:>9}{s['errors']:>8}{s['throughput']:>9.1f}"
+                                  f"{s['p50']:>9.1f}{s['p95']:>9.1f}{s['p99']:>9.1f}{s['queries']:>9.1f}")
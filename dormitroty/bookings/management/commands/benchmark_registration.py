@@ -0,0 +1,52 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from dormitroty import benchmark
+
+
+class Command(BaseCommand):
+    help = ("Simulate registration day: seed a campus in a throwaway test database and let every student "
+            "log in, browse dorms, book, pay and poll complaints concurrently. Reports throughput, "
+            "p50/p95/p99 latency and queries per request for each step.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--threads', type=int, default=8,
+                            help="Concurrent clients; keep low on SQLite, which serialises writers")
+        parser.add_argument('--dorms', type=int, default=4)
+        parser.add_argument('--floors', type=int, default=5)
+        parser.add_argument('--rooms-per-floor', type=int, default=20)
+        parser.add_argument('--complaint-rate', type=float, default=0.2,
+                            help="Fraction of students who also file a complaint")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        if options['students'] < 1 or options['threads'] < 1:
+            raise CommandError("--students and --threads must be positive")
+
+        connection = connections['default']
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            students, rooms = benchmark.seed_campus(
+                options['students'], dorms=options['dorms'], floors=options['floors'],
+                rooms_per_floor=options['rooms_per_floor'], seed=options['seed'],
+            )
+            result = benchmark.run(students, rooms, threads=options['threads'],
+                                   complaint_rate=options['complaint_rate'], seed=options['seed'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+        self.stdout.write(f"{result['requests']} requests in {result['elapsed']:.1f}s, "
+                          f"{result['throughput']:.1f} req/s")
+        self.stdout.write(f"{'step':<12}{'requests':>9}{'errors':>8}{'req/s':>9}"
+                          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}")
+        for step, s in result['steps'].items():
+            self.stdout.write(f"{step:<12}{s['requests']:>9}{s['errors']:>8}{s['throughput']:>9.1f}"
+                              f"{s['p50']:>9.1f}{s['p95']:>9.1f}{s['p99']:>9.1f}{s['queries']:>9.1f}")
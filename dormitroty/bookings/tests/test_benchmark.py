@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.test import TestCase
+from bookings.models import Booking
+from complaints.models import Complaint
+from dormitroty import benchmark
+from payments.models import Transaction
+from users.models import User
+
+
+class RegistrationBenchmarkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_seed_campus(self):
+        students, rooms = benchmark.seed_campus(10, dorms=2, floors=2, rooms_per_floor=3)
+        self.assertEqual(len(students), 10)
+        self.assertEqual(len(rooms['male']) + len(rooms['female']), 12)
+
+    def test_run_reports_every_step(self):
+        students, rooms = benchmark.seed_campus(5, dorms=2, floors=1, rooms_per_floor=2)
+        result = benchmark.run(students, rooms, threads=1, complaint_rate=1)
+
+        self.assertEqual(set(result['steps']),
+                         {'login', 'dorms', 'book', 'transaction', 'complaint', 'messages', 'complaints'})
+        for step in result['steps'].values():
+            self.assertEqual((step['requests'], step['errors']), (5, 0))
+            self.assertLessEqual(step['p50'], step['p99'])
+        self.assertGreater(result['steps']['dorms']['queries'], 0)
+        self.assertEqual(Booking.objects.count(), 5)
+        self.assertEqual(Transaction.objects.count(), 5)
+
+    def test_run_reads_compares_wsgi_and_asgi(self):
+        benchmark.seed_campus(4, dorms=2, floors=1, rooms_per_floor=2)
+        for student in User.objects.all():
+            Complaint.objects.create(student=student, title="Broken heater")
+        result = benchmark.run_reads(3, threads=1, rounds=2)
+
+        for kind in ('wsgi', 'asgi'):
+            self.assertEqual(set(result[kind]['steps']), set(benchmark.READ_STEPS))
+            for step in result[kind]['steps'].values():
+                self.assertEqual((step['requests'], step['errors']), (6, 0))
+        # Each pass starts from cold caches, so the first request of each session loads its user in both.
+        self.assertEqual(result['wsgi']['steps']['dorms']['queries'], result['asgi']['steps']['dorms']['queries'])
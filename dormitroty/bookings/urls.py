@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import BookingListCreateAPIView, BookingDetailAPIView
+from .views import BookingListCreateAPIView, BookingDetailAPIView, AsyncBookingListAPIView
 
 urlpatterns = [
     path('', BookingListCreateAPIView.as_view(), name='booking-list-create'),
+    path('async/', AsyncBookingListAPIView.as_view(), name='booking-list-async'),
     path('details/<str:booking_id>/', BookingDetailAPIView.as_view(), name='booking-list-create'),
 ]
\ No newline at end of file
@@ -7,12 +7,14 @@ from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParamet
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from bookings.pagination import StandardResultsSetPagination
+from dormitroty.async_api import AsyncAPIView, paginate
 
 User = get_user_model()
 
 
 class BookingListCreateAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    read_replica = True
 
     @extend_schema(
         methods=["GET"],
@@ -131,3 +133,19 @@ class BookingDetailAPIView(APIView):
             booking.bed.save()
         booking.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AsyncBookingListAPIView(AsyncAPIView):
+    """GET of BookingListCreateAPIView on the async ORM, with the same pagination."""
+    read_replica = True
+
+    async def get(self, request):
+        user = request.user
+        if user.is_superuser or user.is_admin:
+            bookings = Booking.objects.all()
+        else:
+            bookings = Booking.objects.filter(student=user)
+
+        page, results = await paginate(request, bookings, StandardResultsSetPagination.page_size,
+                                       StandardResultsSetPagination.max_page_size)
+        return {**page, 'results': BookingCreateSerializer(results, many=True).data}
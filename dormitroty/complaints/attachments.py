@@ -0,0 +1,174 @@
+"""
+Chunked attachment uploads, thumbnails and byte-range downloads.
+
+Chunks are streamed from the request into a temporary file in fixed-size blocks,
+then appended to the attachment's file while its row is locked, so memory per
+request stays at one block and an aborted chunk never reaches the file. Files
+live on the default storage, which must be a local filesystem storage.
+"""
+import logging
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import ComplaintAttachment
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 64 * 1024
+
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def storage_name(attachment):
+    extension = os.path.splitext(attachment.file_name)[1].lower()[:10]
+    return f"{ComplaintAttachment.file.field.upload_to}{attachment.pk}{extension}"
+
+
+def parse_content_range(header, size):
+    """``(start, length)`` of a ``Content-Range: bytes start-end/size`` header."""
+    match = _CONTENT_RANGE.match(header.strip())
+    if not match:
+        raise UploadError("Content-Range نامعتبر است.")
+    start, end, total = map(int, match.groups())
+    if total != size or end < start or end >= size:
+        raise UploadError("Content-Range با حجم فایل همخوانی ندارد.")
+    return start, end - start + 1
+
+
+def receive_chunk(attachment, stream, start, length):
+    """
+    Append ``length`` bytes read from ``stream`` at offset ``start``. Returns the
+    updated attachment. Raises UploadError with status 409 and the current offset
+    when ``start`` is not where the upload stands, so the client can resume.
+    """
+    if length > settings.ATTACHMENT_MAX_CHUNK:
+        raise UploadError("حجم هر قطعه بیش از حد مجاز است.", status=413)
+    if start + length > attachment.size:
+        raise UploadError("حجم ارسالی از حجم اعلام‌شده بیشتر است.")
+
+    path = default_storage.path(attachment.file.name)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix='.chunk-') as chunk:
+        remaining = length
+        while remaining:
+            block = stream.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                raise UploadError("قطعه ناقص دریافت شد.")
+            chunk.write(block)
+            remaining -= len(block)
+        chunk.flush()
+
+        with transaction.atomic():
+            attachment = ComplaintAttachment.objects.select_for_update().get(pk=attachment.pk)
+            if attachment.is_complete or attachment.received != start:
+                raise UploadError("این قطعه با وضعیت بارگذاری همخوانی ندارد.", status=409,
+                                  received=attachment.received)
+            chunk.seek(0)
+            with open(path, 'ab') as target:
+                target.truncate(start)
+                shutil.copyfileobj(chunk, target, BLOCK_SIZE)
+            attachment.received = start + length
+            fields = ['received']
+            if attachment.received == attachment.size:
+                attachment.completed_at = timezone.now()
+                fields.append('completed_at')
+                if attachment.content_type.startswith('image/'):
+                    transaction.on_commit(lambda: schedule_thumbnail(attachment.pk))
+            attachment.save(update_fields=fields)
+    return attachment
+
+
+def create_upload(attachment):
+    """Save a new attachment and create its empty file."""
+    attachment.file.name = storage_name(attachment)
+    path = default_storage.path(attachment.file.name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    attachment.save()
+    return attachment
+
+
+@lru_cache(maxsize=None)
+def _executor():
+    return ThreadPoolExecutor(max_workers=settings.ATTACHMENT_THUMBNAIL_WORKERS,
+                              thread_name_prefix='thumbnails')
+
+
+def schedule_thumbnail(attachment_id):
+    return _executor().submit(_thumbnail_job, attachment_id)
+
+
+def _thumbnail_job(attachment_id):
+    close_old_connections()
+    try:
+        make_thumbnail(attachment_id)
+    except Exception:
+        logger.exception("Thumbnail generation failed for attachment %s", attachment_id)
+    finally:
+        connection.close()
+
+
+def make_thumbnail(attachment_id):
+    try:
+        from PIL import Image
+    except ImportError:
+        logger.warning("Pillow is not installed; skipping thumbnails")
+        return
+
+    attachment = ComplaintAttachment.objects.get(pk=attachment_id)
+    name = f"{ComplaintAttachment.thumbnail.field.upload_to}{attachment.pk}.jpg"
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with Image.open(default_storage.path(attachment.file.name)) as image:
+        # draft() lets JPEG decode at a reduced scale instead of full resolution.
+        image.draft('RGB', settings.ATTACHMENT_THUMBNAIL_SIZE)
+        image = image.convert('RGB')
+        image.thumbnail(settings.ATTACHMENT_THUMBNAIL_SIZE)
+        image.save(path, 'JPEG', quality=80)
+    ComplaintAttachment.objects.filter(pk=attachment.pk).update(thumbnail=name)
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` inclusive for a single-range ``Range`` header, ``None`` to
+    send the whole file. Raises UploadError(416) for unsatisfiable ranges.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise UploadError("Range نامعتبر است.", status=416)
+    return start, end
+
+
+def iter_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length:
+            block = f.read(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
@@ -0,0 +1,121 @@
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from complaints.models import (
+    ArchivedAttachment, ArchivedComplaint, Complaint, ComplaintAttachment, ComplaintMessage, ComplaintSearchEntry
+)
+from complaints.serializers import ComplaintMessageSerializer
+
+
+def delete_rows(db, model, column, values):
+    """
+    One plain DELETE for the rows of ``model`` whose ``column`` is in ``values``.
+    A regular delete() would collect every row and fire post_delete for each
+    message, updating counters of complaints about to go.
+    """
+    if not values:
+        return
+    quote = connections[db].ops.quote_name
+    placeholders = ', '.join(['%s'] * len(values))
+    with connections[db].cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(model._meta.db_table)} WHERE {quote(column)} IN ({placeholders})", values
+        )
+
+
+class Command(BaseCommand):
+    help = "Move complaints without activity for a while into the compressed archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=365,
+                            help="Archive complaints whose last message is older than this many days")
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--pause', type=float, default=0,
+                            help="Seconds to sleep between batches to spread the load")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the complaints to archive")
+
+    def handle(self, *args, **options):
+        if options['older_than'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--older-than and --batch-size must be positive")
+        cutoff = timezone.now() - timedelta(days=options['older_than'])
+        candidates = Complaint.objects.filter(last_message_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"{candidates.count()} complaints would be archived")
+            return
+
+        archived = 0
+        last_id = 0
+        while True:
+            ids = list(
+                candidates.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+            archived += self.archive(ids, cutoff)
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(f"archived {archived} complaints")
+
+    def archive(self, ids, cutoff):
+        # One short transaction per batch, so rows are only locked while their batch moves.
+        db = router.db_for_write(Complaint)
+        with transaction.atomic(using=db):
+            complaints = list(
+                Complaint.objects.using(db).select_for_update(skip_locked=True)
+                # Re-checked under the lock: a message may have arrived since the ids were read.
+                .filter(id__in=ids, last_message_at__lt=cutoff)
+            )
+            if not complaints:
+                return 0
+            ids = [complaint.id for complaint in complaints]
+
+            messages = defaultdict(list)
+            thread = (ComplaintMessage.objects.using(db).filter(complaint_id__in=ids)
+                      .select_related('sender').prefetch_related('attachments').order_by('id'))
+            for data in ComplaintMessageSerializer(thread, many=True).data:
+                messages[data['complaint']].append(data)
+
+            ArchivedComplaint.objects.using(db).bulk_create([
+                ArchivedComplaint(
+                    id=complaint.id,
+                    student_id=complaint.student_id,
+                    title=complaint.title,
+                    is_read=complaint.is_read,
+                    created_at=complaint.created_at,
+                    last_message_at=complaint.last_message_at,
+                    message_count=len(messages[complaint.id]),
+                    messages_blob=ArchivedComplaint.pack_messages(messages[complaint.id]),
+                )
+                for complaint in complaints
+            ])
+
+            message_ids = [message['id'] for thread in messages.values() for message in thread]
+            # The rows move to the archive and the stored files stay, so the archived
+            # messages' file_url and thumbnail_url keep working.
+            ArchivedAttachment.objects.using(db).bulk_create([
+                ArchivedAttachment(
+                    id=attachment.id,
+                    complaint_id=attachment.message.complaint_id,
+                    file_name=attachment.file_name,
+                    content_type=attachment.content_type,
+                    size=attachment.size,
+                    file=attachment.file.name,
+                    thumbnail=attachment.thumbnail.name,
+                    completed_at=attachment.completed_at,
+                )
+                for message in thread
+                for attachment in message.attachments.all()
+            ])
+            delete_rows(db, ComplaintSearchEntry, 'complaint_id', ids)
+            delete_rows(db, ComplaintAttachment, 'message_id', message_ids)
+            delete_rows(db, ComplaintMessage, 'complaint_id', ids)
+            delete_rows(db, Complaint, 'id', ids)
+        return len(ids)
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import models
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from complaints.models import Complaint
+
+
+class Command(BaseCommand):
+    help = ("Raise the priority of open complaints past their SLA deadline and give them the "
+            "deadline of the new priority. Meant to run every few minutes from cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only count overdue complaints")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        overdue = Complaint.objects.filter(resolved_at__isnull=True, sla_deadline__lt=now)
+        if options['dry_run']:
+            self.stdout.write(f"{overdue.count()} complaints are overdue")
+            return
+
+        escalated = {
+            priority: max(priority - 1, Complaint.Priority.URGENT) for priority in Complaint.Priority.values
+        }
+        # A single UPDATE; the CASE expressions see each row's priority before the update.
+        count = overdue.update(
+            priority=Case(
+                *[When(priority=old, then=Value(new)) for old, new in escalated.items()],
+                default=F('priority'),
+                output_field=models.PositiveSmallIntegerField(),
+            ),
+            sla_deadline=Case(
+                *[When(priority=old, then=Value(Complaint.deadline_for(new, now))) for old, new in escalated.items()],
+                default=F('sla_deadline'),
+                output_field=models.DateTimeField(),
+            ),
+            escalation_count=F('escalation_count') + 1,
+        )
+        self.stdout.write(f"escalated {count} complaints")
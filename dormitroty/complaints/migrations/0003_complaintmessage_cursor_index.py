@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-19 15:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0002_alter_complaint_created_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='complaintmessage',
+            index=models.Index(fields=['complaint', 'id'], name='complaint_msg_cursor_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2 on 2026-10-19 15:46
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, F, Max, OuterRef, Subquery, When
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Complaint = apps.get_model('complaints', 'Complaint')
+    ComplaintMessage = apps.get_model('complaints', 'ComplaintMessage')
+    messages = ComplaintMessage.objects.filter(complaint=OuterRef('pk')).order_by().values('complaint')
+    from_student = messages.filter(sender=OuterRef('student'))
+    Complaint.objects.update(
+        message_count=Coalesce(Subquery(messages.annotate(count=Count('id')).values('count')), 0),
+        last_message_at=Coalesce(
+            Subquery(messages.annotate(latest=Max('created_at')).values('latest')),
+            F('created_at'),
+            output_field=models.DateTimeField(),
+        ),
+        unread_by_staff=Case(
+            When(is_read=True, then=0),
+            default=Coalesce(Subquery(from_student.annotate(count=Count('id')).values('count')), 0),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0003_complaintmessage_cursor_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='last_message_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='unread_by_staff',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='unread_by_student',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['-last_message_at', '-id'], name='complaint_inbox_idx'),
+        ),
+    ]
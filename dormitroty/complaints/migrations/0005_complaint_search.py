@@ -0,0 +1,109 @@
+# Generated by Django 5.2 on 2026-10-19 15:52
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+TABLE = 'complaints_complaintsearchentry'
+FTS_TABLE = f'{TABLE}_fts'
+SEARCH_CONFIG = 'simple'
+
+# A frozen copy of dormitroty.persian.normalize as of this migration, so later
+# changes to it don't change what this migration does.
+_DIGITS = '۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩'
+_TRANSLATION = str.maketrans({
+    **{digit: str(i % 10) for i, digit in enumerate(_DIGITS)},
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و',
+    '‌': ' ',  # ZWNJ: "می‌خواهم" is indexed as "می خواهم"
+    '‍': None,
+    'ـ': None,  # tatweel
+    **{chr(code): None for code in range(0x064B, 0x0660)},  # harakat
+    'ٰ': None,
+})
+
+
+def normalize(text):
+    return ' '.join(text.translate(_TRANSLATION).lower().split())
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f"CREATE INDEX complaint_search_vector_idx ON {TABLE} USING gin (vector)")
+    elif vendor == 'sqlite':
+        # External-content FTS5 table: stores only the index, rows are read from TABLE.
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"document, content='{TABLE}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {TABLE}_ai AFTER INSERT ON {TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.id, new.document); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {TABLE}_ad AFTER DELETE ON {TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.id, old.document); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {TABLE}_au AFTER UPDATE ON {TABLE} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.id, old.document); "
+            f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.id, new.document); END"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def backfill_entries(apps, schema_editor):
+    Complaint = apps.get_model('complaints', 'Complaint')
+    ComplaintMessage = apps.get_model('complaints', 'ComplaintMessage')
+    ComplaintSearchEntry = apps.get_model('complaints', 'ComplaintSearchEntry')
+
+    def rows():
+        for pk, title in Complaint.objects.values_list('pk', 'title').iterator(chunk_size=2000):
+            yield ComplaintSearchEntry(complaint_id=pk, document=normalize(title))
+        messages = ComplaintMessage.objects.values_list('pk', 'complaint_id', 'message')
+        for pk, complaint_id, message in messages.iterator(chunk_size=2000):
+            yield ComplaintSearchEntry(complaint_id=complaint_id, message_id=pk, document=normalize(message))
+
+    batch = []
+    for entry in rows():
+        batch.append(entry)
+        if len(batch) == 2000:
+            ComplaintSearchEntry.objects.bulk_create(batch)
+            batch = []
+    ComplaintSearchEntry.objects.bulk_create(batch)
+    if schema_editor.connection.vendor == 'postgresql':
+        ComplaintSearchEntry.objects.update(vector=SearchVector('document', config=SEARCH_CONFIG))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0004_complaint_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintSearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document', models.TextField()),
+                ('vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('complaint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='complaints.complaint')),
+                ('message', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entry', to='complaints.complaintmessage')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('message__isnull', True)), fields=('complaint',), name='unique_complaint_title_entry')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_entries, migrations.RunPython.noop),
+    ]
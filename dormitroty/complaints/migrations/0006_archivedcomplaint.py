@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-19 15:53
+
+import django.db.models.deletion
+import django.utils.timezone
+import django_jalali.db.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0005_complaint_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedComplaint',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('is_read', models.BooleanField(default=False)),
+                ('created_at', django_jalali.db.models.jDateTimeField()),
+                ('last_message_at', models.DateTimeField()),
+                ('message_count', models.PositiveIntegerField(default=0)),
+                ('messages_blob', models.BinaryField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_complaints', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2 on 2026-10-19 15:55
+
+import django.utils.timezone
+from django.conf import settings
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Q, Subquery
+
+# threads idle this long are taken as settled rather than overdue
+STALE_AFTER = timedelta(days=30)
+
+
+def backfill_deadlines(apps, schema_editor):
+    # Only live threads enter the SLA cycle, so the first escalate_complaints run
+    # does not escalate the whole history. Threads staff answered last, or idle
+    # for STALE_AFTER, are resolved at their last activity; the open rest get a
+    # full normal-priority window starting now.
+    Complaint = apps.get_model('complaints', 'Complaint')
+    ComplaintMessage = apps.get_model('complaints', 'ComplaintMessage')
+    now = django.utils.timezone.now()
+    sla = timedelta(hours=settings.COMPLAINT_SLA_HOURS[3])
+
+    Complaint.objects.update(sla_deadline=F('last_message_at') + sla)
+    last_sender = ComplaintMessage.objects.filter(complaint=OuterRef('pk')).order_by('-id').values('sender_id')[:1]
+    answered = (Complaint.objects.alias(last_sender=Subquery(last_sender))
+                .filter(last_sender__isnull=False).exclude(last_sender=F('student_id')).values('pk'))
+    Complaint.objects.filter(Q(pk__in=answered) | Q(last_message_at__lt=now - STALE_AFTER)).update(
+        resolved_at=F('last_message_at')
+    )
+    Complaint.objects.filter(resolved_at__isnull=True).update(sla_deadline=now + sla)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complaints', '0006_archivedcomplaint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='complaint',
+            name='category',
+            field=models.CharField(choices=[('facilities', 'تاسیسات'), ('cleaning', 'نظافت'), ('internet', 'اینترنت'), ('security', 'امنیت'), ('other', 'سایر')], default='other', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='escalation_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='priority',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'فوری'), (2, 'بالا'), (3, 'عادی'), (4, 'پایین')], default=3),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='resolved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='sla_deadline',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='مهلت رسیدگی؛ پس از آن اولویت شکایت افزایش می\u200cیابد'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_deadlines, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('resolved_at__isnull', True)), fields=['priority', 'sla_deadline', 'id'], name='complaint_triage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(condition=models.Q(('resolved_at__isnull', True)), fields=['sla_deadline'], name='complaint_open_deadline_idx'),
+        ),
+    ]
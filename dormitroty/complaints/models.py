@@ -1,16 +1,67 @@
+import json
+import uuid
+import zlib
+from datetime import timedelta
+
+from django.contrib.postgres.search import SearchVectorField
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 from django.conf import settings
 from django_jalali.db import models as jalali_models
 
 class Complaint(models.Model):
+    class Category(models.TextChoices):
+        FACILITIES = 'facilities', 'تاسیسات'
+        CLEANING = 'cleaning', 'نظافت'
+        INTERNET = 'internet', 'اینترنت'
+        SECURITY = 'security', 'امنیت'
+        OTHER = 'other', 'سایر'
+
+    class Priority(models.IntegerChoices):
+        # Lower values are handled first.
+        URGENT = 1, 'فوری'
+        HIGH = 2, 'بالا'
+        NORMAL = 3, 'عادی'
+        LOW = 4, 'پایین'
+
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
     is_read = models.BooleanField(default=False)
     created_at = jalali_models.jDateTimeField(auto_now_add=True)
+    category = models.CharField(max_length=20, choices=Category.choices, default=Category.OTHER)
+    priority = models.PositiveSmallIntegerField(choices=Priority.choices, default=Priority.NORMAL)
+    sla_deadline = models.DateTimeField(help_text="مهلت رسیدگی؛ پس از آن اولویت شکایت افزایش می‌یابد")
+    escalation_count = models.PositiveSmallIntegerField(default=0)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    # Maintained by complaints.signals whenever a message is written.
+    last_message_at = models.DateTimeField(default=timezone.now)
+    message_count = models.PositiveIntegerField(default=0)
+    unread_by_staff = models.PositiveIntegerField(default=0)
+    unread_by_student = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-last_message_at', '-id'], name='complaint_inbox_idx'),
+            # Triage queue: open complaints by (priority, sla_deadline).
+            models.Index(fields=['priority', 'sla_deadline', 'id'], condition=models.Q(resolved_at__isnull=True),
+                         name='complaint_triage_idx'),
+            models.Index(fields=['sla_deadline'], condition=models.Q(resolved_at__isnull=True),
+                         name='complaint_open_deadline_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.student.student_code}"
 
+    @staticmethod
+    def deadline_for(priority, start=None):
+        return (start or timezone.now()) + timedelta(hours=settings.COMPLAINT_SLA_HOURS[priority])
+
+    def save(self, *args, **kwargs):
+        if self.sla_deadline is None:
+            self.sla_deadline = self.deadline_for(self.priority)
+        super().save(*args, **kwargs)
+
 
 class ComplaintMessage(models.Model):
     complaint = models.ForeignKey(Complaint, related_name='messages', on_delete=models.CASCADE)
@@ -18,5 +69,111 @@ class ComplaintMessage(models.Model):
     message = models.TextField()
     created_at = jalali_models.jDateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # since_id cursor: WHERE complaint_id = ? AND id > ? ORDER BY id
+            models.Index(fields=['complaint', 'id'], name='complaint_msg_cursor_idx'),
+        ]
+
     def __str__(self):
         return f"Msg by {self.sender.student_code} on {self.created_at.strftime('%Y-%m-%d')}"
+
+
+class ComplaintSearchEntry(models.Model):
+    """
+    Normalised text of a complaint title (``message`` is null) or of one message,
+    indexed for full-text search by ``complaints.search``.
+    """
+    complaint = models.ForeignKey(Complaint, related_name='search_entries', on_delete=models.CASCADE)
+    message = models.OneToOneField(
+        ComplaintMessage, null=True, blank=True, related_name='search_entry', on_delete=models.CASCADE
+    )
+    document = models.TextField()
+    # Filled on PostgreSQL only; SQLite searches through an FTS5 table instead.
+    vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['complaint'], condition=models.Q(message__isnull=True), name='unique_complaint_title_entry'
+            ),
+        ]
+
+    def __str__(self):
+        return self.document[:50]
+
+
+class ArchivedComplaint(models.Model):
+    """
+    A complaint moved out of the live tables by the ``archive_complaints`` command.
+    Keeps the original id; its messages are one zlib-compressed JSON array in the
+    ComplaintMessageSerializer format.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='archived_complaints', on_delete=models.CASCADE)
+    title = models.CharField(max_length=255)
+    is_read = models.BooleanField(default=False)
+    created_at = jalali_models.jDateTimeField()
+    last_message_at = models.DateTimeField()
+    message_count = models.PositiveIntegerField(default=0)
+    messages_blob = models.BinaryField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+    @staticmethod
+    def pack_messages(messages):
+        return zlib.compress(json.dumps(messages, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8'))
+
+    def get_messages(self):
+        return json.loads(zlib.decompress(self.messages_blob))
+
+
+class ComplaintAttachment(models.Model):
+    """
+    A file attached to a message, uploaded in chunks by ``complaints.attachments``.
+    ``received`` counts the bytes written so far; the upload is complete once it
+    reaches ``size``.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    message = models.ForeignKey(ComplaintMessage, related_name='attachments', on_delete=models.CASCADE)
+    uploader = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    file = models.FileField(upload_to='complaint_attachments/', max_length=255)
+    thumbnail = models.FileField(upload_to='complaint_attachments/thumbnails/', max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.file_name
+
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+
+
+class ArchivedAttachment(models.Model):
+    """
+    An attachment of an archived complaint. The ``archive_complaints`` command
+    moves the row here and leaves the stored files in place, so the links kept
+    in the archived messages still serve them.
+    """
+    id = models.UUIDField(primary_key=True)
+    complaint = models.ForeignKey(ArchivedComplaint, related_name='attachments', on_delete=models.CASCADE)
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    size = models.PositiveBigIntegerField()
+    file = models.FileField(upload_to='complaint_attachments/', max_length=255)
+    thumbnail = models.FileField(upload_to='complaint_attachments/thumbnails/', max_length=255, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.file_name
+
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
@@ -0,0 +1,38 @@
+from django.db.models import Sum
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+class InboxCursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-last_message_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = super().paginate_queryset(queryset, request, view)
+        if page:
+            # Every row carries the same unread_total annotation from the view.
+            self.unread_total = page[0].unread_total
+        else:
+            # No row to read it from, e.g. a cursor past the last thread: the total still
+            # isn't 0, so pay one more query, and let the request's query budget allow for it.
+            self.unread_total = queryset.order_by().aggregate(total=Sum('unread_by_staff'))['total']
+            budget = getattr(view, 'query_budget', None)
+            if budget is not None:
+                request._request.query_budget = budget + 1
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'unread_total': self.unread_total or 0,
+            'results': data,
+        })
+
+
+class SearchResultsPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """
+    A listener on one channel. ``get()`` returns the next message or ``None``
+    when the subscriber fell too far behind and should resynchronise.
+    """
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, message):
+        # Always runs on self.loop.
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker:
+    """
+    Process-local pub/sub. ``publish()`` may be called from any thread (sync views,
+    signals); subscribers live on an event loop. With several worker processes,
+    replace it through ``COMPLAINT_BROKER`` with a broker backed by Redis or similar
+    that implements the same ``publish``/``subscribe``/``unsubscribe``/``waiter`` methods.
+    """
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self._subscribers = defaultdict(set)
+        self._waiters = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.maxsize)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    @contextmanager
+    def waiter(self, channel):
+        """
+        For synchronous code: yields a ``threading.Event`` set by the next publish
+        on ``channel``. Register it before checking the database to avoid missing
+        a message published in between.
+        """
+        event = threading.Event()
+        with self._lock:
+            self._waiters[channel].add(event)
+        try:
+            yield event
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(channel)
+                if waiters is not None:
+                    waiters.discard(event)
+                    if not waiters:
+                        del self._waiters[channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+            waiters = list(self._waiters.get(channel, ()))
+        for event in waiters:
+            event.set()
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The subscriber's event loop is gone.
+                self.unsubscribe(subscription)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    path = getattr(settings, 'COMPLAINT_BROKER', 'complaints.pubsub.InMemoryBroker')
+    return import_string(path)()
+
+
+def complaint_channel(complaint_id):
+    return f"complaint:{complaint_id}"
+
+
+STAFF_CHANNEL = "complaints:staff"
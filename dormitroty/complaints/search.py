@@ -0,0 +1,74 @@
+"""
+Full-text search over complaint titles and messages.
+
+Every title and message has a ComplaintSearchEntry holding its normalised text.
+On PostgreSQL the entry's ``vector`` column is a tsvector with a GIN index; on
+SQLite an FTS5 table mirrors ``document`` through triggers. Both are created by
+migration 0005 and kept current by ``index_complaint``/``index_message``.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections, router
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from dormitroty.persian import normalize
+
+from .models import ComplaintSearchEntry
+
+# 'simple' only lowercases: PostgreSQL ships no Persian stemmer or stop words.
+SEARCH_CONFIG = 'simple'
+
+FTS_TABLE = f"{ComplaintSearchEntry._meta.db_table}_fts"
+
+
+def _vendor():
+    return connections[router.db_for_write(ComplaintSearchEntry)].vendor
+
+
+def _write(lookup, text):
+    document = normalize(text)
+    values = {'document': document}
+    if _vendor() == 'postgresql':
+        values['vector'] = SearchVector(Value(document), config=SEARCH_CONFIG)
+    if not ComplaintSearchEntry.objects.filter(**lookup).update(**values):
+        ComplaintSearchEntry.objects.create(**lookup, **values)
+
+
+def index_complaint(complaint):
+    _write({'complaint_id': complaint.pk, 'message': None}, complaint.title)
+
+
+def index_message(message):
+    _write({'complaint_id': message.complaint_id, 'message_id': message.pk}, message.message)
+
+
+def search(text):
+    """
+    Entries matching every word of ``text``, best first, as a queryset annotated
+    with ``rank``.
+    """
+    terms = normalize(text).split()
+    entries = ComplaintSearchEntry.objects.select_related('complaint', 'message')
+    if not terms:
+        return entries.none()
+
+    vendor = connections[entries.db].vendor
+    if vendor == 'postgresql':
+        query = SearchQuery(' '.join(terms), config=SEARCH_CONFIG, search_type='plain')
+        entries = entries.filter(vector=query).annotate(rank=SearchRank(F('vector'), query))
+    elif vendor == 'sqlite':
+        match = ' '.join('"%s"' % term.replace('"', '""') for term in terms)
+        entries = entries.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+        ).annotate(rank=RawSQL(
+            # bm25() is lower for better matches.
+            f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"AND rowid = {ComplaintSearchEntry._meta.db_table}.id",
+            (match,), output_field=FloatField(),
+        ))
+    else:
+        condition = Q()
+        for term in terms:
+            condition &= Q(document__contains=term)
+        entries = entries.filter(condition).annotate(rank=Value(0.0, output_field=FloatField()))
+    return entries.order_by('-rank', '-id')
@@ -1,24 +1,102 @@
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Complaint, ComplaintMessage
+from dormitroty.instrumentation import TimedListSerializer, TimedSerializerMixin
+from .models import Complaint, ComplaintAttachment, ComplaintMessage, ComplaintSearchEntry
 
 
 class ComplaintSerializer(serializers.ModelSerializer):
     class Meta:
         model = Complaint
-        fields = ['id', 'student', 'title', 'is_read', 'created_at']
-        read_only_fields = ['student', 'is_read', 'created_at']
+        fields = ['id', 'student', 'title', 'category', 'priority', 'sla_deadline', 'resolved_at',
+                  'is_read', 'created_at',
+                  'last_message_at', 'message_count', 'unread_by_staff', 'unread_by_student']
+        read_only_fields = ['student', 'priority', 'sla_deadline', 'resolved_at', 'is_read', 'created_at',
+                            'last_message_at', 'message_count', 'unread_by_staff', 'unread_by_student']
 
     def create(self, validated_data):
         validated_data['student'] = self.context['request'].user
         return super().create(validated_data)
 
 
-class ComplaintMessageSerializer(serializers.ModelSerializer):
+class ComplaintInboxSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    student_code = serializers.CharField(source='student.student_code', read_only=True)
+    student_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Complaint
+        list_serializer_class = TimedListSerializer
+        fields = ['id', 'student', 'student_code', 'student_name', 'title', 'is_read',
+                  'last_message_at', 'message_count', 'unread_by_staff']
+        read_only_fields = fields
+
+    def get_student_name(self, obj) -> str:
+        return f"{obj.student.first_name} {obj.student.last_name}"
+
+
+class ComplaintTriageSerializer(serializers.ModelSerializer):
+    student_code = serializers.CharField(source='student.student_code', read_only=True)
+    overdue = serializers.SerializerMethodField()
+    resolved = serializers.BooleanField(write_only=True, required=False)
+
+    class Meta:
+        model = Complaint
+        fields = ['id', 'student', 'student_code', 'title', 'category', 'priority', 'sla_deadline', 'overdue',
+                  'escalation_count', 'resolved', 'resolved_at', 'last_message_at', 'unread_by_staff']
+        read_only_fields = ['student', 'title', 'sla_deadline', 'escalation_count', 'resolved_at',
+                            'last_message_at', 'unread_by_staff']
+
+    def get_overdue(self, obj) -> bool:
+        return obj.resolved_at is None and obj.sla_deadline < timezone.now()
+
+    def update(self, instance, validated_data):
+        resolved = validated_data.pop('resolved', None)
+        if resolved is not None:
+            validated_data['resolved_at'] = timezone.now() if resolved else None
+        if 'priority' in validated_data and validated_data['priority'] != instance.priority:
+            # A re-triaged complaint gets the SLA of its new priority from now.
+            validated_data['sla_deadline'] = Complaint.deadline_for(validated_data['priority'])
+        return super().update(instance, validated_data)
+
+
+class ComplaintAttachmentSerializer(serializers.ModelSerializer):
+    completed = serializers.BooleanField(source='is_complete', read_only=True)
+    file_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ComplaintAttachment
+        fields = ['id', 'message', 'file_name', 'content_type', 'size', 'received', 'completed',
+                  'file_url', 'thumbnail_url']
+        read_only_fields = ['id', 'message', 'received', 'completed', 'file_url', 'thumbnail_url']
+
+    def get_file_url(self, obj) -> str | None:
+        return reverse('complaint-attachment-file', args=[obj.pk]) if obj.is_complete else None
+
+    def get_thumbnail_url(self, obj) -> str | None:
+        return reverse('complaint-attachment-thumbnail', args=[obj.pk]) if obj.thumbnail else None
+
+    def validate_size(self, value):
+        if not 0 < value <= settings.ATTACHMENT_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"حجم فایل باید بین ۱ بایت و {settings.ATTACHMENT_MAX_SIZE} بایت باشد.")
+        return value
+
+    def validate_content_type(self, value):
+        if value not in settings.ATTACHMENT_CONTENT_TYPES:
+            raise serializers.ValidationError("نوع فایل مجاز نیست.")
+        return value
+
+
+class ComplaintMessageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     sender_name = serializers.SerializerMethodField()
+    attachments = ComplaintAttachmentSerializer(many=True, read_only=True)
 
     class Meta:
         model = ComplaintMessage
-        fields = ['id', 'complaint', 'sender', 'sender_name', 'message', 'created_at']
+        list_serializer_class = TimedListSerializer
+        fields = ['id', 'complaint', 'sender', 'sender_name', 'message', 'attachments', 'created_at']
         read_only_fields = ['sender', 'created_at', 'sender_name']
         extra_kwargs = {
             'complaint': {'required': False},
@@ -30,3 +108,18 @@ class ComplaintMessageSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data['sender'] = self.context['request'].user
         return super().create(validated_data)
+
+
+class ComplaintSearchResultSerializer(serializers.ModelSerializer):
+    complaint_title = serializers.CharField(source='complaint.title', read_only=True)
+    text = serializers.SerializerMethodField()
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ComplaintSearchEntry
+        fields = ['complaint', 'complaint_title', 'message', 'text', 'rank']
+        read_only_fields = fields
+
+    def get_text(self, obj) -> str:
+        # The original text, not the normalised document.
+        return obj.message.message if obj.message_id else obj.complaint.title
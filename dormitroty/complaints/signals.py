@@ -0,0 +1,61 @@
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from .models import Complaint, ComplaintMessage
+from .pubsub import STAFF_CHANNEL, complaint_channel, get_broker
+from .search import index_complaint, index_message
+
+
+@receiver(post_save, sender=Complaint)
+def index_complaint_title(sender, instance, **kwargs):
+    index_complaint(instance)
+
+
+@receiver(post_save, sender=ComplaintMessage)
+def index_message_text(sender, instance, **kwargs):
+    index_message(instance)
+
+
+@receiver(post_save, sender=ComplaintMessage)
+def update_complaint_counters(sender, instance, created, **kwargs):
+    if not created:
+        return
+    # One UPDATE, evaluated by the database so concurrent messages cannot lose increments.
+    from_student = Q(student_id=instance.sender_id)
+    Complaint.objects.filter(pk=instance.complaint_id).update(
+        last_message_at=timezone.now(),
+        message_count=F('message_count') + 1,
+        unread_by_staff=F('unread_by_staff') + Case(When(from_student, then=1), default=0),
+        unread_by_student=F('unread_by_student') + Case(When(from_student, then=0), default=1),
+        is_read=Case(When(from_student, then=False), default=F('is_read')),
+    )
+
+
+@receiver(post_delete, sender=ComplaintMessage)
+def decrement_message_count(sender, instance, **kwargs):
+    Complaint.objects.filter(pk=instance.complaint_id, message_count__gt=0).update(
+        message_count=F('message_count') - 1
+    )
+
+
+@receiver(post_save, sender=ComplaintMessage)
+def publish_new_message(sender, instance, created, **kwargs):
+    if not created:
+        return
+
+    def publish():
+        from .serializers import ComplaintMessageSerializer
+
+        # Rendered once here instead of once per listener.
+        event = {
+            'id': instance.id,
+            'data': JSONRenderer().render(ComplaintMessageSerializer(instance).data).decode('utf-8'),
+        }
+        broker = get_broker()
+        broker.publish(complaint_channel(instance.complaint_id), event)
+        broker.publish(STAFF_CHANNEL, event)
+
+    transaction.on_commit(publish)
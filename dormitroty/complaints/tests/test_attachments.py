@@ -0,0 +1,194 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+from complaints import attachments
+from complaints.models import Complaint, ComplaintAttachment, ComplaintMessage
+
+User = get_user_model()
+
+
+class ComplaintAttachmentTest(APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, ATTACHMENT_MAX_CHUNK=1024)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.student = User.objects.create_user(
+            email="student@example.com",
+            student_code="12345",
+            national_code="987654321",
+            phone_number="1234567890",
+            password="password123"
+        )
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com",
+            student_code="67890",
+            national_code="123456789",
+            phone_number="0987654321",
+            password="adminpassword"
+        )
+        self.complaint = Complaint.objects.create(student=self.student, title="Broken window")
+        self.message = ComplaintMessage.objects.create(complaint=self.complaint, sender=self.student, message="photo")
+        self.client.force_authenticate(user=self.student)
+
+    def image_bytes(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (1200, 800), 'red').save(buffer, 'JPEG')
+        return buffer.getvalue()
+
+    def start(self, content, content_type='image/jpeg'):
+        response = self.client.post(f'/api/complaints/messages/{self.message.id}/attachments/', {
+            'file_name': 'window.jpg', 'content_type': content_type, 'size': len(content),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data['id']
+
+    def put(self, attachment_id, content, start, total):
+        return self.client.generic(
+            'PUT', f'/api/complaints/attachments/{attachment_id}/', content,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f"bytes {start}-{start + len(content) - 1}/{total}",
+        )
+
+    def upload(self, content):
+        attachment_id = self.start(content)
+        for start in range(0, len(content), 1024):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.put(attachment_id, content[start:start + 1024], start, len(content))
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return attachment_id, response
+
+    @mock.patch('complaints.attachments.schedule_thumbnail')
+    def test_chunked_upload(self, schedule_thumbnail):
+        content = self.image_bytes()
+        attachment_id, response = self.upload(content)
+        self.assertTrue(response.data['completed'])
+        schedule_thumbnail.assert_called_once_with(ComplaintAttachment.objects.get().pk)
+
+        attachment = ComplaintAttachment.objects.get(pk=attachment_id)
+        with open(attachment.file.path, 'rb') as f:
+            self.assertEqual(f.read(), content)
+
+        messages = self.client.get(f'/api/complaints/{self.complaint.id}/messages/send/').data
+        self.assertEqual(messages[0]['attachments'][0]['id'], attachment_id)
+
+    @mock.patch('complaints.attachments.schedule_thumbnail')
+    def test_resume_after_out_of_order_chunk(self, schedule_thumbnail):
+        content = os.urandom(2500)
+        attachment_id = self.start(content)
+        self.assertEqual(self.put(attachment_id, content[:1024], 0, 2500).status_code, 200)
+
+        response = self.put(attachment_id, content[2048:], 2048, 2500)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['received'], 1024)
+
+        self.assertEqual(self.client.get(f'/api/complaints/attachments/{attachment_id}/').data['received'], 1024)
+        # resending an already stored chunk is also refused
+        self.assertEqual(self.put(attachment_id, content[:1024], 0, 2500).status_code, 409)
+
+    def test_chunk_limits(self):
+        content = os.urandom(3000)
+        attachment_id = self.start(content)
+        self.assertEqual(self.put(attachment_id, content[:2000], 0, 3000).status_code, 413)
+        response = self.put(attachment_id, content[:10], 0, 4000)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_validation(self):
+        url = f'/api/complaints/messages/{self.message.id}/attachments/'
+        response = self.client.post(url, {'file_name': 'a.exe', 'content_type': 'application/x-msdownload',
+                                          'size': 10}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(ATTACHMENT_MAX_SIZE=100):
+            response = self.client.post(url, {'file_name': 'a.jpg', 'content_type': 'image/jpeg',
+                                              'size': 101}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_only_sender_can_attach(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(f'/api/complaints/messages/{self.message.id}/attachments/', {
+            'file_name': 'a.jpg', 'content_type': 'image/jpeg', 'size': 10,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @mock.patch('complaints.attachments.schedule_thumbnail')
+    def test_range_download(self, schedule_thumbnail):
+        content = os.urandom(2000)
+        attachment_id, _ = self.upload(content)
+        url = f'/api/complaints/attachments/{attachment_id}/file/'
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], 'bytes 100-199/2000')
+        self.assertEqual(b''.join(response.streaming_content), content[100:200])
+
+        response = self.client.get(url, HTTP_RANGE='bytes=-50')
+        self.assertEqual(b''.join(response.streaming_content), content[-50:])
+
+        response = self.client.get(url, HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        self.client.force_authenticate(user=User.objects.create_user(
+            email="other@example.com",
+            student_code="54321",
+            national_code="1122334455",
+            phone_number="0911111111",
+            password="password123"
+        ))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+    @mock.patch('complaints.attachments.schedule_thumbnail')
+    def test_thumbnail(self, schedule_thumbnail):
+        attachment_id, _ = self.upload(self.image_bytes())
+        thumbnail_url = f'/api/complaints/attachments/{attachment_id}/thumbnail/'
+        self.assertEqual(self.client.get(thumbnail_url).status_code, status.HTTP_404_NOT_FOUND)
+
+        attachments.make_thumbnail(attachment_id)
+        ComplaintAttachment.objects.filter(pk=attachment_id).update(file_name='window.png')
+        response = self.client.get(thumbnail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="window-thumbnail.jpg"')
+        with Image.open(io.BytesIO(b''.join(response.streaming_content))) as thumbnail:
+            self.assertEqual(thumbnail.size, (320, 213))
+
+
+class ThumbnailPoolTest(APITransactionTestCase):
+    def test_thumbnail_is_generated_in_background(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        student = User.objects.create_user(
+            email="student@example.com",
+            student_code="12345",
+            national_code="987654321",
+            phone_number="1234567890",
+            password="password123"
+        )
+        complaint = Complaint.objects.create(student=student, title="Broken window")
+        message = ComplaintMessage.objects.create(complaint=complaint, sender=student, message="photo")
+        buffer = io.BytesIO()
+        Image.new('RGB', (640, 640), 'blue').save(buffer, 'PNG')
+
+        with override_settings(MEDIA_ROOT=media_root):
+            attachment = attachments.create_upload(ComplaintAttachment(
+                message=message, uploader=student, file_name='w.png', content_type='image/png',
+                size=len(buffer.getvalue()),
+            ))
+            attachments.receive_chunk(attachment, io.BytesIO(buffer.getvalue()), 0, len(buffer.getvalue()))
+            attachments.schedule_thumbnail(attachment.pk).result(timeout=10)
+        attachment.refresh_from_db()
+        self.assertTrue(attachment.thumbnail.name.endswith(f"{attachment.pk}.jpg"))
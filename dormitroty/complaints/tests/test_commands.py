@@ -0,0 +1,118 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from complaints.models import (
+    ArchivedComplaint, Complaint, ComplaintAttachment, ComplaintMessage, ComplaintSearchEntry
+)
+
+User = get_user_model()
+
+
+class ArchiveComplaintsCommandTest(APITestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com",
+            student_code="12345",
+            national_code="987654321",
+            phone_number="1234567890",
+            password="password123"
+        )
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com",
+            student_code="67890",
+            national_code="123456789",
+            phone_number="0987654321",
+            password="adminpassword"
+        )
+        self.old = [self.create_thread(f"old {i}", days_ago=400) for i in range(3)]
+        self.recent = self.create_thread("recent", days_ago=10)
+
+    def create_thread(self, title, days_ago):
+        complaint = Complaint.objects.create(student=self.student, title=title)
+        for i in range(2):
+            ComplaintMessage.objects.create(complaint=complaint, sender=self.student, message=f"{title} message {i}")
+        Complaint.objects.filter(pk=complaint.pk).update(
+            last_message_at=timezone.now() - timedelta(days=days_ago)
+        )
+        return complaint
+
+    def test_moves_old_complaints_in_batches(self):
+        out = StringIO()
+        call_command('archive_complaints', '--older-than', '365', '--batch-size', '2', stdout=out)
+        self.assertIn("archived 3 complaints", out.getvalue())
+
+        self.assertEqual(list(Complaint.objects.values_list('id', flat=True)), [self.recent.id])
+        self.assertEqual(ComplaintMessage.objects.count(), 2)
+        self.assertFalse(ComplaintSearchEntry.objects.exclude(complaint=self.recent).exists())
+
+        archived = ArchivedComplaint.objects.get(pk=self.old[0].id)
+        self.assertEqual(archived.title, "old 0")
+        self.assertEqual(archived.message_count, 2)
+        self.assertEqual([m['message'] for m in archived.get_messages()], ["old 0 message 0", "old 0 message 1"])
+
+    def test_archived_attachments_are_still_served(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(MEDIA_ROOT=media_root):
+            name = default_storage.save('complaint_attachments/scan.pdf', ContentFile(b'%PDF'))
+            thumbnail = default_storage.save('complaint_attachments/thumbnails/scan.jpg', ContentFile(b'jpg'))
+            ComplaintAttachment.objects.create(
+                message=self.old[0].messages.first(), uploader=self.student, file_name='scan.pdf',
+                content_type='application/pdf', size=4, received=4, file=name, thumbnail=thumbnail,
+                completed_at=timezone.now(),
+            )
+            call_command('archive_complaints', stdout=StringIO())
+
+            self.assertFalse(ComplaintAttachment.objects.exists())
+            self.assertTrue(default_storage.exists(name) and default_storage.exists(thumbnail))
+            attachment = ArchivedComplaint.objects.get(pk=self.old[0].id).get_messages()[0]['attachments'][0]
+            self.client.force_authenticate(user=self.student)
+            response = self.client.get(attachment['file_url'])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(b''.join(response.streaming_content), b'%PDF')
+            self.assertEqual(self.client.get(attachment['thumbnail_url']).status_code, status.HTTP_200_OK)
+
+            self.client.force_authenticate(user=User.objects.create_user(
+                email="other@example.com", student_code="54321", national_code="1122334455",
+                phone_number="0911111111", password="password123"
+            ))
+            self.assertEqual(self.client.get(attachment['file_url']).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command('archive_complaints', '--dry-run', stdout=out)
+        self.assertIn("3 complaints would be archived", out.getvalue())
+        self.assertEqual(Complaint.objects.count(), 4)
+        self.assertFalse(ArchivedComplaint.objects.exists())
+
+    def test_archived_thread_is_readable(self):
+        url = f'/api/complaints/{self.old[0].id}/messages/send/'
+        self.client.force_authenticate(user=self.admin)
+        live = self.client.get(url).json()
+        call_command('archive_complaints', stdout=StringIO())
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), live)
+        response = self.client.get(url, {'since_id': live[0]['id']})
+        self.assertEqual([m['id'] for m in response.data], [live[1]['id']])
+
+        other = User.objects.create_user(
+            email="other@example.com",
+            student_code="54321",
+            national_code="1122334455",
+            phone_number="0911111111",
+            password="password123"
+        )
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+from complaints.models import Complaint, ComplaintMessage, ComplaintSearchEntry
+from complaints.search import normalize, search
+
+User = get_user_model()
+
+
+class NormalizeTest(SimpleTestCase):
+    def test_arabic_letters(self):
+        self.assertEqual(normalize("كيف"), "کیف")
+
+    def test_digits(self):
+        self.assertEqual(normalize("اتاق ۱۰۱ و ٢٠٢"), "اتاق 101 و 202")
+
+    def test_zwnj_and_diacritics(self):
+        self.assertEqual(normalize("می‌خواهم  مُدیر"), "می خواهم مدیر")
+
+
+class ComplaintSearchTest(APITestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com",
+            student_code="12345",
+            national_code="987654321",
+            phone_number="1234567890",
+            password="password123"
+        )
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com",
+            student_code="67890",
+            national_code="123456789",
+            phone_number="0987654321",
+            password="adminpassword"
+        )
+        self.heater = Complaint.objects.create(student=self.student, title="شوفاژ اتاق ۱۰۱ خراب است")
+        self.water = Complaint.objects.create(student=self.student, title="آب گرم قطع است")
+        self.message = ComplaintMessage.objects.create(
+            complaint=self.water, sender=self.student, message="شوفاژ هم کار نمي‌كند"
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def get(self, q, **params):
+        return self.client.get('/api/complaints/search/', {'q': q, **params})
+
+    def test_matches_titles_and_messages(self):
+        response = self.get("شوفاژ")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        hits = {(hit['complaint'], hit['message']) for hit in response.data['results']}
+        self.assertEqual(hits, {(self.heater.id, None), (self.water.id, self.message.id)})
+        texts = {hit['text'] for hit in response.data['results']}
+        self.assertIn("شوفاژ هم کار نمي‌كند", texts)
+
+    def test_normalizes_query_and_text(self):
+        # Arabic yeh/kaf and a ZWNJ in the message, Persian spelling in the query
+        self.assertEqual([hit['message'] for hit in self.get("نمی کند").data['results']], [self.message.id])
+        self.assertEqual([hit['complaint'] for hit in self.get("101").data['results']], [self.heater.id])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.get("شوفاژ خراب").data['count'], 1)
+        self.assertEqual(self.get("شوفاژ یخچال").data['count'], 0)
+
+    def test_ranked_by_relevance(self):
+        best = ComplaintMessage.objects.create(
+            complaint=self.heater, sender=self.admin, message="شوفاژ شوفاژ شوفاژ تعمیر شد"
+        )
+        results = list(search("شوفاژ"))
+        self.assertEqual(results[0].message_id, best.id)
+        self.assertEqual([r.rank for r in results], sorted((r.rank for r in results), reverse=True))
+
+    def test_index_follows_updates_and_deletes(self):
+        self.message.message = "یخچال خراب است"
+        self.message.save()
+        self.assertEqual(self.get("یخچال").data['count'], 1)
+        self.assertEqual(self.get("نمی کند").data['count'], 0)
+
+        self.water.delete()
+        self.assertEqual(self.get("یخچال").data['count'], 0)
+        self.assertFalse(ComplaintSearchEntry.objects.filter(complaint_id=self.water.id).exists())
+
+    def test_paginated(self):
+        for i in range(3):
+            ComplaintMessage.objects.create(complaint=self.heater, sender=self.admin, message=f"شوفاژ {i}")
+        response = self.get("شوفاژ", page_size=2)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_requires_query(self):
+        self.assertEqual(self.get("").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.get("!!!").data['count'], 0)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user=self.student)
+        self.assertEqual(self.get("شوفاژ").status_code, status.HTTP_403_FORBIDDEN)
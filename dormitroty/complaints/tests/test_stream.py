@@ -0,0 +1,120 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from complaints.models import Complaint, ComplaintMessage
+from complaints.pubsub import InMemoryBroker, complaint_channel, get_broker
+
+User = get_user_model()
+
+
+class ComplaintMessageStreamTest(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com",
+            student_code="12345",
+            national_code="987654321",
+            phone_number="1234567890",
+            password="password123"
+        )
+        self.other = User.objects.create_user(
+            email="other@example.com",
+            student_code="54321",
+            national_code="123456789",
+            phone_number="0987654321",
+            password="password123"
+        )
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com",
+            student_code="67890",
+            national_code="1122334455",
+            phone_number="0911111111",
+            password="adminpassword"
+        )
+        self.complaint = Complaint.objects.create(student=self.student, title="Broken heater")
+
+    def auth(self, user, **headers):
+        return {'headers': {'Authorization': f'Bearer {AccessToken.for_user(user)}', **headers}}
+
+    async def next_event(self, response):
+        return (await asyncio.wait_for(anext(response.streaming_content), 2)).decode('utf-8')
+
+    async def send_message(self, text, sender=None):
+        def create():
+            with self.captureOnCommitCallbacks(execute=True):
+                return ComplaintMessage.objects.create(
+                    complaint=self.complaint, sender=sender or self.admin, message=text
+                )
+        return await sync_to_async(create)()
+
+    async def test_owner_receives_new_messages(self):
+        response = await self.async_client.get(
+            f'/api/complaints/{self.complaint.id}/messages/stream/', **self.auth(self.student)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        message = await self.send_message("Technician is on the way")
+        event = await self.next_event(response)
+        self.assertIn(f"id: {message.id}\n", event)
+        self.assertIn("Technician is on the way", event)
+        await response.streaming_content.aclose()
+
+    async def test_last_event_id_replays_missed_messages(self):
+        first = await self.send_message("first")
+        second = await self.send_message("second")
+        response = await self.async_client.get(
+            f'/api/complaints/{self.complaint.id}/messages/stream/',
+            **self.auth(self.student, **{'Last-Event-ID': str(first.id)}),
+        )
+        event = await self.next_event(response)
+        self.assertIn(f"id: {second.id}\n", event)
+        self.assertIn("second", event)
+        await response.streaming_content.aclose()
+
+    async def test_staff_stream_receives_every_thread(self):
+        response = await self.async_client.get('/api/complaints/stream/', **self.auth(self.admin))
+        self.assertEqual(response.status_code, 200)
+        await self.send_message("from student", sender=self.student)
+        self.assertIn("from student", await self.next_event(response))
+        await response.streaming_content.aclose()
+
+    async def test_permissions(self):
+        url = f'/api/complaints/{self.complaint.id}/messages/stream/'
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+        self.assertEqual((await self.async_client.get(url, **self.auth(self.other))).status_code, 403)
+        self.assertEqual((await self.async_client.get('/api/complaints/stream/', **self.auth(self.student))).status_code, 403)
+        self.assertEqual(
+            (await self.async_client.get('/api/complaints/999/messages/stream/', **self.auth(self.student))).status_code,
+            404
+        )
+
+    def test_requires_asgi(self):
+        response = self.client.get(
+            f'/api/complaints/{self.complaint.id}/messages/stream/', **self.auth(self.student)
+        )
+        self.assertEqual(response.status_code, 501)
+
+
+class InMemoryBrokerTest(TestCase):
+    async def test_slow_subscriber_is_told_to_resync(self):
+        broker = InMemoryBroker(maxsize=2)
+        subscription = broker.subscribe('channel')
+        for i in range(3):
+            broker.publish('channel', {'id': i})
+        await asyncio.sleep(0)
+        # the oldest message is dropped to make room for the resync marker
+        self.assertEqual(await subscription.get(1), {'id': 1})
+        self.assertIsNone(await subscription.get(1))
+        subscription.close()
+        self.assertEqual(broker.subscriber_count('channel'), 0)
+
+    async def test_closing_stream_unsubscribes(self):
+        broker = get_broker()
+        channel = complaint_channel(12345)
+        subscription = broker.subscribe(channel)
+        self.assertEqual(broker.subscriber_count(channel), 1)
+        subscription.close()
+        self.assertEqual(broker.subscriber_count(channel), 0)
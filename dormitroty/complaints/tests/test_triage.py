@@ -0,0 +1,117 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from complaints.models import Complaint
+from dormitroty.testing import QueryBudgetMixin
+
+User = get_user_model()
+
+
+@override_settings(COMPLAINT_SLA_HOURS={1: 4, 2: 24, 3: 72, 4: 168})
+class ComplaintTriageTest(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com",
+            student_code="12345",
+            national_code="987654321",
+            phone_number="1234567890",
+            password="password123"
+        )
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com",
+            student_code="67890",
+            national_code="123456789",
+            phone_number="0987654321",
+            password="adminpassword"
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def create(self, title, priority=Complaint.Priority.NORMAL, hours_left=None, **kwargs):
+        complaint = Complaint.objects.create(student=self.student, title=title, priority=priority, **kwargs)
+        if hours_left is not None:
+            complaint.sla_deadline = timezone.now() + timedelta(hours=hours_left)
+            complaint.save(update_fields=['sla_deadline'])
+        return complaint
+
+    def test_deadline_follows_priority(self):
+        complaint = self.create("leak", priority=Complaint.Priority.URGENT)
+        self.assertAlmostEqual(
+            complaint.sla_deadline, timezone.now() + timedelta(hours=4), delta=timedelta(minutes=1)
+        )
+
+    def test_queue_order(self):
+        normal_late = self.create("normal, due later", hours_left=50)
+        normal_soon = self.create("normal, due soon", hours_left=1)
+        urgent = self.create("urgent", priority=Complaint.Priority.URGENT)
+        self.create("resolved", priority=Complaint.Priority.URGENT, resolved_at=timezone.now())
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/complaints/triage/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['id'] for c in response.data], [urgent.id, normal_soon.id, normal_late.id])
+
+        response = self.client.get('/api/complaints/triage/', {'limit': 1})
+        self.assertEqual([c['id'] for c in response.data], [urgent.id])
+
+    def test_queue_filters(self):
+        internet = self.create("wifi", category=Complaint.Category.INTERNET)
+        self.create("dirty", category=Complaint.Category.CLEANING)
+        response = self.client.get('/api/complaints/triage/', {'category': 'internet'})
+        self.assertEqual([c['id'] for c in response.data], [internet.id])
+        self.assertEqual(self.client.get('/api/complaints/triage/', {'category': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/complaints/triage/', {'limit': '0'}).status_code, 400)
+
+    def test_triage_update(self):
+        complaint = self.create("wifi", hours_left=-1)
+        url = f'/api/complaints/{complaint.id}/triage/'
+        response = self.client.patch(url, {'priority': Complaint.Priority.HIGH}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['overdue'])
+        complaint.refresh_from_db()
+        self.assertGreater(complaint.sla_deadline, timezone.now() + timedelta(hours=23))
+
+        self.client.patch(url, {'resolved': True}, format='json')
+        self.assertEqual(self.client.get('/api/complaints/triage/').data, [])
+
+    def test_triage_is_staff_only(self):
+        complaint = self.create("wifi")
+        self.client.force_authenticate(user=self.student)
+        self.assertEqual(self.client.get('/api/complaints/triage/').status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.patch(f'/api/complaints/{complaint.id}/triage/', {'priority': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_student_sets_category_not_priority(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.post('/api/complaints/', {'title': "wifi", 'category': 'internet', 'priority': 1})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['category'], 'internet')
+        self.assertEqual(response.data['priority'], Complaint.Priority.NORMAL)
+
+    def test_escalate_overdue(self):
+        low = self.create("low", priority=Complaint.Priority.LOW, hours_left=-1)
+        urgent = self.create("urgent", priority=Complaint.Priority.URGENT, hours_left=-1)
+        on_time = self.create("on time", hours_left=10)
+        resolved = self.create("resolved", hours_left=-1, resolved_at=timezone.now())
+
+        out = StringIO()
+        call_command('escalate_complaints', stdout=out)
+        self.assertIn("escalated 2 complaints", out.getvalue())
+
+        for complaint in (low, urgent, on_time, resolved):
+            complaint.refresh_from_db()
+        self.assertEqual((low.priority, low.escalation_count), (Complaint.Priority.NORMAL, 1))
+        self.assertGreater(low.sla_deadline, timezone.now() + timedelta(hours=71))
+        self.assertEqual((urgent.priority, urgent.escalation_count), (Complaint.Priority.URGENT, 1))
+        self.assertGreater(urgent.sla_deadline, timezone.now() + timedelta(hours=3))
+        self.assertEqual(on_time.escalation_count, 0)
+        self.assertEqual(resolved.escalation_count, 0)
+
+        out = StringIO()
+        call_command('escalate_complaints', '--dry-run', stdout=out)
+        self.assertIn("0 complaints are overdue", out.getvalue())
@@ -1,7 +1,14 @@
-from rest_framework.test import APITestCase
+import threading
+import time
+from unittest import mock
+
+from rest_framework.test import APITestCase, APITransactionTestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from django.db import connection
 from complaints.models import Complaint, ComplaintMessage
+from complaints.views import ComplaintMessageListAPIView
+from dormitroty.testing import QueryBudgetMixin
 
 User = get_user_model()
 
@@ -63,6 +70,48 @@ class ComplaintAPITestCase(APITestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['message'], "Test Message")
 
+    def test_list_messages_since_id(self):
+        messages = [
+            ComplaintMessage.objects.create(complaint=self.complaint, sender=self.student, message=f"m{i}")
+            for i in range(5)
+        ]
+        url = f'/api/complaints/{self.complaint.id}/messages/send/'
+        response = self.client.get(url, {'since_id': messages[2].id})
+        self.assertEqual([m['id'] for m in response.data], [messages[3].id, messages[4].id])
+
+        response = self.client.get(url, {'since_id': 0, 'limit': 2})
+        self.assertEqual([m['id'] for m in response.data], [messages[0].id, messages[1].id])
+
+        response = self.client.get(url, {'since_id': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_messages_query_count_is_constant(self):
+        ComplaintMessage.objects.bulk_create([
+            ComplaintMessage(complaint=self.complaint, sender=self.admin if i % 2 else self.student, message=f"m{i}")
+            for i in range(500)
+        ])
+        # the complaint lookup, the messages joined with their senders, their attachments
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/complaints/{self.complaint.id}/messages/send/')
+        self.assertEqual(len(response.data), 500)
+
+    def test_missing_complaint_is_404(self):
+        for url in ('/api/complaints/999/messages/send/', '/api/complaints/abc/messages/send/'):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post('/api/complaints/999/messages/', {"message": "hi"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @mock.patch.object(ComplaintMessageListAPIView, 'recheck_interval', 0.1)
+    def test_long_poll_times_out_with_empty_list(self):
+        message = ComplaintMessage.objects.create(complaint=self.complaint, sender=self.student, message="old")
+        started = time.monotonic()
+        response = self.client.get(
+            f'/api/complaints/{self.complaint.id}/messages/send/', {'since_id': message.id, 'wait': 1}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+        self.assertGreaterEqual(time.monotonic() - started, 1)
+
     def test_permission_denied_for_other_students(self):
         # Test that another student cannot access the complaint
         other_student = User.objects.create_user(
@@ -80,7 +129,7 @@ class ComplaintAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
 
-class ComplaintMessageAPITests(APITestCase):
+class ComplaintMessageAPITests(QueryBudgetMixin, APITestCase):
     def setUp(self):
         self.student = User.objects.create_user(
             email="student@example.com",
@@ -112,6 +161,14 @@ class ComplaintMessageAPITests(APITestCase):
         )
         self.client.force_authenticate(user=self.student)
 
+    def test_message_list_stays_within_query_budget(self):
+        for i in range(5):
+            ComplaintMessage.objects.create(complaint=self.complaint, sender=self.admin if i % 2 else self.student,
+                                            message=f"پیام {i}")
+        response = self.client.get(f"/api/complaints/{self.complaint.id}/messages/send/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 6)
+
     def test_student_can_delete_own_complaint(self):
         url = f"/api/complaints/{self.complaint.id}/delete/"
         response = self.client.delete(url)
@@ -154,3 +211,149 @@ class ComplaintMessageAPITests(APITestCase):
         data = {"message": "پیام جعلی"}
         response = self.client.put(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ComplaintMessageLongPollTest(APITransactionTestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com",
+            student_code="12345",
+            national_code="987654321",
+            phone_number="1234567890",
+            password="password123"
+        )
+        self.complaint = Complaint.objects.create(student=self.student, title="Test Complaint")
+        self.client.force_authenticate(user=self.student)
+
+    @mock.patch.object(ComplaintMessageListAPIView, 'recheck_interval', 10)
+    def test_long_poll_returns_when_message_arrives(self):
+        def reply():
+            time.sleep(0.3)
+            try:
+                ComplaintMessage.objects.create(complaint=self.complaint, sender=self.student, message="reply")
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=reply)
+        thread.start()
+        started = time.monotonic()
+        response = self.client.get(
+            f'/api/complaints/{self.complaint.id}/messages/send/', {'since_id': 0, 'wait': 5}
+        )
+        thread.join()
+        self.assertEqual([m['message'] for m in response.data], ["reply"])
+        # woken by the publish, not by the recheck interval or the wait timeout
+        self.assertLess(time.monotonic() - started, 3)
+
+
+
+class ComplaintInboxTest(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com",
+            student_code="12345",
+            national_code="987654321",
+            phone_number="1234567890",
+            password="password123"
+        )
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com",
+            student_code="67890",
+            national_code="123456789",
+            phone_number="0987654321",
+            password="adminpassword"
+        )
+        self.older = Complaint.objects.create(student=self.student, title="Older")
+        self.newer = Complaint.objects.create(student=self.student, title="Newer")
+
+    def send(self, complaint, sender, text="msg"):
+        return ComplaintMessage.objects.create(complaint=complaint, sender=sender, message=text)
+
+    def test_counters_follow_messages(self):
+        self.send(self.older, self.student)
+        self.send(self.older, self.student)
+        reply = self.send(self.older, self.admin)
+        self.older.refresh_from_db()
+        self.assertEqual(self.older.message_count, 3)
+        self.assertEqual(self.older.unread_by_staff, 2)
+        self.assertEqual(self.older.unread_by_student, 1)
+        self.assertFalse(self.older.is_read)
+
+        reply.delete()
+        self.older.refresh_from_db()
+        self.assertEqual(self.older.message_count, 2)
+
+    def test_inbox_orders_by_last_message(self):
+        self.send(self.newer, self.student)
+        self.send(self.older, self.student)
+        self.send(self.older, self.student)
+        self.client.force_authenticate(user=self.admin)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/complaints/inbox/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c['id'] for c in response.data['results']], [self.older.id, self.newer.id])
+        self.assertEqual(response.data['unread_total'], 3)
+        self.assertEqual(response.data['results'][0]['student_code'], "12345")
+
+    def test_unread_total_does_not_depend_on_the_page(self):
+        self.send(self.older, self.student)
+        self.send(self.newer, self.student)
+        self.send(self.newer, self.student)
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/complaints/inbox/', {'page_size': 1})
+        self.assertEqual(response.data['unread_total'], 3)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['unread_total'], 3)
+        self.assertIsNone(response.data['next'])
+
+    def test_unread_total_on_an_empty_page(self):
+        self.send(self.older, self.student)
+        self.send(self.newer, self.student)
+        self.send(self.newer, self.student)
+        self.client.force_authenticate(user=self.admin)
+        next_page = self.client.get('/api/complaints/inbox/', {'page_size': 1}).data['next']
+        self.older.delete()
+        response = self.client.get(next_page)
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['unread_total'], 2)
+
+    def test_inbox_unread_filter(self):
+        self.send(self.newer, self.student)
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get('/api/complaints/inbox/', {'unread': 'true'})
+        self.assertEqual([c['id'] for c in response.data['results']], [self.newer.id])
+
+    def test_inbox_is_staff_only(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get('/api/complaints/inbox/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_mark_read(self):
+        self.send(self.older, self.student)
+        self.send(self.older, self.admin)
+        url = f'/api/complaints/{self.older.id}/read/'
+
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_204_NO_CONTENT)
+        self.older.refresh_from_db()
+        self.assertEqual((self.older.unread_by_staff, self.older.unread_by_student), (0, 1))
+        self.assertTrue(self.older.is_read)
+
+        self.client.force_authenticate(user=self.student)
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_204_NO_CONTENT)
+        self.older.refresh_from_db()
+        self.assertEqual(self.older.unread_by_student, 0)
+
+    def test_mark_read_permissions(self):
+        other = User.objects.create_user(
+            email="other@example.com",
+            student_code="54321",
+            national_code="1122334455",
+            phone_number="0911111111",
+            password="password123"
+        )
+        self.client.force_authenticate(user=other)
+        response = self.client.post(f'/api/complaints/{self.older.id}/read/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.post('/api/complaints/999/read/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -5,13 +5,24 @@ from .views import (
     ComplaintMessageListAPIView,
     ComplaintDeleteAPIView,
     ComplaintMessageDeleteAPIView,
-    ComplaintMessageUpdateAPIView
+    ComplaintMessageUpdateAPIView,
+    ComplaintMessageStreamView,
+    ComplaintInboxAPIView,
+    ComplaintMarkReadAPIView,
+    ComplaintSearchAPIView,
+    ComplaintTriageQueueAPIView,
+    ComplaintTriageUpdateAPIView,
+    ComplaintAttachmentCreateAPIView,
+    ComplaintAttachmentUploadAPIView,
+    AttachmentFileAPIView,
+    AttachmentThumbnailAPIView,
+    AsyncComplaintMessageListView,
 )
 
 urlpatterns = [
     path('', ComplaintListCreateAPIView.as_view(), name='complaint-list-create'),
-    path('<str:complaint_id>/messages/', ComplaintMessageCreateAPIView.as_view(), name='complaint-messages'),
-    path('<str:complaint_id>/messages/send/', ComplaintMessageListAPIView.as_view(), name='complaint-send-message'),
+    path('<int:complaint_id>/messages/', ComplaintMessageCreateAPIView.as_view(), name='complaint-messages'),
+    path('<int:complaint_id>/messages/send/', ComplaintMessageListAPIView.as_view(), name='complaint-send-message'),
 ]
 
 urlpatterns += [
@@ -19,3 +30,24 @@ urlpatterns += [
     path('messages/<int:pk>/delete/', ComplaintMessageDeleteAPIView.as_view(), name='message-delete'),
     path('messages/<int:pk>/update/', ComplaintMessageUpdateAPIView.as_view(), name='message-update'),
 ]
+
+urlpatterns += [
+    path('inbox/', ComplaintInboxAPIView.as_view(), name='complaint-inbox'),
+    path('<int:pk>/read/', ComplaintMarkReadAPIView.as_view(), name='complaint-mark-read'),
+    path('search/', ComplaintSearchAPIView.as_view(), name='complaint-search'),
+    path('triage/', ComplaintTriageQueueAPIView.as_view(), name='complaint-triage'),
+    path('<int:pk>/triage/', ComplaintTriageUpdateAPIView.as_view(), name='complaint-triage-update'),
+    path('messages/<int:message_id>/attachments/', ComplaintAttachmentCreateAPIView.as_view(),
+         name='complaint-attachment-create'),
+    path('attachments/<uuid:pk>/', ComplaintAttachmentUploadAPIView.as_view(), name='complaint-attachment'),
+    path('attachments/<uuid:pk>/file/', AttachmentFileAPIView.as_view(), name='complaint-attachment-file'),
+    path('attachments/<uuid:pk>/thumbnail/', AttachmentThumbnailAPIView.as_view(),
+         name='complaint-attachment-thumbnail'),
+]
+
+urlpatterns += [
+    path('stream/', ComplaintMessageStreamView.as_view(), name='complaint-stream'),
+    path('<int:complaint_id>/messages/stream/', ComplaintMessageStreamView.as_view(), name='complaint-message-stream'),
+    path('<int:complaint_id>/messages/async/', AsyncComplaintMessageListView.as_view(),
+         name='complaint-messages-async'),
+]
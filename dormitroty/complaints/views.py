@@ -1,12 +1,43 @@
-from rest_framework import generics, permissions
+import asyncio
+import os
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import F, Func, IntegerField, Subquery
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import content_disposition_header
+from django.views import View
+from rest_framework import generics, permissions, status
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
-from .models import Complaint, ComplaintMessage
-from .serializers import ComplaintSerializer, ComplaintMessageSerializer
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+from dormitroty.async_api import AsyncAPIView, authenticate
+from .attachments import UploadError, create_upload, iter_range, parse_content_range, parse_range, receive_chunk
+from .models import ArchivedAttachment, ArchivedComplaint, Complaint, ComplaintAttachment, ComplaintMessage
+from .pagination import InboxCursorPagination, SearchResultsPagination
+from .pubsub import STAFF_CHANNEL, complaint_channel, get_broker
+from .search import search
+from .serializers import (
+    ComplaintInboxSerializer, ComplaintSearchResultSerializer, ComplaintSerializer, ComplaintMessageSerializer,
+    ComplaintTriageSerializer, ComplaintAttachmentSerializer
+)
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
 
 
+def int_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    if not value.isdigit():
+        raise ValidationError({name: "باید عدد صحیح نامنفی باشد."})
+    return int(value)
+
+
 @extend_schema(
     summary="لیست یا ثبت شکایت",
     description="""
@@ -35,6 +66,158 @@ class ComplaintListCreateAPIView(generics.ListCreateAPIView):
         serializer.save(student=self.request.user)
 
 
+@extend_schema(
+    summary="صندوق شکایات مدیر",
+    description="""
+    شکایات به ترتیب آخرین فعالیت همراه با تعداد پیام‌های خوانده‌نشده.
+    unread_total مجموع پیام‌های خوانده‌نشده همه شکایات است، مستقل از صفحه.
+    """,
+    parameters=[
+        OpenApiParameter(name='unread', type=OpenApiTypes.BOOL, required=False,
+                         description='فقط شکایات دارای پیام خوانده‌نشده'),
+    ],
+    responses={
+        200: OpenApiResponse(response=ComplaintInboxSerializer(many=True), description="صندوق شکایات"),
+        403: OpenApiResponse(description="دسترسی غیرمجاز"),
+    }
+)
+class ComplaintInboxAPIView(generics.ListAPIView):
+    serializer_class = ComplaintInboxSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = InboxCursorPagination
+    # the page, plus the user when the JWT user cache misses
+    query_budget = 2
+
+    def get_queryset(self):
+        # Uncorrelated scalar subquery: evaluated once, so the page and the grand total come back in one statement.
+        unread_total = Complaint.objects.order_by().annotate(
+            total=Func(F('unread_by_staff'), function='SUM', output_field=IntegerField())
+        ).values('total')
+        complaints = Complaint.objects.select_related('student').annotate(unread_total=Subquery(unread_total))
+        if self.request.query_params.get('unread') in ('true', '1'):
+            complaints = complaints.filter(unread_by_staff__gt=0)
+        return complaints
+
+
+@extend_schema(
+    summary="صف رسیدگی به شکایات",
+    description="""
+    شکایات باز به ترتیب اولویت و سپس نزدیک‌ترین مهلت رسیدگی (SLA).
+    شکایاتی که از مهلت گذشته‌اند با overdue=true مشخص می‌شوند.
+    """,
+    parameters=[
+        OpenApiParameter(name='limit', type=OpenApiTypes.INT, required=False,
+                         description='تعداد شکایات (پیش‌فرض ۲۰، حداکثر ۱۰۰)'),
+        OpenApiParameter(name='category', type=OpenApiTypes.STR, required=False,
+                         enum=Complaint.Category.values, description='دسته‌بندی'),
+    ],
+    responses={
+        200: OpenApiResponse(response=ComplaintTriageSerializer(many=True), description="صف شکایات"),
+        400: OpenApiResponse(description="پارامتر نامعتبر"),
+        403: OpenApiResponse(description="دسترسی غیرمجاز"),
+    }
+)
+class ComplaintTriageQueueAPIView(generics.ListAPIView):
+    serializer_class = ComplaintTriageSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = None
+    default_limit = 20
+    max_limit = 100
+    # the page, plus the user when the JWT user cache misses
+    query_budget = 2
+
+    def get_queryset(self):
+        # Filter and ordering match complaint_triage_idx, so this reads the first N index entries.
+        complaints = Complaint.objects.filter(resolved_at__isnull=True).select_related('student')
+        category = self.request.query_params.get('category')
+        if category:
+            if category not in Complaint.Category.values:
+                raise ValidationError({'category': "دسته‌بندی نامعتبر است."})
+            complaints = complaints.filter(category=category)
+        limit = self.request.query_params.get('limit') or str(self.default_limit)
+        if not limit.isdigit() or int(limit) < 1:
+            raise ValidationError({'limit': "باید عدد صحیح مثبت باشد."})
+        return complaints.order_by('priority', 'sla_deadline', 'id')[:min(int(limit), self.max_limit)]
+
+
+@extend_schema(
+    summary="تعیین اولویت، دسته‌بندی یا وضعیت رسیدگی شکایت",
+    description="""
+    فقط مدیر. با تغییر اولویت، مهلت رسیدگی بر اساس اولویت جدید از همین لحظه محاسبه می‌شود.
+    resolved=true شکایت را از صف رسیدگی خارج می‌کند.
+    """,
+    parameters=[
+        OpenApiParameter(name='pk', location=OpenApiParameter.PATH, type=int, description='شناسه شکایت')
+    ],
+    responses={
+        200: OpenApiResponse(response=ComplaintTriageSerializer, description="به‌روزرسانی موفق"),
+        403: OpenApiResponse(description="دسترسی غیرمجاز"),
+        404: OpenApiResponse(description="شکایت یافت نشد"),
+    }
+)
+class ComplaintTriageUpdateAPIView(generics.UpdateAPIView):
+    queryset = Complaint.objects.select_related('student')
+    serializer_class = ComplaintTriageSerializer
+    permission_classes = [permissions.IsAdminUser]
+    http_method_names = ['patch']
+
+
+@extend_schema(
+    summary="جستجو در شکایات و پیام‌ها",
+    description="""
+    جستجوی متنی در عنوان شکایات و متن پیام‌ها، مرتب‌شده بر اساس میزان تطابق.
+    ی/ك عربی، اعداد فارسی و نیم‌فاصله پیش از جستجو یکسان‌سازی می‌شوند.
+    """,
+    parameters=[
+        OpenApiParameter(name='q', type=OpenApiTypes.STR, required=True, description='عبارت جستجو'),
+    ],
+    responses={
+        200: OpenApiResponse(response=ComplaintSearchResultSerializer(many=True), description="نتایج جستجو"),
+        400: OpenApiResponse(description="عبارت جستجو وارد نشده است"),
+        403: OpenApiResponse(description="دسترسی غیرمجاز"),
+    }
+)
+class ComplaintSearchAPIView(generics.ListAPIView):
+    serializer_class = ComplaintSearchResultSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = SearchResultsPagination
+    read_replica = True
+
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': "عبارت جستجو الزامی است."})
+        return search(query)
+
+
+@extend_schema(
+    summary="علامت‌گذاری شکایت به عنوان خوانده‌شده",
+    description="برای مدیر پیام‌های دانشجو و برای دانشجو پیام‌های مدیر خوانده‌شده علامت می‌خورند.",
+    request=None,
+    parameters=[
+        OpenApiParameter(name='pk', location=OpenApiParameter.PATH, type=int, description='شناسه شکایت')
+    ],
+    responses={
+        204: OpenApiResponse(description="انجام شد"),
+        403: OpenApiResponse(description="دسترسی غیرمجاز"),
+        404: OpenApiResponse(description="شکایت یافت نشد"),
+    }
+)
+class ComplaintMarkReadAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        complaint = get_object_or_404(Complaint.objects.only('student_id'), pk=pk)
+        user = request.user
+        if user.is_staff:
+            Complaint.objects.filter(pk=pk).update(unread_by_staff=0, is_read=True)
+        elif complaint.student_id == user.pk:
+            Complaint.objects.filter(pk=pk).update(unread_by_student=0)
+        else:
+            raise PermissionDenied("دسترسی به این شکایت ندارید.")
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 @extend_schema(
     summary="ارسال پیام در یک شکایت",
     description="""
@@ -57,10 +240,9 @@ class ComplaintMessageCreateAPIView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
-        complaint_id = self.kwargs['complaint_id']
-        complaint = Complaint.objects.get(id=complaint_id)
+        complaint = get_object_or_404(Complaint.objects.only('id', 'student_id'), pk=self.kwargs['complaint_id'])
 
-        if self.request.user != complaint.student and not self.request.user.is_staff:
+        if self.request.user.pk != complaint.student_id and not self.request.user.is_staff:
             raise PermissionDenied("شما مجاز به ارسال پیام در این شکایت نیستید.")
 
         serializer.save(complaint=complaint, sender=self.request.user)
@@ -71,29 +253,143 @@ class ComplaintMessageCreateAPIView(generics.CreateAPIView):
     description="""
     پیام‌های موجود در یک شکایت را لیست می‌کند.
     فقط دانشجوی صاحب شکایت یا مدیر می‌تواند این پیام‌ها را مشاهده کند.
+    - با since_id فقط پیام‌های جدیدتر از آن شناسه برگردانده می‌شوند.
+    - با wait (همراه since_id) اگر پیام جدیدی نباشد، درخواست حداکثر تا wait ثانیه منتظر پیام جدید می‌ماند.
+      برای دنبال‌کردن طولانی‌مدت یک گفتگو از جریان SSE در /api/complaints/<id>/messages/stream/ استفاده کنید.
+    - پیام‌های شکایات بایگانی‌شده نیز از بایگانی خوانده می‌شوند.
     """,
     responses={
         200: OpenApiResponse(response=ComplaintMessageSerializer(many=True), description="لیست پیام‌ها"),
+        400: OpenApiResponse(description="پارامتر نامعتبر"),
         403: OpenApiResponse(description="دسترسی غیرمجاز"),
         404: OpenApiResponse(description="شکایت یافت نشد"),
     },
     parameters=[
         OpenApiParameter(name='complaint_id', type=OpenApiTypes.INT, location=OpenApiParameter.PATH,
                          description='شناسه شکایت', required=True),
+        OpenApiParameter(name='since_id', type=OpenApiTypes.INT, required=False,
+                         description='فقط پیام‌های با شناسه بزرگ‌تر'),
+        OpenApiParameter(name='limit', type=OpenApiTypes.INT, required=False,
+                         description='حداکثر تعداد پیام (پیش‌فرض ۱۰۰ همراه since_id، حداکثر ۵۰۰)'),
+        OpenApiParameter(name='wait', type=OpenApiTypes.INT, required=False,
+                         description='حداکثر ثانیه‌های انتظار برای پیام جدید (long-polling، حداکثر ۵)'),
     ]
 )
 class ComplaintMessageListAPIView(generics.ListAPIView):
     serializer_class = ComplaintMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    default_limit = 100
+    max_limit = 500
+    # A waiting request holds a WSGI worker (under ASGI, a thread of the sync view pool)
+    # for the whole wait, so a few hundred pollers would take them all. Waits stay short;
+    # clients following a thread for longer use the SSE stream, which holds no thread.
+    max_wait = 5
+    # Upper bound on how late a long-poll notices a message published by another
+    # process, which the in-process broker cannot signal.
+    recheck_interval = 2
+    # complaint, messages and their attachments, plus the user when the JWT user cache misses
+    query_budget = 4
 
     def get_queryset(self):
-        complaint_id = self.kwargs['complaint_id']
-        complaint = Complaint.objects.get(id=complaint_id)
+        complaint = get_object_or_404(Complaint.objects.only('id', 'student_id'), pk=self.kwargs['complaint_id'])
 
-        if self.request.user != complaint.student and not self.request.user.is_staff:
+        if self.request.user.pk != complaint.student_id and not self.request.user.is_staff:
             raise PermissionDenied("دسترسی به پیام‌های این شکایت ندارید.")
 
-        return ComplaintMessage.objects.filter(complaint=complaint).order_by('created_at')
+        # sender_name needs the sender; join it instead of one query per message,
+        # and fetch the attachments of the whole page in one more query.
+        messages = (ComplaintMessage.objects.filter(complaint=complaint)
+                    .select_related('sender').prefetch_related('attachments').order_by('id'))
+        since_id = self.int_param('since_id')
+        limit = self.int_param('limit')
+        if since_id is not None:
+            messages = messages.filter(id__gt=since_id)
+            limit = limit or self.default_limit
+        if limit:
+            messages = messages[:min(limit, self.max_limit)]
+        return messages
+
+    def list(self, request, *args, **kwargs):
+        try:
+            queryset = self.get_queryset()
+        except Http404:
+            return self.list_archived()
+        wait = min(self.int_param('wait') or 0, self.max_wait)
+        if self.int_param('since_id') is None or not wait:
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        # each recheck reruns the page
+        request._request.query_budget = None
+        deadline = time.monotonic() + wait
+        with get_broker().waiter(complaint_channel(self.kwargs['complaint_id'])) as published:
+            messages = list(queryset.all())
+            while not messages:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                published.wait(min(remaining, self.recheck_interval))
+                published.clear()
+                messages = list(queryset.all())
+        return Response(self.get_serializer(messages, many=True).data)
+
+    def list_archived(self):
+        # Read-through for threads moved away by the archive_complaints command.
+        archived = get_object_or_404(ArchivedComplaint, pk=self.kwargs['complaint_id'])
+        if self.request.user.pk != archived.student_id and not self.request.user.is_staff:
+            raise PermissionDenied("دسترسی به پیام‌های این شکایت ندارید.")
+
+        messages = archived.get_messages()
+        since_id = self.int_param('since_id')
+        limit = self.int_param('limit')
+        if since_id is not None:
+            messages = [message for message in messages if message['id'] > since_id]
+            limit = limit or self.default_limit
+        if limit:
+            messages = messages[:min(limit, self.max_limit)]
+        return Response(messages)
+
+    def int_param(self, name):
+        return int_param(self.request.query_params, name)
+
+
+class AsyncComplaintMessageListView(AsyncAPIView):
+    """
+    ComplaintMessageListAPIView without ``wait``, on the async ORM. Senders are
+    joined and attachments prefetched, so the serializer runs without queries.
+    """
+    default_limit = ComplaintMessageListAPIView.default_limit
+    max_limit = ComplaintMessageListAPIView.max_limit
+
+    async def get(self, request, complaint_id):
+        since_id = int_param(request.GET, 'since_id')
+        limit = int_param(request.GET, 'limit')
+        if since_id is not None:
+            limit = limit or self.default_limit
+        if limit:
+            limit = min(limit, self.max_limit)
+
+        complaint = await Complaint.objects.filter(pk=complaint_id).only('id', 'student_id').afirst()
+        if complaint is None:
+            archived = await ArchivedComplaint.objects.filter(pk=complaint_id).afirst()
+            if archived is None:
+                raise Http404
+            if request.user.pk != archived.student_id and not request.user.is_staff:
+                raise PermissionDenied("دسترسی به پیام‌های این شکایت ندارید.")
+            messages = archived.get_messages()
+            if since_id is not None:
+                messages = [message for message in messages if message['id'] > since_id]
+            return messages[:limit] if limit else messages
+
+        if request.user.pk != complaint.student_id and not request.user.is_staff:
+            raise PermissionDenied("دسترسی به پیام‌های این شکایت ندارید.")
+        messages = (ComplaintMessage.objects.filter(complaint=complaint)
+                    .select_related('sender').prefetch_related('attachments').order_by('id'))
+        if since_id is not None:
+            messages = messages.filter(id__gt=since_id)
+        if limit:
+            messages = messages[:limit]
+        return ComplaintMessageSerializer([message async for message in messages], many=True).data
+
 
 @extend_schema(
     summary="حذف یک شکایت (اتاق چت)",
@@ -114,7 +410,7 @@ class ComplaintDeleteAPIView(generics.DestroyAPIView):
 
     def perform_destroy(self, instance):
         user = self.request.user
-        if user != instance.student and not user.is_staff:
+        if user.pk != instance.student_id and not user.is_staff:
             raise PermissionDenied("شما مجاز به حذف این شکایت نیستید.")
         instance.delete()
 
@@ -137,7 +433,7 @@ class ComplaintMessageDeleteAPIView(generics.DestroyAPIView):
 
     def perform_destroy(self, instance):
         user = self.request.user
-        if user != instance.sender and not user.is_staff:
+        if user.pk != instance.sender_id and not user.is_staff:
             raise PermissionDenied("شما مجاز به حذف این پیام نیستید.")
         instance.delete()
 
@@ -155,13 +451,259 @@ class ComplaintMessageDeleteAPIView(generics.DestroyAPIView):
     }
 )
 class ComplaintMessageUpdateAPIView(generics.UpdateAPIView):
-    queryset = ComplaintMessage.objects.all()
+    queryset = ComplaintMessage.objects.select_related('sender').prefetch_related('attachments')
     serializer_class = ComplaintMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_update(self, serializer):
-        instance = self.get_object()
         user = self.request.user
-        if user != instance.sender:
+        if user.pk != serializer.instance.sender_id:
             raise PermissionDenied("شما مجاز به ویرایش این پیام نیستید.")
-        serializer.save()
\ No newline at end of file
+        serializer.save()
+
+
+@extend_schema(
+    summary="شروع بارگذاری پیوست برای یک پیام",
+    description="""
+    فقط فرستنده پیام. نام، نوع و حجم فایل اعلام می‌شود و سپس محتوا به صورت
+    قطعه‌قطعه با PUT روی آدرس پیوست ارسال می‌شود.
+    """,
+    parameters=[
+        OpenApiParameter(name='message_id', type=OpenApiTypes.INT, location=OpenApiParameter.PATH,
+                         description='شناسه پیام', required=True),
+    ],
+    request=ComplaintAttachmentSerializer,
+    responses={
+        201: OpenApiResponse(response=ComplaintAttachmentSerializer, description="پیوست ایجاد شد"),
+        400: OpenApiResponse(description="داده نامعتبر"),
+        403: OpenApiResponse(description="دسترسی غیرمجاز"),
+        404: OpenApiResponse(description="پیام یافت نشد"),
+    }
+)
+class ComplaintAttachmentCreateAPIView(generics.CreateAPIView):
+    serializer_class = ComplaintAttachmentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_create(self, serializer):
+        message = get_object_or_404(ComplaintMessage.objects.only('id', 'sender_id'), pk=self.kwargs['message_id'])
+        if message.sender_id != self.request.user.pk:
+            raise PermissionDenied("فقط فرستنده پیام می‌تواند پیوست اضافه کند.")
+        serializer.instance = create_upload(ComplaintAttachment(
+            message=message, uploader=self.request.user, **serializer.validated_data
+        ))
+
+
+class AttachmentAccessMixin:
+    def get_attachment(self, pk):
+        attachment = get_object_or_404(ComplaintAttachment.objects.select_related('message__complaint'), pk=pk)
+        user = self.request.user
+        if not user.is_staff and attachment.message.complaint.student_id != user.pk:
+            raise PermissionDenied("دسترسی به این پیوست ندارید.")
+        return attachment
+
+
+@extend_schema(
+    summary="وضعیت پیوست / ارسال یک قطعه از فایل",
+    description="""
+    GET وضعیت بارگذاری را برمی‌گرداند؛ received تعداد بایت‌های دریافت‌شده است.
+    PUT یک قطعه از فایل را به صورت باینری با هدر Content-Range (مثلاً bytes 0-1048575/5000000)
+    ارسال می‌کند. قطعه‌ها باید به ترتیب ارسال شوند؛ در صورت قطع اتصال، ارسال از received ادامه می‌یابد.
+    """,
+    parameters=[
+        OpenApiParameter(name='pk', location=OpenApiParameter.PATH, type=OpenApiTypes.UUID, description='شناسه پیوست'),
+    ],
+    request={'application/octet-stream': OpenApiTypes.BINARY},
+    responses={
+        200: OpenApiResponse(response=ComplaintAttachmentSerializer, description="وضعیت پیوست"),
+        400: OpenApiResponse(description="قطعه نامعتبر"),
+        403: OpenApiResponse(description="دسترسی غیرمجاز"),
+        404: OpenApiResponse(description="پیوست یافت نشد"),
+        409: OpenApiResponse(description="قطعه با وضعیت بارگذاری همخوانی ندارد؛ received فعلی برگردانده می‌شود"),
+        413: OpenApiResponse(description="قطعه بیش از حد بزرگ است"),
+    }
+)
+class ComplaintAttachmentUploadAPIView(AttachmentAccessMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        return Response(ComplaintAttachmentSerializer(self.get_attachment(pk)).data)
+
+    def put(self, request, pk):
+        attachment = self.get_attachment(pk)
+        if attachment.uploader_id != request.user.pk:
+            raise PermissionDenied("فقط بارگذارکننده می‌تواند فایل را ارسال کند.")
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+            content_range = request.META.get('HTTP_CONTENT_RANGE')
+            if content_range:
+                start, range_length = parse_content_range(content_range, attachment.size)
+                if range_length != length:
+                    raise UploadError("Content-Range با Content-Length همخوانی ندارد.")
+            else:
+                start = attachment.received
+            if not length:
+                raise UploadError("قطعه خالی است.")
+            # request.stream is the raw body: read here block by block, never parsed or buffered.
+            attachment = receive_chunk(attachment, request.stream, start, length)
+        except UploadError as exc:
+            return Response({'detail': str(exc), **exc.extra}, status=exc.status)
+        return Response(ComplaintAttachmentSerializer(attachment).data)
+
+
+class AttachmentFileAPIView(AttachmentAccessMixin, APIView):
+    """Serves an attachment's file, honouring single byte ranges."""
+    permission_classes = [permissions.IsAuthenticated]
+    field = 'file'
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is the file itself: never answer 406 to an Accept header like image/*.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get_attachment(self, pk):
+        try:
+            return super().get_attachment(pk)
+        except Http404:
+            # Read-through for attachments of threads moved away by the archive_complaints command.
+            attachment = get_object_or_404(ArchivedAttachment.objects.select_related('complaint'), pk=pk)
+            user = self.request.user
+            if not user.is_staff and attachment.complaint.student_id != user.pk:
+                raise PermissionDenied("دسترسی به این پیوست ندارید.")
+            return attachment
+
+    @extend_schema(
+        summary="دریافت فایل پیوست",
+        description="از هدر Range برای دریافت بخشی از فایل پشتیبانی می‌کند.",
+        responses={
+            (200, 'application/octet-stream'): OpenApiTypes.BINARY,
+            (206, 'application/octet-stream'): OpenApiTypes.BINARY,
+            403: OpenApiResponse(description="دسترسی غیرمجاز"),
+            404: OpenApiResponse(description="فایل یافت نشد"),
+            416: OpenApiResponse(description="Range نامعتبر"),
+        }
+    )
+    def get(self, request, pk):
+        attachment = self.get_attachment(pk)
+        stored = getattr(attachment, self.field)
+        if not attachment.is_complete or not stored:
+            raise Http404
+        path = default_storage.path(stored.name)
+        size = os.path.getsize(path)
+        if self.field == 'file':
+            content_type, file_name = attachment.content_type, attachment.file_name
+        else:
+            content_type, file_name = 'image/jpeg', f"{os.path.splitext(attachment.file_name)[0]}-thumbnail.jpg"
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except UploadError as exc:
+            response = HttpResponse(status=exc.status)
+            response['Content-Range'] = f"bytes */{size}"
+            return response
+
+        start, end = byte_range or (0, size - 1)
+        response = StreamingHttpResponse(
+            iter_range(path, start, end - start + 1),
+            status=206 if byte_range else 200,
+            content_type=content_type,
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Accept-Ranges'] = 'bytes'
+        if byte_range:
+            response['Content-Range'] = f"bytes {start}-{end}/{size}"
+        response['Content-Disposition'] = content_disposition_header(False, file_name)
+        return response
+
+
+class AttachmentThumbnailAPIView(AttachmentFileAPIView):
+    field = 'thumbnail'
+
+    @extend_schema(
+        summary="دریافت تصویر کوچک پیوست",
+        responses={
+            (200, 'image/jpeg'): OpenApiTypes.BINARY,
+            404: OpenApiResponse(description="تصویر کوچک هنوز آماده نیست"),
+        }
+    )
+    def get(self, request, pk):
+        return super().get(request, pk)
+
+
+class ComplaintMessageStreamView(View):
+    """
+    Server-Sent Events stream of new complaint messages. With ``complaint_id`` it
+    follows one thread (owner or staff); without it, staff follow every thread.
+    Reconnecting clients send ``Last-Event-ID`` and first receive what they missed.
+    Only served through ``dormitroty.asgi``: under WSGI it would pin a worker.
+    """
+    keepalive = 15
+    replay_limit = 500
+
+    async def get(self, request, complaint_id=None):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({'detail': 'این سرویس فقط روی ASGI در دسترس است.'}, status=501)
+
+        user = await authenticate(request)
+        if user is None:
+            return JsonResponse({'detail': 'احراز هویت نشده'}, status=401)
+
+        messages = ComplaintMessage.objects.select_related('sender').prefetch_related('attachments')
+        if complaint_id is None:
+            if not user.is_staff:
+                return JsonResponse({'detail': 'دسترسی غیرمجاز'}, status=403)
+            channel = STAFF_CHANNEL
+        else:
+            complaint = await Complaint.objects.filter(id=complaint_id).only('student_id').afirst()
+            if complaint is None:
+                return JsonResponse({'detail': 'شکایت یافت نشد'}, status=404)
+            if complaint.student_id != user.pk and not user.is_staff:
+                return JsonResponse({'detail': 'دسترسی به پیام‌های این شکایت ندارید.'}, status=403)
+            channel = complaint_channel(complaint.id)
+            messages = messages.filter(complaint_id=complaint.id)
+
+        last_event_id = request.headers.get('Last-Event-ID', '')
+        # Subscribe before replaying so nothing created in between is lost.
+        subscription = get_broker().subscribe(channel)
+        response = StreamingHttpResponse(
+            self.events(subscription, messages, int(last_event_id) if last_event_id.isdigit() else None),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def events(self, subscription, messages, last_event_id):
+        sent_id = last_event_id or 0
+        try:
+            if last_event_id is not None:
+                missed = await sync_to_async(self.replay)(messages, last_event_id)
+                for event in missed:
+                    sent_id = event['id']
+                    yield self.format(event)
+
+            while True:
+                try:
+                    event = await subscription.get(timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    # Fell behind; the client reconnects with Last-Event-ID and replays from the database.
+                    return
+                if event['id'] <= sent_id:
+                    continue
+                sent_id = event['id']
+                yield self.format(event)
+        finally:
+            subscription.close()
+
+    def replay(self, messages, last_event_id):
+        missed = messages.filter(id__gt=last_event_id).order_by('id')[:self.replay_limit]
+        renderer = JSONRenderer()
+        return [
+            {'id': message.id, 'data': renderer.render(ComplaintMessageSerializer(message).data).decode('utf-8')}
+            for message in missed
+        ]
+
+    @staticmethod
+    def format(event):
+        return f"id: {event['id']}\nevent: message\ndata: {event['data']}\n\n"
+
@@ -0,0 +1,88 @@
+"""
+Async read-only JSON views.
+
+DRF's APIView dispatches synchronously, so the async endpoints are plain Django
+views: the user is resolved by DRF's authenticators in a thread, querysets are
+loaded with Django's async ORM, and the DRF serializers then run on objects
+already in memory. Served by ``dormitroty.asgi``, a request waiting on the
+database or on a slow client holds a coroutine rather than a worker thread.
+Under WSGI they still work, one request per thread.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .instrumentation import InstrumentedJSONRenderer
+
+
+async def authenticate(request):
+    """The user of a Django request by the DRF authenticators, or None if anonymous or rejected."""
+    drf_request = Request(
+        request,
+        authenticators=[authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    try:
+        user = await sync_to_async(lambda: drf_request.user)()
+    except APIException:
+        return None
+    return user if user.is_authenticated else None
+
+
+def json_response(data, status=200):
+    return HttpResponse(InstrumentedJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+class AsyncAPIView(View):
+    """
+    Authenticated async GET endpoint. Handlers return plain data; DRF exceptions
+    and Http404 become JSON errors as in the DRF views.
+    """
+    staff_only = False
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await authenticate(request)
+        if user is None:
+            return json_response({'detail': 'احراز هویت نشده'}, status=401)
+        if self.staff_only and not user.is_staff:
+            return json_response({'detail': 'دسترسی غیرمجاز'}, status=403)
+        request.user = user
+        try:
+            data = await super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return json_response({'detail': 'یافت نشد'}, status=404)
+        except APIException as e:
+            detail = e.detail if isinstance(e.detail, (dict, list)) else {'detail': e.detail}
+            return json_response(detail, status=e.status_code)
+        # e.g. the 405 of an unsupported method
+        return data if isinstance(data, HttpResponse) else json_response(data)
+
+
+async def paginate(request, queryset, page_size=10, max_page_size=100):
+    """The page-number envelope of StandardResultsSetPagination, loaded with the async ORM."""
+    try:
+        page = int(request.GET.get('page', 1))
+        page_size = min(int(request.GET.get('page_size', page_size)), max_page_size)
+    except ValueError:
+        raise Http404
+    if page < 1 or page_size < 1:
+        raise Http404
+
+    count = await queryset.acount()
+    offset = (page - 1) * page_size
+    if offset and offset >= count:
+        raise Http404
+    results = [obj async for obj in queryset[offset:offset + page_size]]
+
+    url = request.build_absolute_uri()
+    next_url = replace_query_param(url, 'page', page + 1) if offset + page_size < count else None
+    if page == 1:
+        previous_url = None
+    elif page == 2:
+        previous_url = remove_query_param(url, 'page')
+    else:
+        previous_url = replace_query_param(url, 'page', page - 1)
+    return {'count': count, 'next': next_url, 'previous': previous_url}, results
@@ -0,0 +1,253 @@
+"""
+Registration-day load benchmark.
+
+``seed_campus`` fills the database with dorms, rooms, beds and students, and
+``run`` lets every student go through a registration-day session against the
+real URL routes: log in at ``/api/users/token/``, browse ``/api/dorms/``, book
+a room, create a transaction and poll their complaints. Students are spread
+over a pool of threads, each with its own ``django.test.Client``, so requests
+pass through the whole middleware and view stack without a server. Python
+threads only overlap while waiting on the database or hashing passwords, which
+is where registration day spends its time anyway.
+
+``run_reads`` compares the read endpoints served the WSGI way, a fixed pool
+of threads each handling one request at a time, with their async twins driven
+by ``django.test.AsyncClient`` coroutines on one event loop, as under ASGI.
+Django's async ORM still runs each query in a shared database thread, so the
+async side does not query faster; what it saves is the thread a waiting
+request would otherwise hold. Both passes start from cold caches, so neither
+gains from users or responses the other one cached.
+
+The ``benchmark_registration`` and ``benchmark_reads`` commands run these on a
+freshly created test database of the configured backend, so they work offline
+against a local Postgres or SQLite.
+"""
+import asyncio
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from complaints.models import Complaint
+from dormitroty.campus import generate_campus
+from dorms.models import Room
+from users.authentication import user_cache
+from users.models import User
+
+PASSWORD = 'registration-day'
+
+
+def seed_campus(students, dorms=4, floors=5, rooms_per_floor=20, seed=0):
+    """
+    Create an empty campus with ``generate_campus`` and return ``(students, rooms)``:
+    (student_code, gender) pairs and, per gender, the (dorm id, room id) pairs open to it.
+    """
+    generate_campus(students=students, dorms=dorms, floors=floors, rooms_per_floor=rooms_per_floor,
+                    bookings=0, complaints=0, staff=0, password=PASSWORD, seed=seed)
+    rooms = {gender: [] for gender in User.EnumGender.values}
+    for dorm_id, room_id, gender in Room.objects.values_list('dorm_id', 'id', 'dorm__gender_restriction'):
+        rooms[gender].append((dorm_id, room_id))
+    return list(User.objects.filter(is_staff=False).order_by('student_code')
+                .values_list('student_code', 'gender')), rooms
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def request(self, client, step, method, path, data=None, expected=200, **extra):
+        started = time.perf_counter()
+        if method == 'get':
+            response = client.get(path, data, **extra)
+        else:
+            response = client.post(path, data, content_type='application/json', **extra)
+        return self.record(step, response, time.perf_counter() - started, expected)
+
+    async def arequest(self, client, step, path, data=None, expected=200, **extra):
+        """GET through an AsyncClient."""
+        started = time.perf_counter()
+        response = await client.get(path, data, **extra)
+        return self.record(step, response, time.perf_counter() - started, expected)
+
+    def record(self, step, response, elapsed, expected):
+        with self._lock:
+            self.samples.setdefault(step, []).append((elapsed, int(response.get('X-DB-Queries', 0))))
+            if response.status_code != expected:
+                self.errors[step] = self.errors.get(step, 0) + 1
+        return response if response.status_code == expected else None
+
+
+def _percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def report(recorder, elapsed):
+    """Per-step throughput, latency percentiles (ms) and mean query count."""
+    steps = {}
+    for step, samples in recorder.samples.items():
+        latencies = sorted(latency for latency, _ in samples)
+        steps[step] = {
+            'requests': len(samples),
+            'errors': recorder.errors.get(step, 0),
+            'throughput': len(samples) / elapsed,
+            'p50': _percentile(latencies, 0.50) * 1000,
+            'p95': _percentile(latencies, 0.95) * 1000,
+            'p99': _percentile(latencies, 0.99) * 1000,
+            'queries': sum(queries for _, queries in samples) / len(samples),
+        }
+    total = sum(step['requests'] for step in steps.values())
+    return {'elapsed': elapsed, 'requests': total, 'throughput': total / elapsed, 'steps': steps}
+
+
+def student_session(client, recorder, rng, index, student_code, gender, rooms, complaint_rate):
+    # Distinct addresses, as students log in from their own devices; the login throttle is per IP.
+    address = {'REMOTE_ADDR': f'10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}'}
+    response = recorder.request(client, 'login', 'post', '/api/users/token/',
+                                {'student_code': student_code, 'password': PASSWORD}, **address)
+    if response is None:
+        return
+    auth = {'HTTP_AUTHORIZATION': f"Bearer {response.json()['access']}", **address}
+
+    recorder.request(client, 'dorms', 'get', '/api/dorms/', {'gender_restriction': gender}, **auth)
+    dorm_id, room_id = rng.choice(rooms[gender])
+    response = recorder.request(client, 'book', 'post', '/api/bookings/',
+                                {'dorm_id': dorm_id, 'room_id': room_id}, expected=201, **auth)
+    if response is not None:
+        recorder.request(client, 'transaction', 'post', '/api/payments/create/',
+                         {'booking': response.json()['id']}, expected=201, **auth)
+
+    if rng.random() < complaint_rate:
+        response = recorder.request(client, 'complaint', 'post', '/api/complaints/',
+                                    {'title': "اینترنت اتاق قطع است", 'category': 'internet'},
+                                    expected=201, **auth)
+        if response is not None:
+            recorder.request(client, 'messages', 'get', f"/api/complaints/{response.json()['id']}/messages/send/",
+                             **auth)
+    recorder.request(client, 'complaints', 'get', '/api/complaints/', **auth)
+
+
+def run(students, rooms, threads=8, complaint_rate=0.2, seed=0):
+    """Run one session per student on ``threads`` threads and return the report."""
+    recorder = Recorder()
+
+    def worker(offset):
+        client = Client()
+        rng = random.Random(seed + offset)
+        try:
+            for index in range(offset, len(students), threads):
+                student_code, gender = students[index]
+                student_session(client, recorder, rng, index, student_code, gender, rooms, complaint_rate)
+        finally:
+            if threads > 1:
+                connections.close_all()
+
+    with override_settings(REQUEST_STATS_HEADERS=True):
+        started = time.perf_counter()
+        if threads == 1:
+            worker(0)
+        else:
+            with ThreadPoolExecutor(threads) as pool:
+                # list() re-raises any worker's exception
+                list(pool.map(worker, range(threads)))
+        elapsed = time.perf_counter() - started
+    return report(recorder, elapsed)
+
+
+# step: (WSGI path, async path)
+READ_STEPS = {
+    'dorms': ('/api/dorms/', '/api/dorms/async/'),
+    'rooms': ('/api/dorms/rooms/', '/api/dorms/rooms/async/'),
+    'bookings': ('/api/bookings/', '/api/bookings/async/'),
+    'messages': ('/api/complaints/{complaint}/messages/send/', '/api/complaints/{complaint}/messages/async/'),
+}
+
+
+def read_sessions(count):
+    """
+    ``count`` (Authorization header, complaint id) pairs of students who own a complaint,
+    repeating them if there are fewer; the campus needs at least one complaint.
+    """
+    owners = list(Complaint.objects.order_by('id').values_list('id', 'student_id')[:count])
+    users = User.objects.in_bulk({student_id for _, student_id in owners})
+    tokens = {pk: f'Bearer {AccessToken.for_user(user)}' for pk, user in users.items()}
+    return [(tokens[student_id], complaint_id)
+            for complaint_id, student_id in itertools.islice(itertools.cycle(owners), count)]
+
+
+def _read_session(client, recorder, authorization, complaint_id, rounds):
+    for _ in range(rounds):
+        for step, (path, _) in READ_STEPS.items():
+            recorder.request(client, step, 'get', path.format(complaint=complaint_id),
+                             HTTP_AUTHORIZATION=authorization)
+
+
+async def _aread_session(client, recorder, authorization, complaint_id, rounds):
+    # AsyncClient sends extra keyword arguments as literal header names; headers= maps them like a server.
+    for _ in range(rounds):
+        for step, (_, path) in READ_STEPS.items():
+            await recorder.arequest(client, step, path.format(complaint=complaint_id),
+                                    headers={'Authorization': authorization})
+
+
+def run_wsgi_reads(sessions, threads=8, rounds=5):
+    """Every session on a pool of ``threads`` sync clients, like WSGI workers."""
+    recorder = Recorder()
+
+    def worker(offset):
+        client = Client()
+        try:
+            for authorization, complaint_id in sessions[offset::threads]:
+                _read_session(client, recorder, authorization, complaint_id, rounds)
+        finally:
+            if threads > 1:
+                connections.close_all()
+
+    started = time.perf_counter()
+    if threads == 1:
+        worker(0)
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(worker, range(threads)))
+    return report(recorder, time.perf_counter() - started)
+
+
+def run_asgi_reads(sessions, rounds=5):
+    """Every session at once, as coroutines on one event loop."""
+    recorder = Recorder()
+
+    async def main():
+        await asyncio.gather(*(
+            _aread_session(AsyncClient(), recorder, authorization, complaint_id, rounds)
+            for authorization, complaint_id in sessions
+        ))
+
+    started = time.perf_counter()
+    # From this thread, async_to_sync runs the ORM's database calls back on it,
+    # on the connection (and in tests, the transaction) the caller already has.
+    async_to_sync(main)()
+    return report(recorder, time.perf_counter() - started)
+
+
+def _cold_caches():
+    cache.clear()
+    user_cache.clear()
+
+
+def run_reads(clients, threads=8, rounds=5):
+    """Reports of ``clients`` concurrent readers, each making ``rounds`` passes over READ_STEPS, per server kind."""
+    sessions = read_sessions(clients)
+    with override_settings(REQUEST_STATS_HEADERS=True):
+        _cold_caches()
+        wsgi = run_wsgi_reads(sessions, threads=threads, rounds=rounds)
+        _cold_caches()
+        asgi = run_asgi_reads(sessions, rounds=rounds)
+    return {'wsgi': wsgi, 'asgi': asgi}
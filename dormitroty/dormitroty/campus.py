@@ -0,0 +1,217 @@
+"""
+Synthetic campus data for performance work.
+
+``generate_campus`` fills the database with dorms, rooms, beds, students,
+bookings, transactions and complaint threads in proportions resembling a real
+semester. Everything is planned in memory from one ``random.Random(seed)`` and
+written with ``bulk_create`` in batches, so the same seed on the same starting
+database gives the same data, and signals are not involved: the denormalised
+complaint counters, occupied beds, full rooms and search entries are filled in
+directly.
+"""
+import random
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.postgres.search import SearchVector
+from django.db import connections, router
+from django.utils import timezone
+
+from bookings.models import Booking
+from complaints.models import Complaint, ComplaintMessage, ComplaintSearchEntry
+from complaints.search import SEARCH_CONFIG
+from dormitroty.persian import normalize
+from dorms.models import Bed, Dorm, Room
+from payments.models import Transaction
+from users.models import User
+
+FIRST_NAMES = {
+    User.EnumGender.MALE: ['علی', 'محمد', 'حسین', 'رضا', 'امیر', 'مهدی', 'سینا', 'پوریا', 'آرش', 'کیان'],
+    User.EnumGender.FEMALE: ['زهرا', 'فاطمه', 'مریم', 'سارا', 'نگار', 'هستی', 'ستاره', 'الهام', 'نازنین', 'کوثر'],
+}
+LAST_NAMES = ['محمدی', 'حسینی', 'احمدی', 'رضایی', 'کریمی', 'موسوی', 'جعفری', 'قاسمی', 'صادقی', 'نوری',
+              'طاهری', 'کاظمی', 'یوسفی', 'رحیمی', 'شریفی']
+DORM_NAMES = ['شهید بهشتی', 'فجر', 'کوثر', 'آزادی', 'نرگس', 'بهار', 'امام رضا', 'ولیعصر', 'یاس', 'سپیده']
+
+# (value, weight) tables
+ROOM_CAPACITIES = [(1, 5), (2, 35), (3, 20), (4, 30), (6, 10)]
+BOOKING_STATUSES = [(Booking.BookingStatus.APPROVED, 55), (Booking.BookingStatus.PENDING, 25),
+                    (Booking.BookingStatus.REJECTED, 12), (Booking.BookingStatus.CANCELED, 8)]
+GATEWAYS = [(Transaction.Gateway.ZARINPAL, 60), (Transaction.Gateway.IDPAY, 25), (Transaction.Gateway.PAYIR, 15)]
+CATEGORIES = [(Complaint.Category.FACILITIES, 35), (Complaint.Category.INTERNET, 25),
+              (Complaint.Category.CLEANING, 20), (Complaint.Category.SECURITY, 5), (Complaint.Category.OTHER, 15)]
+PRIORITIES = [(Complaint.Priority.URGENT, 5), (Complaint.Priority.HIGH, 15),
+              (Complaint.Priority.NORMAL, 60), (Complaint.Priority.LOW, 20)]
+# messages per complaint thread: most are short
+THREAD_LENGTHS = [(1, 30), (2, 25), (3, 20), (4, 10), (6, 8), (10, 5), (20, 2)]
+COMPLAINT_TITLES = {
+    Complaint.Category.FACILITIES: ["شیر آب اتاق چکه می‌کند", "بخاری اتاق خاموش است", "در کمد شکسته است"],
+    Complaint.Category.INTERNET: ["اینترنت اتاق قطع است", "سرعت وای‌فای پایین است"],
+    Complaint.Category.CLEANING: ["سرویس بهداشتی طبقه تمیز نشده", "سطل زباله راهرو پر است"],
+    Complaint.Category.SECURITY: ["قفل در ورودی خراب است", "دوربین راهرو کار نمی‌کند"],
+    Complaint.Category.OTHER: ["درخواست تغییر اتاق", "سر و صدای اتاق کناری"],
+}
+STUDENT_MESSAGES = ["لطفاً هر چه زودتر رسیدگی کنید.", "هنوز مشکل برطرف نشده است.", "ممنون، پیگیری می‌کنم."]
+STAFF_MESSAGES = ["درخواست شما ثبت شد.", "کارشناس فنی فردا مراجعه می‌کند.", "مشکل برطرف شد، لطفاً بررسی کنید."]
+
+
+def _weighted(rng, table):
+    values, weights = zip(*table)
+    return rng.choices(values, weights)[0]
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def generate_campus(students=1000, dorms=4, floors=5, rooms_per_floor=20, bookings=None, complaints=None,
+                    staff=5, password='password', seed=0, batch_size=5000):
+    """
+    Create the data and return the number of rows made per model name.
+    ``bookings`` defaults to 60% of the students and ``complaints`` to 10%.
+    Students share one password hash, so no time goes into hashing.
+    """
+    rng = random.Random(seed)
+    counts = Counter()
+    genders = [User.EnumGender.MALE, User.EnumGender.FEMALE]
+    bookings = int(students * 0.6) if bookings is None else min(bookings, students)
+    complaints = students // 10 if complaints is None else complaints
+
+    dorm_objects = Dorm.objects.bulk_create([
+        Dorm(name=f"خوابگاه {DORM_NAMES[i % len(DORM_NAMES)]} {i // len(DORM_NAMES) + 1}",
+             location=f"بلوک {i + 1}", gender_restriction=genders[i % 2])
+        for i in range(dorms)
+    ])
+    room_objects = []
+    for dorm in dorm_objects:
+        for floor in range(1, floors + 1):
+            for number in range(1, rooms_per_floor + 1):
+                capacity = _weighted(rng, ROOM_CAPACITIES)
+                # fewer beds cost more per bed
+                price = (3_000_000 // capacity + rng.randrange(-200_000, 200_001)) // 50_000 * 50_000
+                room_objects.append(Room(dorm=dorm, floor=floor, room_number=f'{floor}{number:02d}',
+                                         capacity=capacity, price=price))
+    Room.objects.bulk_create(room_objects, batch_size=batch_size)
+    beds = {gender: [] for gender in genders}
+    bed_objects = []
+    for room in room_objects:
+        for number in range(1, room.capacity + 1):
+            bed = Bed(room=room, bed_number=str(number))
+            bed_objects.append(bed)
+            beds[room.dorm.gender_restriction].append(bed)
+    counts.update(dorm=len(dorm_objects), room=len(room_objects), bed=len(bed_objects))
+
+    offset = User.objects.count()
+    hashed = make_password(password)
+    user_objects = []
+    for i in range(offset, offset + staff + students):
+        gender = rng.choice(genders)
+        first_name, last_name = rng.choice(FIRST_NAMES[gender]), rng.choice(LAST_NAMES)
+        user_objects.append(User(
+            student_code=str(4_000_000_000 + i), national_code=f'{i:010d}', phone_number=f'09{i:09d}',
+            email=f'student{i}@example.com', first_name=first_name, last_name=last_name,
+            search_name=normalize(f'{first_name} {last_name}'), gender=gender, password=hashed,
+            is_staff=i < offset + staff,
+        ))
+    User.objects.bulk_create(user_objects, batch_size=batch_size)
+    staff_objects, student_objects = user_objects[:staff], user_objects[staff:]
+    counts.update(user=len(user_objects))
+
+    # Approved bookings take a random free bed of the student's gender; without one left they stay pending.
+    for pool in beds.values():
+        rng.shuffle(pool)
+    rooms = {gender: [room for room in room_objects if room.dorm.gender_restriction == gender] for gender in genders}
+    booking_objects = []
+    for student in rng.sample(student_objects, bookings):
+        if not rooms[student.gender]:
+            continue
+        status = _weighted(rng, BOOKING_STATUSES)
+        if status == Booking.BookingStatus.APPROVED and beds[student.gender]:
+            bed = beds[student.gender].pop()
+            bed.is_occupied = True
+            booking_objects.append(Booking(student=student, room=bed.room, bed=bed, status=status))
+        else:
+            if status == Booking.BookingStatus.APPROVED:
+                status = Booking.BookingStatus.PENDING
+            booking_objects.append(Booking(student=student, room=rng.choice(rooms[student.gender]), status=status))
+    occupied = Counter(booking.room for booking in booking_objects if booking.bed is not None)
+    for room, taken in occupied.items():
+        room.full = taken == room.capacity
+    for batch in _batches([room.pk for room in occupied if room.full], batch_size):
+        Room.objects.filter(pk__in=batch).update(full=True)
+    Bed.objects.bulk_create(bed_objects, batch_size=batch_size)
+    Booking.objects.bulk_create(booking_objects, batch_size=batch_size)
+    counts.update(booking=len(booking_objects))
+
+    transaction_objects = []
+    for booking in booking_objects:
+        amount = booking.room.price
+        if booking.status == Booking.BookingStatus.APPROVED:
+            if rng.random() < 0.15:
+                transaction_objects.append(Transaction(student=booking.student, booking=booking, amount=amount,
+                                                       status=Transaction.Status.FAILED,
+                                                       gateway=_weighted(rng, GATEWAYS)))
+            transaction_objects.append(Transaction(student=booking.student, booking=booking, amount=amount,
+                                                   status=Transaction.Status.PAID, gateway=_weighted(rng, GATEWAYS),
+                                                   ref_id=str(rng.randrange(10 ** 11, 10 ** 12))))
+        elif booking.status == Booking.BookingStatus.PENDING and rng.random() < 0.5:
+            transaction_objects.append(Transaction(student=booking.student, booking=booking, amount=amount))
+        elif rng.random() < 0.3:
+            transaction_objects.append(Transaction(student=booking.student, booking=booking, amount=amount,
+                                                   status=Transaction.Status.FAILED,
+                                                   gateway=_weighted(rng, GATEWAYS)))
+    Transaction.objects.bulk_create(transaction_objects, batch_size=batch_size)
+    counts.update(transaction=len(transaction_objects))
+
+    if complaints and student_objects:
+        counts.update(_generate_complaints(rng, complaints, student_objects, staff_objects, batch_size))
+    return counts
+
+
+def _generate_complaints(rng, count, students, staff, batch_size):
+    now = timezone.now()
+    complaint_objects = []
+    threads = []
+    for _ in range(count):
+        student = rng.choice(students)
+        category = _weighted(rng, CATEGORIES)
+        priority = _weighted(rng, PRIORITIES)
+        complaint = Complaint(student=student, title=rng.choice(COMPLAINT_TITLES[category]), category=category,
+                              priority=priority, sla_deadline=Complaint.deadline_for(priority),
+                              last_message_at=now)
+        # Threads alternate between the student and staff; without staff the student writes alone.
+        length = _weighted(rng, THREAD_LENGTHS)
+        senders = [student if i % 2 == 0 or not staff else rng.choice(staff) for i in range(length)]
+        complaint.message_count = length
+        # unread counts run from the other side's last message to the end of the thread
+        complaint.unread_by_staff = len(senders) - max(
+            (i + 1 for i, sender in enumerate(senders) if sender is not student), default=0)
+        complaint.unread_by_student = len(senders) - max(
+            (i + 1 for i, sender in enumerate(senders) if sender is student), default=0)
+        complaint.is_read = complaint.unread_by_staff == 0
+        if senders[-1] is not student and rng.random() < 0.6:
+            complaint.resolved_at = now
+        complaint_objects.append(complaint)
+        threads.append(senders)
+    Complaint.objects.bulk_create(complaint_objects, batch_size=batch_size)
+
+    message_objects = [
+        ComplaintMessage(complaint=complaint, sender=sender,
+                         message=rng.choice(STUDENT_MESSAGES if sender is complaint.student else STAFF_MESSAGES))
+        for complaint, senders in zip(complaint_objects, threads)
+        for sender in senders
+    ]
+    ComplaintMessage.objects.bulk_create(message_objects, batch_size=batch_size)
+
+    entries = [ComplaintSearchEntry(complaint=complaint, document=normalize(complaint.title))
+               for complaint in complaint_objects]
+    entries += [ComplaintSearchEntry(complaint=message.complaint, message=message, document=normalize(message.message))
+                for message in message_objects]
+    ComplaintSearchEntry.objects.bulk_create(entries, batch_size=batch_size)
+    # SQLite's FTS table follows through triggers; PostgreSQL needs the tsvector filled in.
+    if connections[router.db_for_write(ComplaintSearchEntry)].vendor == 'postgresql':
+        ComplaintSearchEntry.objects.filter(id__gte=entries[0].pk, vector__isnull=True).update(
+            vector=SearchVector('document', config=SEARCH_CONFIG)
+        )
+    return {'complaint': len(complaint_objects), 'complaint message': len(message_objects)}
@@ -0,0 +1,250 @@
+"""
+Per-request SQL and rendering instrumentation.
+
+``RequestStatsMiddleware`` counts the queries each request runs on every
+database alias, the time spent in them and the time spent serializing: rendering
+the response body, and building ``serializer.data`` for serializers that opt in
+with ``TimedSerializerMixin`` (lazy related lookups run there, so it includes
+their query time). The numbers are folded into per-route
+histograms kept in process (``route_stats``). With ``REQUEST_STATS_HEADERS`` on, the numbers are also
+returned as ``X-DB-Queries``, ``X-DB-Time``, ``X-Serialization-Time`` and
+``X-Request-Time`` headers (milliseconds).
+
+A view may declare ``query_budget``, and lift it for one request with
+``request.query_budget = None`` (long-polls); a request that runs more queries
+is logged and sends ``query_budget_exceeded``, which ``dormitroty.testing`` turns
+into a test failure. ``cache_stats`` counts hits and misses of the caches that
+report to it.
+"""
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import Signal, receiver
+from rest_framework.renderers import JSONRenderer
+from rest_framework.serializers import ListSerializer
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+# sent with sender=view class, request, queries and budget
+query_budget_exceeded = Signal()
+
+_current = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'serialization_time', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialization_time = 0.0
+        # set while the outermost serializer.data runs, so nested ones are not counted twice
+        self.serializing = False
+
+
+class Histogram:
+    """Counts observations into fixed upper-bound buckets, plus one for the rest."""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        """(upper bound, observations at or below it) pairs, ending with infinity."""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class RouteStats:
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method, route, elapsed, stats):
+        with self._lock:
+            histograms = self._routes.get((method, route))
+            if histograms is None:
+                histograms = self._routes[(method, route)] = {
+                    'latency': Histogram(LATENCY_BUCKETS),
+                    'db_time': Histogram(LATENCY_BUCKETS),
+                    'serialization_time': Histogram(LATENCY_BUCKETS),
+                    'queries': Histogram(QUERY_BUCKETS),
+                }
+            histograms['latency'].observe(elapsed)
+            histograms['db_time'].observe(stats.db_time)
+            histograms['serialization_time'].observe(stats.serialization_time)
+            histograms['queries'].observe(stats.queries)
+
+    def snapshot(self):
+        """{(method, route): {name: (cumulative buckets, count, sum)}}"""
+        with self._lock:
+            return {
+                key: {name: (h.cumulative(), h.count, h.sum) for name, h in histograms.items()}
+                for key, histograms in self._routes.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_stats = RouteStats()
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    # Installed on every connection rather than per request: async views query
+    # from sync_to_async threads, whose connections the request never sees.
+    # The context variable follows the request into those threads.
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class CacheStats:
+    """Hit and miss counts of the in-process and Django caches, reported by their users."""
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def hit(self, name):
+        self._add(name, 'hit')
+
+    def miss(self, name):
+        self._add(name, 'miss')
+
+    def _add(self, name, result):
+        with self._lock:
+            self._counts[(name, result)] = self._counts.get((name, result), 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+cache_stats = CacheStats()
+
+
+class RequestStatsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported.
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(None, connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    def finish(self, request, response, stats, elapsed):
+        match = request.resolver_match
+        route_stats.observe(request.method, match.route if match else None, elapsed, stats)
+        self.check_budget(request, stats)
+
+        if settings.REQUEST_STATS_HEADERS:
+            response['X-DB-Queries'] = str(stats.queries)
+            response['X-DB-Time'] = f'{stats.db_time * 1000:.1f}'
+            response['X-Serialization-Time'] = f'{stats.serialization_time * 1000:.1f}'
+            response['X-Request-Time'] = f'{elapsed * 1000:.1f}'
+        return response
+
+    def check_budget(self, request, stats):
+        # No process_view hook: under ASGI a sync one would cost every request a thread switch.
+        view_class = getattr(request.resolver_match.func, 'view_class', None) if request.resolver_match else None
+        budget = getattr(request, 'query_budget', getattr(view_class, 'query_budget', None))
+        if budget is None or stats.queries <= budget:
+            return
+        logger.warning("%s %s ran %d queries, over its budget of %d",
+                       request.method, request.path, stats.queries, budget)
+        query_budget_exceeded.send(sender=view_class, request=request, queries=stats.queries, budget=budget)
+
+
+class TimedSerializerMixin:
+    """
+    Adds building ``data`` to the current request's serialization time. For
+    ``many=True`` set ``list_serializer_class = TimedListSerializer`` in Meta.
+    """
+    @property
+    def data(self):
+        stats = _current.get()
+        if stats is None or stats.serializing:
+            return super().data
+        stats.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            stats.serializing = False
+            stats.serialization_time += time.perf_counter() - started
+
+
+class TimedListSerializer(TimedSerializerMixin, ListSerializer):
+    pass
+
+
+class InstrumentedJSONRenderer(JSONRenderer):
+    """JSONRenderer that adds its time to the current request's serialization time."""
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        stats = _current.get()
+        if stats is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            stats.serialization_time += time.perf_counter() - started
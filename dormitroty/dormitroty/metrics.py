@@ -0,0 +1,132 @@
+"""
+Prometheus metrics at ``/metrics``.
+
+Request counts, latency, DB time and query count histograms come from
+``instrumentation.route_stats``, cache hit and miss counts from
+``instrumentation.cache_stats``. Business gauges (free beds per dorm, pending
+bookings and transactions, unread complaints) are aggregated at most once per
+``METRICS_GAUGE_TTL`` seconds and shared through the Django cache, so any
+number of scrapers costs a few counts per TTL rather than per scrape.
+Everything except the gauges is per process.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from drf_spectacular.utils import extend_schema, OpenApiResponse
+from rest_framework import permissions
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from bookings.models import Booking
+from complaints.models import Complaint
+from dorms.models import Bed
+from payments.models import Transaction
+
+from .instrumentation import cache_stats, route_stats
+
+GAUGES_CACHE_KEY = 'metrics:business-gauges'
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{_label(value)}"' for key, value in labels.items()) + '}'
+
+
+def _histogram(lines, name, labels, histogram):
+    buckets, count, total = histogram
+    for bound, cumulative in buckets:
+        le = '+Inf' if bound == float('inf') else repr(float(bound))
+        lines.append(f'{name}_bucket{_labels(**labels, le=le)} {cumulative}')
+    lines.append(f'{name}_count{_labels(**labels)} {count}')
+    lines.append(f'{name}_sum{_labels(**labels)} {total}')
+
+
+def business_gauges():
+    gauges = cache.get(GAUGES_CACHE_KEY)
+    if gauges is None:
+        unread = Complaint.objects.filter(unread_by_staff__gt=0).aggregate(
+            complaints=Count('id'), messages=Sum('unread_by_staff')
+        )
+        gauges = {
+            'free_beds': list(
+                Bed.objects.filter(is_occupied=False).order_by()
+                .values_list('room__dorm_id', 'room__dorm__name').annotate(free=Count('id'))
+            ),
+            'pending_bookings': Booking.objects.filter(status=Booking.BookingStatus.PENDING).count(),
+            # served by the unique_pending_transaction_per_booking partial index
+            'pending_transactions': Transaction.objects.filter(status=Transaction.Status.PENDING).count(),
+            'unread_complaints': unread['complaints'],
+            'unread_messages': unread['messages'] or 0,
+        }
+        cache.set(GAUGES_CACHE_KEY, gauges, settings.METRICS_GAUGE_TTL)
+    return gauges
+
+
+def render_metrics():
+    lines = [
+        '# HELP http_requests_total Requests handled, by method and route.',
+        '# TYPE http_requests_total counter',
+    ]
+    routes = sorted(route_stats.snapshot().items(), key=lambda item: (item[0][1] or '', item[0][0]))
+    for (method, route), histograms in routes:
+        lines.append(f"http_requests_total{_labels(method=method, route=route or '')} {histograms['latency'][1]}")
+    for name, key, help_text in (
+        ('http_request_duration_seconds', 'latency', 'Request latency.'),
+        ('http_request_db_seconds', 'db_time', 'Time spent in SQL queries per request.'),
+        ('http_request_serialization_seconds', 'serialization_time', 'Time spent rendering response bodies.'),
+        ('http_request_db_queries', 'queries', 'SQL queries per request.'),
+    ):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+        for (method, route), histograms in routes:
+            _histogram(lines, name, {'method': method, 'route': route or ''}, histograms[key])
+
+    lines += ['# HELP cache_requests_total Cache lookups, by cache and result.', '# TYPE cache_requests_total counter']
+    for (name, result), count in sorted(cache_stats.snapshot().items()):
+        lines.append(f'cache_requests_total{_labels(cache=name, result=result)} {count}')
+
+    gauges = business_gauges()
+    lines += ['# HELP dorm_free_beds Unoccupied beds.', '# TYPE dorm_free_beds gauge']
+    for dorm_id, name, free in gauges['free_beds']:
+        lines.append(f'dorm_free_beds{_labels(dorm_id=dorm_id, dorm=name)} {free}')
+    for name, key, help_text in (
+        ('bookings_pending', 'pending_bookings', 'Bookings waiting for a decision.'),
+        ('transactions_pending', 'pending_transactions', 'Transactions waiting for payment.'),
+        ('complaints_unread', 'unread_complaints', 'Complaints with messages staff has not read.'),
+        ('complaint_messages_unread', 'unread_messages', 'Complaint messages staff has not read.'),
+    ):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {gauges[key]}']
+    return '\n'.join(lines) + '\n'
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data.encode(self.charset) if isinstance(data, str) else str(data).encode(self.charset)
+
+
+class IsAdminOrLocal(permissions.BasePermission):
+    """Admins, or scrapers connecting from METRICS_ALLOWED_IPS without credentials."""
+    def has_permission(self, request, view):
+        if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+            return True
+        return bool(request.user and request.user.is_staff)
+
+
+@extend_schema(
+    summary="Prometheus metrics",
+    responses={200: OpenApiResponse(description="Metrics in the Prometheus text format")},
+)
+class MetricsView(APIView):
+    permission_classes = [IsAdminOrLocal]
+    renderer_classes = [PrometheusRenderer]
+    read_replica = True
+
+    def get(self, request):
+        return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
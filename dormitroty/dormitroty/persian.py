@@ -0,0 +1,24 @@
+"""Persian text normalisation shared by the search features."""
+
+_DIGITS = '۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩'
+_TRANSLATION = str.maketrans({
+    **{digit: str(i % 10) for i, digit in enumerate(_DIGITS)},
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و',
+    '‌': ' ',  # ZWNJ: "می‌خواهم" is indexed as "می خواهم"
+    '‍': None,
+    'ـ': None,  # tatweel
+    **{chr(code): None for code in range(0x064B, 0x0660)},  # harakat
+    'ٰ': None,
+})
+
+
+def normalize(text):
+    """
+    Map Arabic letter variants and Persian/Arabic digits to one form, split on
+    ZWNJ and drop diacritics, so differently typed spellings of a word match.
+    """
+    return ' '.join(text.translate(_TRANSLATION).lower().split())
@@ -0,0 +1,163 @@
+"""
+Opt-in cProfile sampling of production requests.
+
+With ``PROFILING_ENABLED`` on, ``ProfilingMiddleware`` profiles a random
+``PROFILE_SAMPLE_RATE`` fraction of requests, plus every request carrying an
+``X-Profile`` header signed by ``profile_token()``. Profiles are kept in a
+per-process ring buffer of ``PROFILE_BUFFER_SIZE`` entries and served to admins
+by ``ProfileListAPIView`` and ``ProfileDownloadAPIView``. With it off the
+middleware removes itself at startup, so it costs nothing; on, an unsampled
+request costs a header lookup and a random number.
+
+cProfile can only run one profiler at a time, so a request that arrives while
+another is being profiled is not profiled.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema, OpenApiResponse
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+SIGNING_SALT = 'dormitroty.profiling'
+
+
+def profile_token():
+    """A value for the X-Profile header, valid for PROFILE_TOKEN_MAX_AGE seconds."""
+    return signing.TimestampSigner(salt=SIGNING_SALT).sign(uuid.uuid4().hex)
+
+
+def _valid_token(token):
+    try:
+        signing.TimestampSigner(salt=SIGNING_SALT).unsign(token, max_age=settings.PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+class ProfileStore:
+    def __init__(self):
+        self._profiles = deque(maxlen=settings.PROFILE_BUFFER_SIZE)
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self):
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id):
+        with self._lock:
+            return next((p for p in self._profiles if p['id'] == profile_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+profile_store = ProfileStore()
+_profiler_lock = threading.Lock()
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = request.META.get('HTTP_X_PROFILE')
+        if not (token and _valid_token(token)) and not random.random() < settings.PROFILE_SAMPLE_RATE:
+            return self.get_response(request)
+        if not _profiler_lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            elapsed = time.perf_counter() - started
+        finally:
+            _profiler_lock.release()
+
+        profiler.create_stats()
+        profile_store.add({
+            'id': uuid.uuid4().hex,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration': elapsed,
+            'created_at': timezone.now(),
+            'stats': marshal.dumps(profiler.stats),
+        })
+        return response
+
+
+class ProfileListAPIView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        operation_id='profiles_list',
+        summary="List sampled request profiles",
+        description="Newest first, from this process only. `token` is a fresh value for the X-Profile header.",
+        responses={200: OpenApiResponse(description="Profiles and a profiling token")},
+    )
+    def get(self, request):
+        profiles = [
+            {key: value for key, value in profile.items() if key != 'stats'}
+            for profile in profile_store.list()
+        ]
+        return Response({'token': profile_token(), 'profiles': profiles})
+
+
+class ProfileDownloadAPIView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        operation_id='profiles_download',
+        summary="Download a request profile",
+        description="A pstats file loadable with `pstats.Stats` or snakeviz; `?output=text` gives the top functions.",
+        responses={200: OpenApiResponse(description="The profile"), 404: OpenApiResponse(description="Not found")},
+    )
+    def get(self, request, profile_id):
+        profile = profile_store.get(profile_id)
+        if profile is None:
+            raise Http404
+
+        if request.query_params.get('output') == 'text':
+            out = io.StringIO()
+            stats = pstats.Stats(_StatsSource(marshal.loads(profile['stats'])), stream=out)
+            stats.sort_stats('cumulative').print_stats(40)
+            return HttpResponse(out.getvalue(), content_type='text/plain; charset=utf-8')
+
+        response = HttpResponse(profile['stats'], content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="{profile_id}.prof"'
+        return response
+
+
+class _StatsSource:
+    # pstats.Stats accepts any object with create_stats() and a stats dict.
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
@@ -0,0 +1,136 @@
+"""
+Read replica routing.
+
+Reads of a GET, HEAD or OPTIONS request to a view declaring
+``read_replica = True`` go to one of the ``DATABASE_REPLICAS`` aliases, picked
+per request; everything else, and all writes, go to ``default``. Outside a
+request the router stays out of the way.
+
+Replicas lag behind the primary, so clients read their own writes: once a
+request writes, its later reads go to the primary, and
+``ReplicaRoutingMiddleware`` then pins the client to the primary for
+``REPLICA_PIN_SECONDS``. Clients are told apart by their Authorization header,
+else their session cookie, else their address, and pins are kept in the default
+cache, which must be shared by every process: with a per-process cache the next
+request of a client could land on another worker and miss its pin, so the
+middleware refuses to start. Without replicas it removes itself at startup.
+"""
+import contextvars
+import hashlib
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_current = contextvars.ContextVar('replica_routing', default=None)
+
+
+class Routing:
+    __slots__ = ('request', 'replica', 'wrote')
+
+    def __init__(self, request):
+        self.request = request
+        # None until decided; '' for the primary
+        self.replica = None
+        self.wrote = False
+
+
+def pin_key(request):
+    client = (request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+              or request.META.get('REMOTE_ADDR', ''))
+    return 'replica-pin:' + hashlib.sha256(client.encode()).hexdigest()
+
+
+def _replica(routing):
+    if routing.replica is not None:
+        return routing.replica
+    request = routing.request
+    match = request.resolver_match
+    if match is None:
+        # Middleware reading before the URL is resolved; decide on the view's first read.
+        return ''
+    view_class = getattr(match.func, 'view_class', None)
+    routing.replica = ''
+    if request.method in SAFE_METHODS and getattr(view_class, 'read_replica', False) \
+            and not cache.get(pin_key(request)):
+        routing.replica = random.choice(settings.DATABASE_REPLICAS)
+    return routing.replica
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _current.get()
+        if routing is None:
+            return None
+        if routing.wrote:
+            return PRIMARY
+        return _replica(routing) or PRIMARY
+
+    def db_for_write(self, model, **hints):
+        routing = _current.get()
+        if routing is None:
+            # Objects read from a replica are still saved to the primary.
+            instance = hints.get('instance')
+            return PRIMARY if instance is not None and instance._state.db in settings.DATABASE_REPLICAS else None
+        routing.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db in settings.DATABASE_REPLICAS else None
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        if isinstance(caches['default'], (LocMemCache, DummyCache)):
+            raise ImproperlyConfigured(
+                "DATABASE_REPLICAS needs a CACHE_BACKEND shared by every process for its read-your-writes pins."
+            )
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        routing = Routing(request)
+        token = _current.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, routing)
+        return response
+
+    async def __acall__(self, request):
+        # Async views query from sync_to_async threads, which see this context and so the same Routing.
+        routing = Routing(request)
+        token = _current.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, routing)
+        return response
+
+    def finish(self, request, routing):
+        if routing.wrote:
+            cache.set(pin_key(request), True, settings.REPLICA_PIN_SECONDS)
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from datetime import timedelta
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -53,22 +54,59 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': (
+        'dormitroty.instrumentation.InstrumentedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.UserTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.UserTokenRefreshSerializer',
+}
+
+# seconds a refresh token found not blacklisted is trusted without asking the database;
+# logouts reach processes that do not share the cache after at most this long
+TOKEN_BLACKLIST_CACHE_TTL = int(os.environ.get("TOKEN_BLACKLIST_CACHE_TTL", 60))
+
+# shared by all processes when pointed at memcached or redis, per process by default
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get("CACHE_BACKEND", 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get("CACHE_LOCATION", ''),
+    }
+}
+
+# token buckets for /api/users/token/, checked before the password is hashed: "5/min" allows
+# a burst of 5 and one attempt every 12 seconds after it
+TOKEN_THROTTLE_RATES = {
+    'login_ip': os.environ.get("LOGIN_IP_RATE", '30/min'),
+    'login_student_code': os.environ.get("LOGIN_STUDENT_CODE_RATE", '5/min'),
 }
+# consecutive failed logins after which a student code is rejected without hashing
+LOGIN_LOCKOUT_FAILURES = int(os.environ.get("LOGIN_LOCKOUT_FAILURES", 10))
+LOGIN_LOCKOUT_SECONDS = int(os.environ.get("LOGIN_LOCKOUT_SECONDS", 15 * 60))
+
+# users authenticated by JWT are cached per process; a save evicts the user everywhere through a version
+# kept in the shared cache, or after at most AUTH_USER_CACHE_TTL seconds with a per-process one (0 disables it)
+AUTH_USER_CACHE_SIZE = int(os.environ.get("AUTH_USER_CACHE_SIZE", 10000))
+AUTH_USER_CACHE_TTL = float(os.environ.get("AUTH_USER_CACHE_TTL", 60))
 
 MIDDLEWARE = [
+    'dormitroty.instrumentation.RequestStatsMiddleware',
+    'dormitroty.profiling.ProfilingMiddleware',
+    'dormitroty.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,6 +116,21 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# query count, DB time and render time of each request as X-DB-Queries & co. response headers
+REQUEST_STATS_HEADERS = os.environ.get('DEBUG', 'False') == 'True'
+
+# cProfile a fraction of requests, and those with an X-Profile header from /api/profiles/;
+# the last PROFILE_BUFFER_SIZE profiles of each process are listed there
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "False") == "True"
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_BUFFER_SIZE = int(os.environ.get("PROFILE_BUFFER_SIZE", 50))
+PROFILE_TOKEN_MAX_AGE = int(os.environ.get("PROFILE_TOKEN_MAX_AGE", 15 * 60))
+
+# /metrics is open to admins and to unauthenticated scrapers from these addresses;
+# the business gauges on it are recomputed at most every METRICS_GAUGE_TTL seconds
+METRICS_ALLOWED_IPS = os.environ.get("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(',')
+METRICS_GAUGE_TTL = int(os.environ.get("METRICS_GAUGE_TTL", 30))
+
 ROOT_URLCONF = 'dormitroty.urls'
 
 TEMPLATES = [
@@ -96,13 +149,15 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'dormitroty.wsgi.application'
+ASGI_APPLICATION = 'dormitroty.asgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        # django.db.backends.sqlite3 runs the benchmarks without a Postgres server
+        'ENGINE': os.environ.get('DB_ENGINE', 'django.db.backends.postgresql'),
         'NAME': os.environ.get('POSTGRES_DB'),
         'USER': os.environ.get('POSTGRES_USER'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
@@ -119,6 +174,26 @@ DATABASES = {
     }
 }
 
+# read replicas of default as comma-separated host[:port]; reads of read_replica views go to one of them.
+# They need a CACHE_BACKEND shared by all processes for the read-your-writes pins.
+# Under `manage.py test` without any, replica1 stands in for default so the routing can be checked on two aliases.
+REPLICA_HOSTS = [host.strip() for host in os.environ.get('POSTGRES_REPLICA_HOSTS', '').split(',') if host.strip()]
+TESTING = sys.argv[1:2] == ['test']
+for number, replica_host in enumerate(REPLICA_HOSTS or ([''] if TESTING else []), 1):
+    host, _, port = replica_host.partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host or DATABASES['default']['HOST'],
+        'PORT': port or DATABASES['default']['PORT'],
+        # tests read the test database of default through it
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [f'replica{number}' for number in range(1, len(REPLICA_HOSTS) + 1)]
+DATABASE_ROUTERS = ['dormitroty.routers.ReplicaRouter']
+
+# seconds a client that wrote keeps reading from the primary
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -153,6 +228,9 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+MEDIA_URL = 'media/'
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", BASE_DIR / 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -163,3 +241,44 @@ AUTH_USER_MODEL = 'users.User'
 # zarinpal config
 ZARINPAL_MERCHANT_ID = os.environ.get("ZARINPAL_MERCHANT_ID")
 ZARINPAL_CALLBACK_URL = os.environ.get("ZARINPAL_CALLBACK_URL")
+
+# payment gateways, in order of preference when none has health data yet
+PAYMENT_GATEWAYS = {
+    'zarinpal': {
+        'base_url': os.environ.get("ZARINPAL_BASE_URL", "https://payment.zarinpal.com"),
+        'start_url': os.environ.get("ZARINPAL_START_URL", "https://payment.zarinpal.com/pg/StartPay/"),
+        'merchant_id': ZARINPAL_MERCHANT_ID,
+    },
+    'idpay': {
+        'base_url': os.environ.get("IDPAY_BASE_URL", "https://api.idpay.ir"),
+        'api_key': os.environ.get("IDPAY_API_KEY"),
+        'sandbox': os.environ.get("IDPAY_SANDBOX", "False") == "True",
+    },
+    'payir': {
+        'base_url': os.environ.get("PAYIR_BASE_URL", "https://pay.ir"),
+        'api_key': os.environ.get("PAYIR_API_KEY"),
+    },
+}
+PAYMENT_GATEWAY_TIMEOUT = int(os.environ.get("PAYMENT_GATEWAY_TIMEOUT", 5))
+
+# pub/sub used to push new complaint messages to open streams
+COMPLAINT_BROKER = 'complaints.pubsub.InMemoryBroker'
+
+# hours a complaint may wait before escalate_complaints raises its priority, by priority
+COMPLAINT_SLA_HOURS = {
+    1: int(os.environ.get("COMPLAINT_SLA_URGENT_HOURS", 4)),
+    2: int(os.environ.get("COMPLAINT_SLA_HIGH_HOURS", 24)),
+    3: int(os.environ.get("COMPLAINT_SLA_NORMAL_HOURS", 72)),
+    4: int(os.environ.get("COMPLAINT_SLA_LOW_HOURS", 168)),
+}
+
+# complaint message attachments, uploaded in chunks of at most ATTACHMENT_MAX_CHUNK bytes
+ATTACHMENT_MAX_SIZE = int(os.environ.get("ATTACHMENT_MAX_SIZE", 20 * 1024 * 1024))
+ATTACHMENT_MAX_CHUNK = int(os.environ.get("ATTACHMENT_MAX_CHUNK", 4 * 1024 * 1024))
+ATTACHMENT_CONTENT_TYPES = ['image/jpeg', 'image/png', 'image/webp', 'application/pdf']
+ATTACHMENT_THUMBNAIL_SIZE = (320, 320)
+ATTACHMENT_THUMBNAIL_WORKERS = int(os.environ.get("ATTACHMENT_THUMBNAIL_WORKERS", 2))
+
+# processes hashing passwords for /api/users/import/, one pool shared by the requests of a process;
+# 1 hashes in the request process
+USER_IMPORT_WORKERS = int(os.environ.get("USER_IMPORT_WORKERS", 2))
@@ -0,0 +1,26 @@
+"""Test helpers shared by the apps' test suites."""
+from .instrumentation import query_budget_exceeded
+
+
+def _fail_on_budget_exceeded(sender, request, queries, budget, **kwargs):
+    raise AssertionError(
+        f"{request.method} {request.get_full_path()} ran {queries} queries, "
+        f"over the query_budget of {budget} declared on {sender.__name__}"
+    )
+
+
+class QueryBudgetMixin:
+    """
+    Fails a test when a request it makes runs more queries than the view's
+    ``query_budget``. The error is raised from the request, so the test client
+    re-raises it at the offending call.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        query_budget_exceeded.connect(_fail_on_budget_exceeded, dispatch_uid='query-budget-test')
+
+    @classmethod
+    def tearDownClass(cls):
+        query_budget_exceeded.disconnect(dispatch_uid='query-budget-test')
+        super().tearDownClass()
@@ -17,6 +17,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from .metrics import MetricsView
+from .profiling import ProfileDownloadAPIView, ProfileListAPIView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -25,6 +27,9 @@ urlpatterns = [
     path('api/bookings/', include('bookings.urls')),
     path('api/complaints/', include('complaints.urls')),
     path('api/payments/', include('payments.urls')),
+    path('api/profiles/', ProfileListAPIView.as_view(), name='profile-list'),
+    path('api/profiles/<str:profile_id>/', ProfileDownloadAPIView.as_view(), name='profile-download'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
     path('schema/', SpectacularAPIView.as_view(), name='schema'),
     path('swagger/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
 ]
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from dormitroty.campus import generate_campus
+
+
+class Command(BaseCommand):
+    help = ("Fill the database with synthetic dorms, rooms, beds, students, bookings, transactions and "
+            "complaint threads for performance work. The same --seed on the same database gives the same data.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--dorms', type=int, default=4)
+        parser.add_argument('--floors', type=int, default=5)
+        parser.add_argument('--rooms-per-floor', type=int, default=20,
+                            help="Rooms hold 1 to 6 beds, 3.2 on average")
+        parser.add_argument('--bookings', type=int, help="Defaults to 60%% of the students")
+        parser.add_argument('--complaints', type=int, help="Complaint threads; defaults to 10%% of the students")
+        parser.add_argument('--staff', type=int, default=5, help="Staff users answering complaints")
+        parser.add_argument('--password', default='password', help="Password of every generated user")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        for name in ('students', 'dorms', 'floors', 'rooms_per_floor', 'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be positive")
+
+        started = time.monotonic()
+        with transaction.atomic():
+            counts = generate_campus(
+                students=options['students'], dorms=options['dorms'], floors=options['floors'],
+                rooms_per_floor=options['rooms_per_floor'], bookings=options['bookings'],
+                complaints=options['complaints'], staff=options['staff'], password=options['password'],
+                seed=options['seed'], batch_size=options['batch_size'],
+            )
+        for name, count in counts.items():
+            self.stdout.write(f"{count:>9} {name}")
+        self.stdout.write(f"done in {time.monotonic() - started:.1f}s")
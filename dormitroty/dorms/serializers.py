@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from dormitroty.instrumentation import TimedListSerializer, TimedSerializerMixin
 from dorms.models import Dorm, Room, Bed
 from django.db.models import Q
 
@@ -63,9 +64,10 @@ class RoomSerializer(serializers.ModelSerializer):
         return room
 
 
-class DormSerializer(serializers.ModelSerializer):
+class DormSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     rooms = RoomSerializer(many=True, read_only=True)
 
     class Meta:
         model = Dorm
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'name', 'location', 'gender_restriction', 'description', 'rooms']
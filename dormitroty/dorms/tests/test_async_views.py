@@ -0,0 +1,113 @@
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from bookings.models import Booking
+from complaints.models import Complaint, ComplaintMessage
+from dorms.models import Bed, Dorm, Room
+from users.authentication import user_cache
+from users.models import User
+
+
+class AsyncReadViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.student = User.objects.create_user(
+            email="student@example.com", student_code="12345", national_code="987654321",
+            phone_number="1234567890", gender=User.EnumGender.MALE, password="password123"
+        )
+        self.other = User.objects.create_user(
+            email="other@example.com", student_code="54321", national_code="123456789",
+            phone_number="0987654321", gender=User.EnumGender.MALE, password="password123"
+        )
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com", student_code="67890", national_code="1122334455",
+            phone_number="0911111111", password="adminpassword"
+        )
+        self.dorm = Dorm.objects.create(name="Dorm A", location="Location A", gender_restriction='male')
+        Dorm.objects.create(name="Dorm B", location="Location B", gender_restriction='female')
+        self.room = Room.objects.create(dorm=self.dorm, room_number='101', floor=1, capacity=2, price=1000)
+        Bed.objects.create(room=self.room, bed_number='1')
+        Bed.objects.create(room=self.room, bed_number='2', is_occupied=True)
+
+    def auth(self, user):
+        return {'headers': {'Authorization': f'Bearer {AccessToken.for_user(user)}'}}
+
+    async def sync_get(self, path, params=None, user=None):
+        # the DRF view the async one mirrors
+        return await sync_to_async(self.client.get)(
+            path, params, HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user or self.admin)}'
+        )
+
+    async def test_matches_the_sync_views(self):
+        for sync_path, async_path, params in (
+            ('/api/dorms/', '/api/dorms/async/', {'gender_restriction': 'male'}),
+            ('/api/dorms/rooms/', '/api/dorms/rooms/async/', {'dorm_id': self.dorm.id}),
+            ('/api/dorms/beds/', '/api/dorms/beds/async/', {'is_occupied': 'false'}),
+        ):
+            with self.subTest(path=async_path):
+                expected = await self.sync_get(sync_path, params)
+                response = await self.async_client.get(async_path, params, **self.auth(self.admin))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), expected.json())
+
+    def test_dorms_query_count_does_not_grow_with_rooms(self):
+        # A sync test: assertNumQueries can't run in an event loop. Driven by async_to_sync,
+        # the view's thread-sensitive queries run back on this thread and its connection.
+        Room.objects.create(dorm=self.dorm, room_number='102', floor=1, capacity=1, price=1000)
+        # authentication, dorms, rooms, beds
+        with self.assertNumQueries(4):
+            response = async_to_sync(self.async_client.get)('/api/dorms/async/', **self.auth(self.admin))
+        self.assertEqual(len(response.json()[0]['rooms']), 2)
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get('/api/dorms/async/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_beds_are_staff_only(self):
+        response = await self.async_client.get('/api/dorms/beds/async/', **self.auth(self.student))
+        self.assertEqual(response.status_code, 403)
+
+    async def test_rejects_other_methods(self):
+        response = await self.async_client.post('/api/dorms/async/', **self.auth(self.admin))
+        self.assertEqual(response.status_code, 405)
+
+    async def test_bookings_are_paginated_per_user(self):
+        await Booking.objects.abulk_create([Booking(student=self.student, room=self.room) for _ in range(12)])
+        await Booking.objects.acreate(student=self.other, room=self.room)
+
+        response = await self.async_client.get('/api/bookings/async/', **self.auth(self.student))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 12)
+        self.assertEqual(len(data['results']), 10)
+        self.assertIsNone(data['previous'])
+        self.assertIn('page=2', data['next'])
+
+        response = await self.async_client.get('/api/bookings/async/', {'page': 2}, **self.auth(self.student))
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertIsNone(response.json()['next'])
+
+        response = await self.async_client.get('/api/bookings/async/', {'page': 3}, **self.auth(self.student))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_complaint_messages(self):
+        complaint = await Complaint.objects.acreate(student=self.student, title="Broken heater")
+        first = await ComplaintMessage.objects.acreate(complaint=complaint, sender=self.student, message="It is cold")
+        await ComplaintMessage.objects.acreate(complaint=complaint, sender=self.admin, message="On it")
+        path = f'/api/complaints/{complaint.id}/messages/async/'
+
+        response = await self.async_client.get(path, {'since_id': first.id}, **self.auth(self.student))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([message['message'] for message in response.json()], ["On it"])
+        expected = await self.sync_get(f'/api/complaints/{complaint.id}/messages/send/')
+        response = await self.async_client.get(path, **self.auth(self.admin))
+        self.assertEqual(response.json(), expected.json())
+
+        response = await self.async_client.get(path, **self.auth(self.other))
+        self.assertEqual(response.status_code, 403)
+        response = await self.async_client.get(path, {'limit': 'x'}, **self.auth(self.student))
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.get('/api/complaints/999999/messages/async/', **self.auth(self.student))
+        self.assertEqual(response.status_code, 404)
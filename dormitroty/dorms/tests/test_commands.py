@@ -0,0 +1,48 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from bookings.models import Booking
+from complaints.models import Complaint, ComplaintMessage, ComplaintSearchEntry
+from dorms.models import Bed, Room
+from payments.models import Transaction
+from users.models import User
+
+
+class GenerateCampusCommandTest(TestCase):
+    def generate(self, **options):
+        out = StringIO()
+        call_command('generate_campus', students=200, dorms=2, floors=3, rooms_per_floor=10, stdout=out, **options)
+        return out.getvalue()
+
+    def test_counts(self):
+        output = self.generate(bookings=100, complaints=20, staff=2)
+        self.assertIn("done in", output)
+        self.assertEqual(Room.objects.count(), 60)
+        self.assertEqual(User.objects.count(), 202)
+        self.assertEqual(Booking.objects.count(), 100)
+        self.assertEqual(Complaint.objects.count(), 20)
+        self.assertEqual(ComplaintSearchEntry.objects.count(), 20 + ComplaintMessage.objects.count())
+        self.assertTrue(Transaction.objects.filter(status='paid').exists())
+
+    def test_consistency(self):
+        self.generate()
+        approved = Booking.objects.filter(status=Booking.BookingStatus.APPROVED)
+        self.assertEqual(Bed.objects.filter(is_occupied=True).count(), approved.count())
+        self.assertFalse(approved.filter(bed__isnull=True).exists())
+        for booking in Booking.objects.select_related('student', 'room__dorm'):
+            self.assertEqual(booking.student.gender, booking.room.dorm.gender_restriction)
+        for complaint in Complaint.objects.all():
+            self.assertEqual(complaint.message_count, complaint.messages.count())
+
+    def test_deterministic(self):
+        self.generate(seed=7)
+        first = list(Booking.objects.order_by('id').values_list('student__student_code', 'room__room_number',
+                                                                'status'))
+        Booking.objects.all().delete()
+        User.objects.all().delete()
+        self.generate(seed=7)
+        self.assertEqual(
+            list(Booking.objects.order_by('id').values_list('student__student_code', 'room__room_number', 'status')),
+            first,
+        )
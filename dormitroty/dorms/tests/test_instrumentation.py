@@ -0,0 +1,72 @@
+import time
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from dorms.models import Bed, Dorm, Room
+from dorms.serializers import DormSerializer, RoomSerializer
+from dorms.views import DormAPIView
+from dormitroty.instrumentation import TimedListSerializer, route_stats
+from dormitroty.testing import QueryBudgetMixin
+from users.models import User
+
+
+class RequestStatsTest(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        route_stats.clear()
+        self.user = User.objects.create_user(
+            student_code='11111111112', password='normal123', email='normal@example.com',
+            national_code='1234567891', phone_number='+989398413992'
+        )
+        self.client.force_authenticate(user=self.user)
+        dorm = Dorm.objects.create(name="Dorm A", location="Location A")
+        Room.objects.create(dorm=dorm, room_number='101', floor=1, capacity=2, price=100)
+
+    @override_settings(REQUEST_STATS_HEADERS=True)
+    def test_headers(self):
+        response = self.client.get('/api/dorms/')
+        self.assertGreater(int(response['X-DB-Queries']), 0)
+        for header in ('X-DB-Time', 'X-Serialization-Time', 'X-Request-Time'):
+            self.assertGreaterEqual(float(response[header]), 0)
+
+    @override_settings(REQUEST_STATS_HEADERS=False)
+    def test_no_headers_by_default(self):
+        self.assertNotIn('X-DB-Queries', self.client.get('/api/dorms/'))
+
+    def test_route_histograms(self):
+        self.client.get('/api/dorms/')
+        self.client.get('/api/dorms/', {'name': 'A'})
+        histograms = route_stats.snapshot()[('GET', 'api/dorms/')]
+        buckets, count, total = histograms['latency']
+        self.assertEqual(count, 2)
+        self.assertEqual(buckets[-1], (float('inf'), 2))
+        self.assertGreater(histograms['queries'][2], 0)
+
+    def test_budget_exceeded_fails_test(self):
+        with mock.patch.object(DormAPIView, 'query_budget', 0, create=True):
+            with self.assertRaisesMessage(AssertionError, "over the query_budget of 0 declared on DormAPIView"):
+                self.client.get('/api/dorms/')
+
+    def test_dorm_catalog_stays_within_budget(self):
+        for number in range(5):
+            room = Room.objects.create(dorm=Dorm.objects.get(), room_number=f'2{number:02d}', floor=2, capacity=1,
+                                       price=100)
+            Bed.objects.create(room=room, bed_number='1')
+        self.assertEqual(len(self.client.get('/api/dorms/').json()[0]['rooms']), 6)
+
+    @override_settings(REQUEST_STATS_HEADERS=True)
+    def test_serialization_time_includes_building_serializer_data(self):
+        to_representation = RoomSerializer.to_representation
+
+        def slow(serializer, instance):
+            time.sleep(0.02)
+            return to_representation(serializer, instance)
+
+        with mock.patch.object(RoomSerializer, 'to_representation', slow):
+            response = self.client.get('/api/dorms/')
+        self.assertGreaterEqual(float(response['X-Serialization-Time']), 20)
+
+    def test_timed_serializers_work_outside_requests(self):
+        serializer = DormSerializer(Dorm.objects.all(), many=True)
+        self.assertIsInstance(serializer, TimedListSerializer)
+        self.assertEqual(serializer.data[0]['name'], "Dorm A")
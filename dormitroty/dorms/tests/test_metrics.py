@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+from bookings.models import Booking
+from dorms.models import Bed, Dorm, Room
+from dormitroty.instrumentation import route_stats
+from users.models import User
+
+
+class MetricsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        route_stats.clear()
+        self.admin = User.objects.create_superuser(
+            student_code='11111111111', password='admin123', email='admin@example.com',
+            national_code='1234567890', phone_number='+989398413991'
+        )
+        self.student = User.objects.create_user(
+            student_code='11111111112', password='normal123', email='normal@example.com',
+            national_code='1234567891', phone_number='+989398413992'
+        )
+        dorm = Dorm.objects.create(name="Dorm A", location="Location A")
+        room = Room.objects.create(dorm=dorm, room_number='101', floor=1, capacity=3)
+        Bed.objects.bulk_create([Bed(room=room, bed_number=str(i), is_occupied=i == 1) for i in (1, 2, 3)])
+        Booking.objects.create(student=self.student, room=room)
+        self.dorm = dorm
+
+    def test_metrics_from_localhost(self):
+        self.client.force_authenticate(user=self.student)
+        self.client.get('/api/dorms/')
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get('/metrics', REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('http_requests_total{method="GET",route="api/dorms/"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="api/dorms/",le="+Inf"} 1', body)
+        self.assertIn('http_request_db_queries_count{method="GET",route="api/dorms/"} 1', body)
+        self.assertIn(f'dorm_free_beds{{dorm_id="{self.dorm.id}",dorm="Dorm A"}} 2', body)
+        self.assertIn('bookings_pending 1', body)
+        self.assertIn('transactions_pending 0', body)
+
+    def test_gauges_are_cached(self):
+        self.client.get('/metrics', REMOTE_ADDR='127.0.0.1')
+        Booking.objects.create(student=self.student)
+        with self.assertNumQueries(0):
+            body = self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').content.decode()
+        self.assertIn('bookings_pending 1', body)
+
+    def test_remote_requires_admin(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.1').status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(user=self.student)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.1').status_code,
+                         status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.1').status_code, status.HTTP_200_OK)
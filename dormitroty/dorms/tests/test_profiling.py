@@ -0,0 +1,59 @@
+import marshal
+
+from django.test import override_settings
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import status
+from rest_framework.test import APITestCase
+from dormitroty.profiling import profile_store, profile_token
+from users.models import User
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILE_SAMPLE_RATE=0)
+class ProfilingTest(APITestCase):
+    def setUp(self):
+        profile_store.clear()
+        self.admin = User.objects.create_superuser(
+            student_code='11111111111', password='admin123', email='admin@example.com',
+            national_code='1234567890', phone_number='+989398413991'
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_unsampled_request_is_not_profiled(self):
+        self.client.get('/api/dorms/')
+        self.client.get('/api/dorms/', HTTP_X_PROFILE='forged')
+        self.assertEqual(profile_store.list(), [])
+
+    def test_signed_header_is_profiled(self):
+        self.client.get('/api/dorms/', HTTP_X_PROFILE=profile_token())
+        response = self.client.get('/api/profiles/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [profile] = response.data['profiles']
+        self.assertEqual((profile['method'], profile['path'], profile['status']), ('GET', '/api/dorms/', 200))
+
+        download = self.client.get(f"/api/profiles/{profile['id']}/")
+        self.assertEqual(download['Content-Disposition'], f'attachment; filename="{profile["id"]}.prof"')
+        self.assertIsInstance(marshal.loads(download.content), dict)
+        text = self.client.get(f"/api/profiles/{profile['id']}/", {'output': 'text'})
+        self.assertIn(b'function calls', text.content)
+
+    @override_settings(PROFILE_SAMPLE_RATE=1)
+    def test_sample_rate(self):
+        self.client.get('/api/dorms/')
+        self.assertEqual(len(profile_store.list()), 1)
+
+    def test_admin_only(self):
+        user = User.objects.create_user(
+            student_code='11111111112', password='normal123', email='normal@example.com',
+            national_code='1234567891', phone_number='+989398413992'
+        )
+        self.client.force_authenticate(user=user)
+        self.assertEqual(self.client.get('/api/profiles/').status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get('/api/profiles/abc/').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_unknown_profile_is_404(self):
+        self.assertEqual(self.client.get('/api/profiles/abc/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_schema_operation_ids(self):
+        paths = SchemaGenerator().get_schema(request=None, public=True)['paths']
+        self.assertEqual(paths['/api/profiles/']['get']['operationId'], 'profiles_list')
+        self.assertEqual(paths['/api/profiles/{profile_id}/']['get']['operationId'], 'profiles_download')
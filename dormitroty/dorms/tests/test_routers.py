@@ -0,0 +1,101 @@
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+from dormitroty.routers import ReplicaRouter, ReplicaRoutingMiddleware
+from dorms.models import Dorm
+from users.authentication import user_cache
+from users.models import User
+
+
+# a cache every process could share, as pins need
+SHARED_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'dormitroty-test-cache'),
+}}
+
+
+# replica1 mirrors default under tests, so both aliases hold the same rows
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_PIN_SECONDS=60, CACHES=SHARED_CACHE)
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {'default', 'replica1'}
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com", student_code="67890", national_code="1122334455",
+            phone_number="0911111111", password="adminpassword"
+        )
+        Dorm.objects.create(name="Dorm A", location="Location A")
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.admin)}'}
+
+    def get(self, path, auth=None):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica1']) as replica:
+            response = self.client.get(path, **(auth or self.auth))
+        return response, len(primary), len(replica)
+
+    def test_read_replica_views_read_from_a_replica(self):
+        response, primary, replica = self.get('/api/dorms/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['name'], "Dorm A")
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_async_views_read_from_a_replica(self):
+        response, primary, replica = self.get('/api/dorms/async/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_other_views_read_from_the_primary(self):
+        response, primary, replica = self.get('/api/complaints/')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        with CaptureQueriesContext(connections['replica1']) as replica:
+            response = self.client.post('/api/dorms/', {'name': "Dorm B", 'location': "Location B"}, **self.auth)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(replica), 0)
+
+        response, primary, replica = self.get('/api/dorms/')
+        self.assertEqual(len(response.json()), 2)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        # other clients, here another token, still read from the replica
+        other = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.admin)}'}
+        _, primary, replica = self.get('/api/dorms/', other)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_expires(self):
+        self.client.post('/api/dorms/', {'name': "Dorm B", 'location': "Location B"}, **self.auth)
+        _, primary, replica = self.get('/api/dorms/')
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_router_outside_requests(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Dorm))
+        self.assertIsNone(router.db_for_write(Dorm))
+        self.assertIs(router.allow_migrate('replica1', 'dorms'), False)
+        self.assertIsNone(router.allow_migrate('default', 'dorms'))
+
+        dorm = Dorm.objects.using('replica1').get()
+        self.assertEqual(router.db_for_write(Dorm, instance=dorm), 'default')
+        self.assertTrue(router.allow_relation(dorm, Dorm.objects.get()))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_refuses_a_per_process_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ReplicaRoutingMiddleware(lambda request: None)
@@ -1,9 +1,18 @@
 from django.urls import path
-from dorms.views import DormAPIView, RoomAPIView, BedAPIView, DormDetailsAPIView
+from dorms.views import (
+    DormAPIView, RoomAPIView, BedAPIView, DormDetailsAPIView, AsyncDormAPIView, AsyncRoomAPIView, AsyncBedAPIView,
+)
 
 urlpatterns = [
     path('', DormAPIView.as_view(), name='dorm-list'),
     path('details/<int:pk>/', DormDetailsAPIView.as_view(), name='dorm-list'),
     path('rooms/', RoomAPIView.as_view(), name='room-list'),
     path('beds/', BedAPIView.as_view(), name='bed-list'),
+]
+
+# async read paths, for dormitroty.asgi
+urlpatterns += [
+    path('async/', AsyncDormAPIView.as_view(), name='dorm-list-async'),
+    path('rooms/async/', AsyncRoomAPIView.as_view(), name='room-list-async'),
+    path('beds/async/', AsyncBedAPIView.as_view(), name='bed-list-async'),
 ]
\ No newline at end of file
@@ -7,11 +7,48 @@ from dorms.models import Dorm, Room, Bed
 from dorms.serializers import DormSerializer, RoomSerializer, BedSerializer
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import permissions
+from dormitroty.async_api import AsyncAPIView
+
+
+def filter_dorms(params):
+    dorms = Dorm.objects.all()
+    if params.get('name'):
+        dorms = dorms.filter(name__icontains=params['name'])
+    if params.get('location'):
+        dorms = dorms.filter(location__icontains=params['location'])
+    if params.get('gender_restriction'):
+        dorms = dorms.filter(gender_restriction=params['gender_restriction'])
+    return dorms
+
+
+def filter_rooms(params):
+    rooms = Room.objects.all()
+    if params.get('dorm_id'):
+        rooms = rooms.filter(dorm_id=params['dorm_id'])
+    if params.get('floor'):
+        rooms = rooms.filter(floor=params['floor'])
+    if params.get('capacity'):
+        rooms = rooms.filter(capacity=params['capacity'])
+    return rooms
+
+
+def filter_beds(params):
+    beds = Bed.objects.all()
+    if params.get('room_id'):
+        beds = beds.filter(room_id=params['room_id'])
+    if params.get('bed_number'):
+        beds = beds.filter(bed_number=params['bed_number'])
+    if params.get('is_occupied') is not None:
+        beds = beds.filter(is_occupied=params['is_occupied'].lower() == 'true')
+    return beds
 
 
 # Python
 class DormAPIView(APIView):
     permission_classes = [permissions.IsAdminUser]
+    read_replica = True
+    # dorms, their rooms and beds, plus the user when the JWT user cache misses
+    query_budget = 4
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -33,19 +70,7 @@ class DormAPIView(APIView):
         }
     )
     def get(self, request):
-        dorms = Dorm.objects.all()
-        name = request.query_params.get('name')
-        location = request.query_params.get('location')
-        gender_restriction = request.query_params.get('gender_restriction')
-
-        if name:
-            dorms = dorms.filter(name__icontains=name)
-        if location:
-            dorms = dorms.filter(location__icontains=location)
-        if gender_restriction:
-            dorms = dorms.filter(gender_restriction=gender_restriction)
-
-        serializer = DormSerializer(dorms, many=True)
+        serializer = DormSerializer(filter_dorms(request.query_params).prefetch_related('rooms__beds'), many=True)
         return Response(serializer.data)
 
     @extend_schema(
@@ -111,6 +136,7 @@ class DormDetailsAPIView(APIView):
 
 class RoomAPIView(APIView):
     permission_classes = [permissions.IsAdminUser]
+    read_replica = True
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -134,19 +160,7 @@ class RoomAPIView(APIView):
         }
     )
     def get(self, request):
-        rooms = Room.objects.all()
-        dorm_id = request.query_params.get('dorm_id')
-        floor = request.query_params.get('floor')
-        capacity = request.query_params.get('capacity')
-
-        if dorm_id:
-            rooms = rooms.filter(dorm_id=dorm_id)
-        if floor:
-            rooms = rooms.filter(floor=floor)
-        if capacity:
-            rooms = rooms.filter(capacity=capacity)
-
-        serializer = RoomSerializer(rooms, many=True)
+        serializer = RoomSerializer(filter_rooms(request.query_params).prefetch_related('beds'), many=True)
         return Response(serializer.data)
 
     @extend_schema(
@@ -168,6 +182,7 @@ class RoomAPIView(APIView):
 
 class BedAPIView(APIView):
     permission_classes = [permissions.IsAdminUser]
+    read_replica = True
 
     @extend_schema(
         summary="List Beds",
@@ -186,19 +201,7 @@ class BedAPIView(APIView):
         }
     )
     def get(self, request):
-        beds = Bed.objects.all()
-        room_id = request.query_params.get('room_id')
-        bed_number = request.query_params.get('bed_number')
-        is_occupied = request.query_params.get('is_occupied')
-
-        if room_id:
-            beds = beds.filter(room_id=room_id)
-        if bed_number:
-            beds = beds.filter(bed_number=bed_number)
-        if is_occupied is not None:
-            beds = beds.filter(is_occupied=is_occupied.lower() == 'true')
-
-        serializer = BedSerializer(beds, many=True)
+        serializer = BedSerializer(filter_beds(request.query_params), many=True)
         return Response(serializer.data)
 
     @extend_schema(
@@ -216,3 +219,30 @@ class BedAPIView(APIView):
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncDormAPIView(AsyncAPIView):
+    """GET of DormAPIView on the async ORM."""
+    read_replica = True
+
+    async def get(self, request):
+        dorms = [dorm async for dorm in filter_dorms(request.GET).prefetch_related('rooms__beds')]
+        return DormSerializer(dorms, many=True).data
+
+
+class AsyncRoomAPIView(AsyncAPIView):
+    """GET of RoomAPIView on the async ORM."""
+    read_replica = True
+
+    async def get(self, request):
+        rooms = [room async for room in filter_rooms(request.GET).prefetch_related('beds')]
+        return RoomSerializer(rooms, many=True).data
+
+
+class AsyncBedAPIView(AsyncAPIView):
+    """GET of BedAPIView on the async ORM."""
+    staff_only = True
+    read_replica = True
+
+    async def get(self, request):
+        return BedSerializer([bed async for bed in filter_beds(request.GET)], many=True).data
@@ -0,0 +1,305 @@
+import abc
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from urllib import request as urllib_request
+from urllib.error import HTTPError, URLError
+
+from django.conf import settings
+
+
+class GatewayError(Exception):
+    pass
+
+
+class GatewayUnavailable(GatewayError):
+    """Network error, timeout or 5xx answer: the provider itself is degraded."""
+
+
+class GatewayRejected(GatewayError):
+    """The provider answered but refused the request (bad amount, unpaid, ...)."""
+
+
+@dataclass
+class PaymentStart:
+    gateway: str
+    authority: str
+    pay_url: str
+
+
+def _post_json(url, payload, headers=None, timeout=5):
+    body = json.dumps(payload).encode('utf-8')
+    req = urllib_request.Request(url, data=body, method='POST', headers={
+        'Content-Type': 'application/json',
+        'Accept': 'application/json',
+        **(headers or {}),
+    })
+    try:
+        with urllib_request.urlopen(req, timeout=timeout) as response:
+            raw = response.read()
+    except HTTPError as exc:
+        if exc.code >= 500:
+            raise GatewayUnavailable(f"{url} answered {exc.code}")
+        raw = exc.read()
+    except (URLError, TimeoutError, OSError) as exc:
+        raise GatewayUnavailable(f"{url}: {exc}")
+
+    try:
+        return json.loads(raw or b'{}')
+    except ValueError:
+        raise GatewayUnavailable(f"{url} returned invalid JSON")
+
+
+class BaseGateway(abc.ABC):
+    name = None
+
+    def __init__(self, config, timeout=5):
+        self.config = config
+        self.base_url = (config.get('base_url') or '').rstrip('/')
+        self.timeout = timeout
+
+    def is_configured(self):
+        return bool(self.base_url)
+
+    @abc.abstractmethod
+    def request_payment(self, transaction, callback_url):
+        """Return a ``PaymentStart`` or raise ``GatewayError``."""
+
+    @abc.abstractmethod
+    def verify(self, transaction, authority):
+        """Return the provider's reference id or raise ``GatewayError``."""
+
+    @abc.abstractmethod
+    def parse_callback(self, params):
+        """Return the authority from the callback params, or ``None`` if the payment was cancelled."""
+
+    def _post(self, path, payload, headers=None):
+        return _post_json(f"{self.base_url}{path}", payload, headers, self.timeout)
+
+
+class ZarinPalGateway(BaseGateway):
+    name = 'zarinpal'
+
+    def is_configured(self):
+        return super().is_configured() and bool(self.config.get('merchant_id'))
+
+    def request_payment(self, transaction, callback_url):
+        result = self._post('/pg/v4/payment/request.json', {
+            'merchant_id': self.config['merchant_id'],
+            'amount': transaction.amount,
+            'currency': 'IRT',
+            'callback_url': callback_url,
+            'description': f"پرداخت رزرو شماره {transaction.booking_id}",
+        })
+        data = result.get('data') or {}
+        if data.get('code') != 100:
+            raise GatewayRejected(f"zarinpal request failed: {result.get('errors')}")
+        start_url = self.config.get('start_url') or f"{self.base_url}/pg/StartPay/"
+        return PaymentStart(self.name, data['authority'], f"{start_url}{data['authority']}")
+
+    def verify(self, transaction, authority):
+        result = self._post('/pg/v4/payment/verify.json', {
+            'merchant_id': self.config['merchant_id'],
+            'amount': transaction.amount,
+            'currency': 'IRT',
+            'authority': authority,
+        })
+        data = result.get('data') or {}
+        # 101 means the payment was already verified by an earlier callback.
+        if data.get('code') not in (100, 101):
+            raise GatewayRejected(f"zarinpal verify failed: {result.get('errors')}")
+        return str(data['ref_id'])
+
+    def parse_callback(self, params):
+        if params.get('Status') != 'OK':
+            return None
+        return params.get('Authority')
+
+
+class IDPayGateway(BaseGateway):
+    name = 'idpay'
+
+    def is_configured(self):
+        return super().is_configured() and bool(self.config.get('api_key'))
+
+    def _headers(self):
+        return {
+            'X-API-KEY': self.config['api_key'],
+            'X-SANDBOX': '1' if self.config.get('sandbox') else '0',
+        }
+
+    def request_payment(self, transaction, callback_url):
+        result = self._post('/v1.1/payment', {
+            'order_id': str(transaction.id),
+            'amount': transaction.amount * 10,
+            'callback': callback_url,
+        }, self._headers())
+        if not result.get('id') or not result.get('link'):
+            raise GatewayRejected(f"idpay request failed: {result.get('error_message')}")
+        return PaymentStart(self.name, result['id'], result['link'])
+
+    def verify(self, transaction, authority):
+        result = self._post('/v1.1/payment/verify', {
+            'id': authority,
+            'order_id': str(transaction.id),
+        }, self._headers())
+        # 101 means the payment was already verified by an earlier callback.
+        if int(result.get('status') or 0) not in (100, 101):
+            raise GatewayRejected(f"idpay verify failed: {result.get('error_message')}")
+        return str(result['track_id'])
+
+    def parse_callback(self, params):
+        if str(params.get('status')) != '10':
+            return None
+        return params.get('id')
+
+
+class PayIrGateway(BaseGateway):
+    name = 'payir'
+
+    def is_configured(self):
+        return super().is_configured() and bool(self.config.get('api_key'))
+
+    def request_payment(self, transaction, callback_url):
+        result = self._post('/pg/send', {
+            'api': self.config['api_key'],
+            'amount': transaction.amount * 10,
+            'redirect': callback_url,
+            'factorNumber': str(transaction.id),
+        })
+        if int(result.get('status') or 0) != 1:
+            raise GatewayRejected(f"pay.ir request failed: {result.get('errorMessage')}")
+        return PaymentStart(self.name, result['token'], f"{self.base_url}/pg/{result['token']}")
+
+    def verify(self, transaction, authority):
+        result = self._post('/pg/verify', {
+            'api': self.config['api_key'],
+            'token': authority,
+        })
+        if int(result.get('status') or 0) != 1:
+            raise GatewayRejected(f"pay.ir verify failed: {result.get('errorMessage')}")
+        return str(result['transId'])
+
+    def parse_callback(self, params):
+        if str(params.get('status')) != '1':
+            return None
+        return params.get('token')
+
+
+GATEWAY_CLASSES = {
+    gateway.name: gateway for gateway in (ZarinPalGateway, IDPayGateway, PayIrGateway)
+}
+
+
+class GatewayHealth:
+    """
+    Rolling window of call outcomes per gateway, shared by every request of this process.
+    """
+
+    def __init__(self, window=300, max_samples=500, min_samples=5):
+        self.window = window
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, latency, ok):
+        with self._lock:
+            samples = self._samples.setdefault(name, deque(maxlen=self.max_samples))
+            samples.append((time.monotonic(), latency, ok))
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def stats(self, name):
+        horizon = time.monotonic() - self.window
+        with self._lock:
+            samples = self._samples.get(name, ())
+            while samples and samples[0][0] < horizon:
+                samples.popleft()
+            recent = list(samples)
+
+        if not recent:
+            return {'count': 0, 'error_rate': 0.0, 'avg_latency': 0.0}
+        errors = sum(1 for _, _, ok in recent if not ok)
+        return {
+            'count': len(recent),
+            'error_rate': errors / len(recent),
+            'avg_latency': sum(latency for _, latency, _ in recent) / len(recent),
+        }
+
+    def rank_key(self, name, timeout):
+        stats = self.stats(name)
+        # A failed call costs as much as one that ran into the timeout.
+        score = stats['avg_latency'] + stats['error_rate'] * timeout
+        unhealthy = stats['count'] >= self.min_samples and stats['error_rate'] >= 0.5
+        return unhealthy, score
+
+
+health = GatewayHealth()
+
+
+class GatewayRouter:
+    def __init__(self, gateways, health_tracker=None, timeout=5):
+        self.gateways = gateways
+        self.health = health_tracker or health
+        self.timeout = timeout
+
+    def get(self, name):
+        for gateway in self.gateways:
+            if gateway.name == name:
+                return gateway
+        return None
+
+    def ranked(self):
+        # sorted() is stable, so the configured order breaks ties between fresh gateways.
+        return sorted(self.gateways, key=lambda gateway: self.health.rank_key(gateway.name, self.timeout))
+
+    def _call(self, gateway, method, *args):
+        started = time.monotonic()
+        try:
+            result = getattr(gateway, method)(*args)
+        except GatewayRejected:
+            # The provider is up and answering; only the request itself was refused.
+            self.health.record(gateway.name, time.monotonic() - started, True)
+            raise
+        except GatewayError:
+            self.health.record(gateway.name, time.monotonic() - started, False)
+            raise
+        self.health.record(gateway.name, time.monotonic() - started, True)
+        return result
+
+    def start_payment(self, transaction, callback_url):
+        """
+        Try gateways from the healthiest down and return the first successful ``PaymentStart``.
+        ``callback_url`` is called with the gateway name.
+        """
+        errors = []
+        for gateway in self.ranked():
+            try:
+                return self._call(gateway, 'request_payment', transaction, callback_url(gateway.name))
+            except GatewayError as exc:
+                errors.append(str(exc))
+        raise GatewayUnavailable("; ".join(errors) or "no payment gateway is configured")
+
+    def verify(self, name, transaction, authority):
+        gateway = self.get(name)
+        if gateway is None:
+            raise GatewayRejected(f"unknown gateway {name}")
+        return self._call(gateway, 'verify', transaction, authority)
+
+
+def get_router():
+    timeout = getattr(settings, 'PAYMENT_GATEWAY_TIMEOUT', 5)
+    gateways = []
+    for name, config in getattr(settings, 'PAYMENT_GATEWAYS', {}).items():
+        gateway_class = GATEWAY_CLASSES.get(name)
+        if gateway_class is None:
+            continue
+        gateway = gateway_class(config, timeout=timeout)
+        if gateway.is_configured():
+            gateways.append(gateway)
+    return GatewayRouter(gateways, health, timeout=timeout)
@@ -0,0 +1,142 @@
+import csv
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from payments.models import Transaction
+
+UPDATE_BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = "Reconcile transactions against a gateway settlement CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('settlement_file', help="Path of the settlement CSV exported by the gateway")
+        parser.add_argument('--gateway', choices=Transaction.Gateway.values,
+                            help="Only reconcile transactions of this gateway")
+        parser.add_argument('--from-date', help="Only transactions created on or after YYYY-MM-DD")
+        parser.add_argument('--to-date', help="Only transactions created on or before YYYY-MM-DD")
+        parser.add_argument('--ref-id-column', default='ref_id')
+        parser.add_argument('--authority-column', default='authority')
+        parser.add_argument('--amount-column', default='amount')
+        parser.add_argument('--rial', action='store_true',
+                            help="Settlement amounts are in rial instead of toman")
+        parser.add_argument('--report', help="Write every discrepancy to this CSV file")
+        parser.add_argument('--dry-run', action='store_true', help="Do not update transactions")
+
+    def handle(self, *args, **options):
+        transactions = self.get_transactions(options)
+
+        # Build side of the hash join: every candidate transaction keyed by ref_id and authority.
+        rows = {}
+        by_ref_id = {}
+        by_authority = {}
+        for pk, ref_id, authority, amount, status in transactions.values_list(
+                'id', 'ref_id', 'authority', 'amount', 'status').iterator(chunk_size=10000):
+            rows[pk] = (amount, status)
+            if ref_id:
+                by_ref_id[ref_id] = pk
+            if authority:
+                by_authority[authority] = pk
+
+        matched, mismatched, seen = [], [], set()
+        extra = 0
+        divisor = 10 if options['rial'] else 1
+
+        with ExitStack() as stack:
+            try:
+                settlement = stack.enter_context(
+                    open(options['settlement_file'], newline='', encoding='utf-8-sig'))
+            except OSError as exc:
+                raise CommandError(f"Cannot open settlement file: {exc}")
+
+            report = None
+            if options['report']:
+                report = csv.writer(stack.enter_context(
+                    open(options['report'], 'w', newline='', encoding='utf-8')))
+                report.writerow(['result', 'transaction_id', 'ref_id', 'authority',
+                                 'settled_amount', 'expected_amount'])
+
+            # Probe side: stream the settlement file one row at a time.
+            for line_number, row in enumerate(csv.DictReader(settlement), start=2):
+                ref_id = (row.get(options['ref_id_column']) or '').strip()
+                authority = (row.get(options['authority_column']) or '').strip()
+                amount = self.parse_amount(row.get(options['amount_column']), divisor)
+                if amount is None:
+                    raise CommandError(f"Invalid amount on line {line_number}")
+
+                pk = by_ref_id.get(ref_id) if ref_id else None
+                if pk is None and authority:
+                    pk = by_authority.get(authority)
+
+                if pk is None or pk in seen:
+                    # Unknown payment, or the same payment settled twice.
+                    extra += 1
+                    if report:
+                        report.writerow(['extra', pk or '', ref_id, authority, amount, ''])
+                    continue
+
+                seen.add(pk)
+                expected_amount, status = rows[pk]
+                if expected_amount == amount and status == Transaction.Status.PAID:
+                    matched.append(pk)
+                else:
+                    mismatched.append(pk)
+                    if report:
+                        report.writerow(['mismatch', pk, ref_id, authority, amount, expected_amount])
+
+            missing = [pk for pk, (_, status) in rows.items()
+                       if status == Transaction.Status.PAID and pk not in seen]
+            if report:
+                report.writerows(['missing', pk, '', '', '', rows[pk][0]] for pk in missing)
+
+        if not options['dry_run']:
+            now = timezone.now()
+            self.mark(matched, Transaction.Reconciliation.MATCHED, now)
+            self.mark(mismatched, Transaction.Reconciliation.MISMATCH, now)
+            self.mark(missing, Transaction.Reconciliation.MISSING, now)
+
+        self.stdout.write(
+            f"matched: {len(matched)}, mismatched: {len(mismatched)}, "
+            f"missing: {len(missing)}, extra: {extra}"
+        )
+
+    def get_transactions(self, options):
+        transactions = Transaction.objects.all()
+        if options['gateway']:
+            transactions = transactions.filter(gateway=options['gateway'])
+        # Plain range conditions on created_at, so the scan can use an index on it.
+        if options['from_date']:
+            transactions = transactions.filter(created_at__gte=self.parse_date(options['from_date']))
+        if options['to_date']:
+            transactions = transactions.filter(
+                created_at__lt=self.parse_date(options['to_date']) + timedelta(days=1))
+        return transactions
+
+    def parse_amount(self, value, divisor):
+        # Decimal, not float: exact for any amount, and a rial amount that isn't a whole
+        # number of toman stays fractional, so it mismatches instead of being rounded away.
+        try:
+            amount = Decimal(value or 0) / divisor
+        except InvalidOperation:
+            return None
+        if not amount.is_finite():
+            return None
+        return int(amount) if amount == amount.to_integral_value() else amount
+
+    def parse_date(self, value):
+        try:
+            return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+        except ValueError:
+            raise CommandError(f"Invalid date {value}, expected YYYY-MM-DD")
+
+    def mark(self, ids, result, now):
+        for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+            Transaction.objects.filter(id__in=ids[start:start + UPDATE_BATCH_SIZE]).update(
+                reconciliation_status=result,
+                reconciled_at=now,
+            )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 15:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_remove_transaction_is_confirmed_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='authority',
+            field=models.CharField(blank=True, db_index=True, help_text='شناسه پرداخت صادرشده توسط درگاه', max_length=100, null=True),
+        ),
+    ]
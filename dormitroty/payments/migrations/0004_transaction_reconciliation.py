@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0003_transaction_authority'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='reconciled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='reconciliation_status',
+            field=models.CharField(blank=True, choices=[('matched', 'منطبق با فایل تسویه'), ('mismatch', 'مغایرت با فایل تسویه'), ('missing', 'در فایل تسویه نیست')], help_text='نتیجه آخرین تطبیق با فایل تسویه درگاه', max_length=10, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-19 15:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fail_duplicate_pending_transactions(apps, schema_editor):
+    # Keep the newest pending transaction of each booking so the constraint can be created.
+    Transaction = apps.get_model('payments', 'Transaction')
+    duplicates = (
+        Transaction.objects.filter(status='pending')
+        .values('booking_id')
+        .annotate(count=models.Count('id'), newest=models.Max('id'))
+        .filter(count__gt=1)
+    )
+    for row in duplicates:
+        Transaction.objects.filter(booking_id=row['booking_id'], status='pending').exclude(
+            id=row['newest']
+        ).update(status='failed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_alter_booking_created_at_alter_booking_end_date_and_more'),
+        ('payments', '0005_transaction_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_pending_transactions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('booking',), name='unique_pending_transaction_per_booking'),
+        ),
+    ]
@@ -14,6 +14,11 @@ class Transaction(models.Model):
         IDPAY = 'idpay', 'IDPay'
         PAYIR = 'payir', 'Pay.ir'
 
+    class Reconciliation(models.TextChoices):
+        MATCHED = 'matched', 'منطبق با فایل تسویه'
+        MISMATCH = 'mismatch', 'مغایرت با فایل تسویه'
+        MISSING = 'missing', 'در فایل تسویه نیست'
+
     student = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -48,17 +53,64 @@ class Transaction(models.Model):
         help_text="کد پیگیری پرداخت موفق"
     )
 
+    authority = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True,
+        db_index=True,
+        help_text="شناسه پرداخت صادرشده توسط درگاه"
+    )
+
     description = models.TextField(blank=True, null=True)
 
+    reconciliation_status = models.CharField(
+        max_length=10,
+        choices=Reconciliation.choices,
+        blank=True,
+        null=True,
+        help_text="نتیجه آخرین تطبیق با فایل تسویه درگاه"
+    )
+    reconciled_at = models.DateTimeField(blank=True, null=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='tx_created_idx'),
+            models.Index(fields=['student', '-created_at', '-id'], name='tx_student_created_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='tx_status_created_idx'),
+            models.Index(fields=['gateway', '-created_at', '-id'], name='tx_gateway_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['booking'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_transaction_per_booking',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.student.student_code} - {self.amount} تومان - {self.status}"
 
     def mark_as_paid(self, ref_id):
+        """
+        Confirm the payment and approve its booking. Safe to call from duplicate
+        gateway callbacks: the row is locked and an already paid transaction is
+        left untouched. Returns ``False`` in that case.
+        """
         with transaction.atomic():
-            self.status = self.Status.PAID
-            self.ref_id = ref_id
-            self.save()
-            self.booking.status = self.booking.BookingStatus.APPROVED
-            self.booking.save()
+            locked = Transaction.objects.select_for_update().only('status', 'ref_id').get(pk=self.pk)
+            if locked.status == self.Status.PAID:
+                self.status = locked.status
+                self.ref_id = locked.ref_id
+                return False
+
+            self.status = locked.status = self.Status.PAID
+            self.ref_id = locked.ref_id = ref_id
+            locked.save(update_fields=['status', 'ref_id'])
+
+            approved = Booking.BookingStatus.APPROVED
+            Booking.objects.filter(pk=self.booking_id).update(status=approved)
+            if Transaction.booking.is_cached(self):
+                self.booking.status = approved
+        return True
@@ -0,0 +1,110 @@
+from datetime import datetime, time
+
+import jdatetime
+from django.db.models import Case, CharField, Q, Value, When
+from django.utils import timezone
+
+MAX_BUCKETS = 120
+
+# Iranian academic calendar: term -> (title, first Jalali month, length in months).
+# An academic year starts in Mehr; its second term starts in Bahman and the summer term in Tir.
+SEMESTERS = {
+    1: ('نیمسال اول', 7, 4),
+    2: ('نیمسال دوم', 11, 5),
+    3: ('ترم تابستان', 4, 3),
+}
+
+
+def parse_jalali_date(value):
+    value = value.strip().replace('/', '-')
+    try:
+        return jdatetime.datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"invalid Jalali date {value}, expected YYYY-MM-DD")
+
+
+def to_aware(jalali_date):
+    """Midnight of a Jalali date as an aware Gregorian datetime."""
+    return timezone.make_aware(datetime.combine(jalali_date.togregorian(), time.min))
+
+
+def _next_month(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _semester_of(year, month):
+    """Academic year and term of a Jalali month."""
+    if 7 <= month <= 10:
+        return year, 1
+    if month >= 11:
+        return year, 2
+    if month <= 3:
+        return year - 1, 2
+    return year - 1, 3
+
+
+def _semester_bounds(academic_year, term):
+    _, first_month, length = SEMESTERS[term]
+    year = academic_year if first_month >= 7 else academic_year + 1
+    start = jdatetime.date(year, first_month, 1)
+    month = first_month
+    for _ in range(length):
+        year, month = _next_month(year, month)
+    return start, jdatetime.date(year, month, 1)
+
+
+def month_buckets(start, end):
+    """
+    ``(key, label, start, end)`` for every Jalali month overlapping ``start``..``end``
+    (inclusive Jalali dates). Bucket bounds are half-open Jalali dates clipped to the range.
+    """
+    buckets = []
+    year, month = start.year, start.month
+    stop = end + jdatetime.timedelta(days=1)
+    while jdatetime.date(year, month, 1) < stop:
+        next_year, next_month = _next_month(year, month)
+        bucket_start = max(start, jdatetime.date(year, month, 1))
+        bucket_end = min(stop, jdatetime.date(next_year, next_month, 1))
+        label = f"{jdatetime.date.j_months_fa[month - 1]} {year}"
+        buckets.append((f"{year}-{month:02d}", label, bucket_start, bucket_end))
+        year, month = next_year, next_month
+    return buckets
+
+
+def semester_buckets(start, end):
+    buckets = []
+    stop = end + jdatetime.timedelta(days=1)
+    current = start
+    while current < stop:
+        academic_year, term = _semester_of(current.year, current.month)
+        term_start, term_end = _semester_bounds(academic_year, term)
+        buckets.append((
+            f"{academic_year}-{term}",
+            f"{SEMESTERS[term][0]} {academic_year}-{academic_year + 1}",
+            max(start, term_start),
+            min(stop, term_end),
+        ))
+        current = term_end
+    return buckets
+
+
+BUCKETERS = {
+    'month': month_buckets,
+    'semester': semester_buckets,
+}
+
+
+def bucket_expression(field, buckets):
+    """
+    CASE expression assigning each row to its bucket with plain range conditions
+    on ``field``, so the database does the grouping and can use an index on it.
+    """
+    return Case(
+        *[
+            When(Q(**{f'{field}__gte': to_aware(bucket_start), f'{field}__lt': to_aware(bucket_end)}),
+                 then=Value(key))
+            for key, _, bucket_start, bucket_end in buckets
+        ],
+        default=Value(None),
+        output_field=CharField(),
+    )
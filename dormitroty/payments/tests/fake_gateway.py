@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGatewayServer:
+    """
+    Local HTTP server speaking the ZarinPal, IDPay and Pay.ir APIs under
+    ``/zarinpal``, ``/idpay`` and ``/payir``.
+
+    ``behaviour[name]`` can be set to ``{'delay': seconds}`` to make a provider slow
+    or ``{'fail': True}`` to make it answer 500. Issued authorities are verified
+    once they appear in ``paid``; verifying them again answers "already verified"
+    where the provider has such a code.
+    """
+
+    def __init__(self):
+        self.behaviour = {}
+        self.calls = []
+        self.issued = {}
+        self.paid = set()
+        self.verified = set()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def config(self):
+        return {
+            'zarinpal': {'base_url': f"{self.url}/zarinpal", 'merchant_id': 'merchant'},
+            'idpay': {'base_url': f"{self.url}/idpay", 'api_key': 'key', 'sandbox': True},
+            'payir': {'base_url': f"{self.url}/payir", 'api_key': 'key'},
+        }
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def handle(self, gateway, action, payload):
+        self.calls.append((gateway, action))
+        behaviour = self.behaviour.get(gateway, {})
+        if behaviour.get('delay'):
+            time.sleep(behaviour['delay'])
+        if behaviour.get('fail'):
+            return 500, {'error': 'down'}
+
+        if action == 'request':
+            authority = f"{gateway}-{uuid.uuid4().hex}"
+            self.issued[authority] = payload
+            if gateway == 'zarinpal':
+                return 200, {'data': {'code': 100, 'authority': authority}, 'errors': []}
+            if gateway == 'idpay':
+                return 201, {'id': authority, 'link': f"{self.url}/idpay/p/{authority}"}
+            return 200, {'status': 1, 'token': authority}
+
+        authority = payload.get('authority') or payload.get('id') or payload.get('token')
+        ok = authority in self.paid
+        ref_id = f"ref-{authority}"
+        # repeated verifies of a paid authority answer "already verified"
+        again = ok and authority in self.verified
+        if ok:
+            self.verified.add(authority)
+        if gateway == 'zarinpal':
+            if not ok:
+                return 200, {'data': {}, 'errors': {'code': -51}}
+            return 200, {'data': {'code': 101 if again else 100, 'ref_id': ref_id}, 'errors': []}
+        if gateway == 'idpay':
+            if not ok:
+                return 406, {'error_code': 53, 'error_message': 'not paid'}
+            return 200, {'status': 101 if again else 100, 'track_id': ref_id}
+        if not ok:
+            return 422, {'status': 0, 'errorMessage': 'not paid'}
+        return 200, {'status': 1, 'transId': ref_id}
+
+    def _handler(self):
+        fake = self
+        routes = {
+            '/zarinpal/pg/v4/payment/request.json': ('zarinpal', 'request'),
+            '/zarinpal/pg/v4/payment/verify.json': ('zarinpal', 'verify'),
+            '/idpay/v1.1/payment': ('idpay', 'request'),
+            '/idpay/v1.1/payment/verify': ('idpay', 'verify'),
+            '/payir/pg/send': ('payir', 'request'),
+            '/payir/pg/verify': ('payir', 'verify'),
+        }
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                route = routes.get(self.path)
+                if route is None:
+                    self._reply(404, {})
+                    return
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                self._reply(*fake.handle(route[0], route[1], payload))
+
+            def _reply(self, code, body):
+                raw = json.dumps(body).encode('utf-8')
+                try:
+                    self.send_response(code)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(raw)))
+                    self.end_headers()
+                    self.wfile.write(raw)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,113 @@
+import csv
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from bookings.models import Booking
+from dorms.models import Dorm, Room
+from payments.models import Transaction
+
+User = get_user_model()
+
+
+class ReconcilePaymentsCommandTest(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(
+            email="student@example.com",
+            student_code="12345",
+            national_code="987654321",
+            phone_number="1234567890",
+            password="password123"
+        )
+        self.dorm = Dorm.objects.create(name="Test Dorm", location="Test Location")
+        self.room = Room.objects.create(dorm=self.dorm, room_number="101", capacity=4, floor=1, price=500000)
+        self.booking = Booking.objects.create(student=self.student, room=self.room)
+
+        def create(**kwargs):
+            return Transaction.objects.create(
+                student=self.student, booking=self.booking, gateway='zarinpal', **kwargs
+            )
+
+        self.matched = create(amount=500000, status='paid', ref_id='R1', authority='A1')
+        self.wrong_amount = create(amount=500000, status='paid', ref_id='R2', authority='A2')
+        self.not_settled = create(amount=500000, status='paid', ref_id='R3', authority='A3')
+        self.still_pending = create(amount=500000, status='pending', authority='A4')
+        self.ignored = create(amount=500000, status='failed', authority='A5')
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_settlement(self, rows):
+        path = os.path.join(self.tmpdir.name, 'settlement.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['ref_id', 'authority', 'amount'])
+            writer.writerows(rows)
+        return path
+
+    def test_reconcile_marks_transactions(self):
+        path = self.write_settlement([
+            ['R1', 'A1', 5000000],
+            ['R2', 'A2', 4000000],
+            ['', 'A4', 5000000],
+            ['R9', 'A9', 1000],
+        ])
+        report = os.path.join(self.tmpdir.name, 'report.csv')
+        out = StringIO()
+        call_command('reconcile_payments', path, '--rial', '--report', report, stdout=out)
+
+        self.assertIn("matched: 1, mismatched: 2, missing: 1, extra: 1", out.getvalue())
+        statuses = dict(Transaction.objects.values_list('id', 'reconciliation_status'))
+        self.assertEqual(statuses[self.matched.id], Transaction.Reconciliation.MATCHED)
+        self.assertEqual(statuses[self.wrong_amount.id], Transaction.Reconciliation.MISMATCH)
+        self.assertEqual(statuses[self.still_pending.id], Transaction.Reconciliation.MISMATCH)
+        self.assertEqual(statuses[self.not_settled.id], Transaction.Reconciliation.MISSING)
+        self.assertIsNone(statuses[self.ignored.id])
+
+        with open(report, encoding='utf-8') as f:
+            results = sorted(row['result'] for row in csv.DictReader(f))
+        self.assertEqual(results, ['extra', 'mismatch', 'mismatch', 'missing'])
+
+    def test_duplicate_settlement_row_is_extra(self):
+        path = self.write_settlement([['R1', 'A1', 500000], ['R1', 'A1', 500000]])
+        out = StringIO()
+        call_command('reconcile_payments', path, stdout=out)
+        self.assertIn("matched: 1, mismatched: 0, missing: 2, extra: 1", out.getvalue())
+
+    def test_dry_run_does_not_update(self):
+        path = self.write_settlement([['R1', 'A1', 500000]])
+        call_command('reconcile_payments', path, '--dry-run', stdout=StringIO())
+        self.assertFalse(Transaction.objects.filter(reconciliation_status__isnull=False).exists())
+
+    def test_date_range_limits_candidates(self):
+        path = self.write_settlement([['R1', 'A1', 500000]])
+        out = StringIO()
+        call_command('reconcile_payments', path, '--from-date', '2000-01-01', '--to-date', '2000-01-02', stdout=out)
+        self.assertIn("matched: 0, mismatched: 0, missing: 0, extra: 1", out.getvalue())
+
+    def test_decimal_amounts(self):
+        path = self.write_settlement([['R1', 'A1', '5000000.00'], ['R2', 'A2', '5000005']])
+        report = os.path.join(self.tmpdir.name, 'report.csv')
+        out = StringIO()
+        call_command('reconcile_payments', path, '--rial', '--report', report, stdout=out)
+
+        # 5000005 rial is not a whole number of toman, so it no longer rounds down to a match.
+        self.assertIn("matched: 1, mismatched: 1, missing: 1, extra: 0", out.getvalue())
+        with open(report, encoding='utf-8') as f:
+            mismatch = next(row for row in csv.DictReader(f) if row['result'] == 'mismatch')
+        self.assertEqual(mismatch['transaction_id'], str(self.wrong_amount.id))
+        self.assertEqual(mismatch['settled_amount'], '500000.5')
+
+    def test_invalid_amount(self):
+        for amount in ('abc', 'NaN', 'Infinity'):
+            path = self.write_settlement([['R1', 'A1', amount]])
+            with self.subTest(amount=amount), self.assertRaises(CommandError):
+                call_command('reconcile_payments', path, stdout=StringIO())
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            call_command('reconcile_payments', os.path.join(self.tmpdir.name, 'nope.csv'), stdout=StringIO())
@@ -0,0 +1,209 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from bookings.models import Booking
+from dorms.models import Dorm, Room
+from payments.gateways import (
+    GatewayHealth, GatewayRejected, GatewayRouter, GatewayUnavailable, IDPayGateway, get_router, health,
+)
+from payments.models import Transaction
+from payments.tests.fake_gateway import FakeGatewayServer
+
+User = get_user_model()
+
+
+class GatewayTestMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake = FakeGatewayServer().start()
+        cls.settings_override = override_settings(PAYMENT_GATEWAYS=cls.fake.config(), PAYMENT_GATEWAY_TIMEOUT=1)
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.fake.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        health.reset()
+        self.fake.behaviour.clear()
+        self.fake.calls.clear()
+        self.student = User.objects.create_user(
+            email="student@example.com",
+            student_code="12345",
+            national_code="987654321",
+            phone_number="1234567890",
+            password="password123"
+        )
+        self.dorm = Dorm.objects.create(name="Test Dorm", location="Test Location")
+        self.room = Room.objects.create(dorm=self.dorm, room_number="101", capacity=4, floor=1, price=500000)
+        self.booking = Booking.objects.create(student=self.student, room=self.room)
+        self.transaction = Transaction.objects.create(
+            student=self.student,
+            booking=self.booking,
+            amount=self.room.price,
+        )
+
+
+class GatewayHealthTest(TestCase):
+    def test_failing_gateway_is_ranked_last(self):
+        tracker = GatewayHealth(min_samples=3)
+        for _ in range(3):
+            tracker.record('zarinpal', 0.1, False)
+            tracker.record('idpay', 0.3, True)
+        self.assertEqual(tracker.rank_key('zarinpal', 5)[0], True)
+        self.assertEqual(tracker.rank_key('idpay', 5)[0], False)
+
+    def test_samples_expire_after_window(self):
+        tracker = GatewayHealth(window=0)
+        tracker.record('payir', 1.0, False)
+        self.assertEqual(tracker.stats('payir')['count'], 0)
+
+
+class GatewayRouterTest(GatewayTestMixin, TestCase):
+    def test_rejection_does_not_count_against_health(self):
+        router = get_router()
+        gateway = router.get('zarinpal')
+        with mock.patch.object(gateway, 'request_payment', side_effect=GatewayRejected("bad amount")):
+            with self.assertRaises(GatewayRejected):
+                router._call(gateway, 'request_payment', self.transaction, 'http://callback')
+        self.assertEqual(health.stats('zarinpal')['error_rate'], 0)
+
+    def test_idpay_accepts_already_verified(self):
+        gateway = IDPayGateway(self.fake.config()['idpay'], timeout=1)
+        start = gateway.request_payment(self.transaction, 'http://callback')
+        self.fake.paid.add(start.authority)
+        self.assertEqual(gateway.verify(self.transaction, start.authority), f"ref-{start.authority}")
+        self.assertEqual(gateway.verify(self.transaction, start.authority), f"ref-{start.authority}")
+
+    def test_routes_to_first_gateway_when_all_healthy(self):
+        started = get_router().start_payment(self.transaction, lambda name: f"http://testserver/{name}/")
+        self.assertEqual(started.gateway, 'zarinpal')
+        self.assertTrue(started.pay_url.endswith(started.authority))
+
+    def test_fails_over_when_gateway_is_down(self):
+        self.fake.behaviour['zarinpal'] = {'fail': True}
+        started = get_router().start_payment(self.transaction, lambda name: f"http://testserver/{name}/")
+        self.assertEqual(started.gateway, 'idpay')
+        self.assertEqual(health.stats('zarinpal')['error_rate'], 1.0)
+
+    def test_degraded_gateway_is_skipped_for_new_payments(self):
+        self.fake.behaviour['zarinpal'] = {'fail': True}
+        for _ in range(health.min_samples):
+            get_router().start_payment(self.transaction, lambda name: f"http://testserver/{name}/")
+
+        self.fake.calls.clear()
+        started = get_router().start_payment(self.transaction, lambda name: f"http://testserver/{name}/")
+        self.assertNotEqual(started.gateway, 'zarinpal')
+        self.assertEqual(self.fake.calls, [(started.gateway, 'request')])
+
+    def test_slow_gateway_times_out_and_fails_over(self):
+        self.fake.behaviour['zarinpal'] = {'delay': 1.5}
+        started = get_router().start_payment(self.transaction, lambda name: f"http://testserver/{name}/")
+        self.assertEqual(started.gateway, 'idpay')
+
+    def test_all_gateways_down(self):
+        for name in ('zarinpal', 'idpay', 'payir'):
+            self.fake.behaviour[name] = {'fail': True}
+        with self.assertRaises(GatewayUnavailable):
+            get_router().start_payment(self.transaction, lambda name: f"http://testserver/{name}/")
+
+    def test_unconfigured_gateways_are_ignored(self):
+        config = self.fake.config()
+        config['idpay']['api_key'] = None
+        with override_settings(PAYMENT_GATEWAYS=config):
+            self.assertEqual([gateway.name for gateway in get_router().gateways], ['zarinpal', 'payir'])
+
+    def test_router_with_no_gateways(self):
+        with self.assertRaises(GatewayUnavailable):
+            GatewayRouter([]).start_payment(self.transaction, lambda name: name)
+
+
+class PaymentFlowAPITest(GatewayTestMixin, APITestCase):
+    def test_start_and_verify_payment(self):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.post(f'/api/payments/{self.transaction.id}/pay/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['gateway'], 'zarinpal')
+
+        self.transaction.refresh_from_db()
+        authority = self.transaction.authority
+        self.fake.paid.add(authority)
+
+        self.client.force_authenticate(user=None)
+        response = self.client.get('/api/payments/verify/zarinpal/', {'Authority': authority, 'Status': 'OK'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.transaction.refresh_from_db()
+        self.booking.refresh_from_db()
+        self.assertEqual(self.transaction.status, Transaction.Status.PAID)
+        self.assertEqual(self.transaction.ref_id, f"ref-{authority}")
+        self.assertEqual(self.booking.status, Booking.BookingStatus.APPROVED)
+
+    def test_verify_on_failover_gateway(self):
+        self.fake.behaviour['zarinpal'] = {'fail': True}
+        self.client.force_authenticate(user=self.student)
+        response = self.client.post(f'/api/payments/{self.transaction.id}/pay/')
+        self.assertEqual(response.data['gateway'], 'idpay')
+
+        self.transaction.refresh_from_db()
+        self.fake.paid.add(self.transaction.authority)
+        response = self.client.post('/api/payments/verify/idpay/', {
+            'status': 10, 'id': self.transaction.authority, 'order_id': self.transaction.id
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unpaid_callback_marks_transaction_failed(self):
+        self.client.force_authenticate(user=self.student)
+        self.client.post(f'/api/payments/{self.transaction.id}/pay/')
+        self.transaction.refresh_from_db()
+
+        response = self.client.get('/api/payments/verify/zarinpal/', {
+            'Authority': self.transaction.authority, 'Status': 'OK'
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, Transaction.Status.FAILED)
+
+    def test_rejection_racing_a_paid_callback_keeps_it_paid(self):
+        self.client.force_authenticate(user=self.student)
+        self.client.post(f'/api/payments/{self.transaction.id}/pay/')
+        self.transaction.refresh_from_db()
+
+        def paid_meanwhile(*args):
+            Transaction.objects.filter(pk=self.transaction.pk).update(status=Transaction.Status.PAID, ref_id='ref-1')
+            raise GatewayRejected("already handled")
+
+        with mock.patch.object(GatewayRouter, 'verify', side_effect=paid_meanwhile):
+            response = self.client.get('/api/payments/verify/zarinpal/', {
+                'Authority': self.transaction.authority, 'Status': 'OK'
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, Transaction.Status.PAID)
+
+    def test_cancelled_callback(self):
+        response = self.client.get('/api/payments/verify/zarinpal/', {'Authority': 'x', 'Status': 'NOK'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_authority(self):
+        response = self.client.get('/api/payments/verify/zarinpal/', {'Authority': 'x', 'Status': 'OK'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_all_gateways_down_returns_502(self):
+        for name in ('zarinpal', 'idpay', 'payir'):
+            self.fake.behaviour[name] = {'fail': True}
+        self.client.force_authenticate(user=self.student)
+        response = self.client.post(f'/api/payments/{self.transaction.id}/pay/')
+        self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
+
+    def test_cannot_pay_paid_transaction(self):
+        self.transaction.status = Transaction.Status.PAID
+        self.transaction.save()
+        self.client.force_authenticate(user=self.student)
+        response = self.client.post(f'/api/payments/{self.transaction.id}/pay/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
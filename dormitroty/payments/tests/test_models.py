@@ -1,4 +1,7 @@
-from django.test import TestCase
+import threading
+
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
 from django.contrib.auth import get_user_model
 from dorms.models import Dorm, Room
 from bookings.models import Booking
@@ -54,3 +57,69 @@ class TransactionModelTest(TestCase):
         self.assertEqual(self.transaction.status, 'paid')
         self.assertEqual(self.transaction.ref_id, 'XYZ123456')
         self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, Booking.BookingStatus.APPROVED)
+
+    def test_mark_as_paid_is_idempotent(self):
+        self.assertTrue(self.transaction.mark_as_paid(ref_id='FIRST'))
+        duplicate = Transaction.objects.get(pk=self.transaction.pk)
+        self.assertFalse(duplicate.mark_as_paid(ref_id='SECOND'))
+        self.assertEqual(duplicate.ref_id, 'FIRST')
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.ref_id, 'FIRST')
+
+    def test_mark_as_paid_only_updates_status_columns(self):
+        Booking.objects.filter(pk=self.booking.pk).update(rejection_reason='changed elsewhere')
+        self.transaction.mark_as_paid(ref_id='XYZ')
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.rejection_reason, 'changed elsewhere')
+        self.assertEqual(self.booking.status, Booking.BookingStatus.APPROVED)
+
+    def test_only_one_pending_transaction_per_booking(self):
+        with self.assertRaises(IntegrityError):
+            Transaction.objects.create(
+                student=self.student,
+                booking=self.booking,
+                amount=self.room.price,
+                status='pending'
+            )
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class TransactionConcurrencyTest(TransactionTestCase):
+    callbacks = 8
+
+    def setUp(self):
+        student = User.objects.create_user(
+            email="testuser@gmail.com",
+            national_code='1234567890',
+            phone_number='09123456789',
+            student_code='1234',
+            password='pass'
+        )
+        dorm = Dorm.objects.create(name="خوابگاه یک", location="تهران")
+        room = Room.objects.create(dorm=dorm, room_number='101', capacity=2, floor=1, price=300000)
+        booking = Booking.objects.create(student=student, room=room)
+        self.transaction = Transaction.objects.create(student=student, booking=booking, amount=room.price)
+
+    def test_concurrent_callbacks_confirm_payment_once(self):
+        barrier = threading.Barrier(self.callbacks)
+        results = []
+
+        def callback(index):
+            try:
+                instance = Transaction.objects.get(pk=self.transaction.pk)
+                barrier.wait()
+                results.append(instance.mark_as_paid(ref_id=f'REF-{index}'))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=callback, args=(i,)) for i in range(self.callbacks)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), [False] * (self.callbacks - 1) + [True])
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.status, Transaction.Status.PAID)
+        self.assertEqual(self.transaction.booking.status, Booking.BookingStatus.APPROVED)
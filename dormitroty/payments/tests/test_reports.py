@@ -0,0 +1,30 @@
+import jdatetime
+from django.test import SimpleTestCase
+from payments.reports import month_buckets, parse_jalali_date, semester_buckets
+
+
+class JalaliBucketTest(SimpleTestCase):
+    def test_month_buckets_are_clipped_to_range(self):
+        buckets = month_buckets(jdatetime.date(1403, 11, 10), jdatetime.date(1404, 1, 3))
+        self.assertEqual([key for key, _, _, _ in buckets], ['1403-11', '1403-12', '1404-01'])
+        self.assertEqual(buckets[0][2], jdatetime.date(1403, 11, 10))
+        self.assertEqual(buckets[-1][3], jdatetime.date(1404, 1, 4))
+        self.assertEqual(buckets[1][1], 'اسفند 1403')
+
+    def test_semester_buckets_follow_academic_year(self):
+        buckets = semester_buckets(jdatetime.date(1403, 5, 10), jdatetime.date(1404, 8, 3))
+        self.assertEqual(
+            [(key, start, end) for key, _, start, end in buckets],
+            [
+                ('1402-3', jdatetime.date(1403, 5, 10), jdatetime.date(1403, 7, 1)),
+                ('1403-1', jdatetime.date(1403, 7, 1), jdatetime.date(1403, 11, 1)),
+                ('1403-2', jdatetime.date(1403, 11, 1), jdatetime.date(1404, 4, 1)),
+                ('1403-3', jdatetime.date(1404, 4, 1), jdatetime.date(1404, 7, 1)),
+                ('1404-1', jdatetime.date(1404, 7, 1), jdatetime.date(1404, 8, 4)),
+            ]
+        )
+
+    def test_parse_jalali_date(self):
+        self.assertEqual(parse_jalali_date('1403/07/01'), jdatetime.date(1403, 7, 1))
+        with self.assertRaises(ValueError):
+            parse_jalali_date('1403-12-31')
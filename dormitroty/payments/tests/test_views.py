@@ -3,15 +3,17 @@ from rest_framework import status
 from django.contrib.auth import get_user_model
 from bookings.models import Booking
 from payments.models import Transaction
+from dormitroty.testing import QueryBudgetMixin
 from django.urls import reverse
 from dorms.models import Dorm, Room, Bed
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 from django.utils import timezone
+import jdatetime
 
 User = get_user_model()
 
 
-class TransactionAPITestCase(APITestCase):
+class TransactionAPITestCase(QueryBudgetMixin, APITestCase):
     def setUp(self):
         # Create test users
         self.student = User.objects.create_user(
@@ -84,7 +86,53 @@ class TransactionAPITestCase(APITestCase):
         )
         response = self.client.get('/api/payments/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_list_transactions_cursor_pagination(self):
+        for _ in range(5):
+            Transaction.objects.create(student=self.student, booking=self.booking, amount=1, status='failed')
+        response = self.client.get('/api/payments/', {'page_size': 2})
+        ids = [item['id'] for item in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ids += [item['id'] for item in response.data['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(ids), 5)
+
+    def test_list_transactions_filters(self):
+        paid = Transaction.objects.create(student=self.student, booking=self.booking, amount=1,
+                                          status='paid', gateway='idpay')
+        old = Transaction.objects.create(student=self.student, booking=self.booking, amount=1, status='failed')
+        old.created_at = timezone.now() - timedelta(days=10)
+        old.save()
+
+        response = self.client.get('/api/payments/', {'status': 'paid'})
+        self.assertEqual([item['id'] for item in response.data['results']], [paid.id])
+        response = self.client.get('/api/payments/', {'gateway': 'idpay'})
+        self.assertEqual([item['id'] for item in response.data['results']], [paid.id])
+        response = self.client.get('/api/payments/', {
+            'to_date': (timezone.now() - timedelta(days=5)).date().isoformat()
+        })
+        self.assertEqual([item['id'] for item in response.data['results']], [old.id])
+
+        other_dorm = Dorm.objects.create(name="Other", location="Somewhere")
+        response = self.client.get('/api/payments/', {'dorm': other_dorm.id})
+        self.assertEqual(response.data['results'], [])
+        response = self.client.get('/api/payments/', {'dorm': self.dorm.id})
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_list_transactions_invalid_filter(self):
+        response = self.client.get('/api/payments/', {'from_date': '1404/01/01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_transactions_query_count_is_flat(self):
+        self.client.force_authenticate(user=self.admin)
+        for _ in range(30):
+            Transaction.objects.create(student=self.student, booking=self.booking, amount=1, status='failed')
+        # session/auth work is skipped by force_authenticate: one query for the page
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/payments/', {'page_size': 30})
+        self.assertEqual(len(response.data['results']), 30)
 
     def test_retrieve_transaction(self):
         # Test retrieving a transaction
@@ -140,7 +188,7 @@ class TransactionAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
 
-class DormitoryFinanceReportAPITest(APITestCase):
+class DormitoryFinanceReportAPITest(QueryBudgetMixin, APITestCase):
     def setUp(self):
         self.admin = User.objects.create_user(
             email="admintest@gmail.com",
@@ -203,6 +251,22 @@ class DormitoryFinanceReportAPITest(APITestCase):
         self.assertEqual(report['empty_beds'], 1)
         self.assertIn("علی", " ".join(report['students']) or " ".join(report['students']))
 
+    def test_query_count_does_not_grow_with_dorms(self):
+        for name in ("Damavand", "Sahand", "Zagros"):
+            dorm = Dorm.objects.create(name=name, location="North", gender_restriction="male")
+            room = Room.objects.create(dorm=dorm, room_number="101", capacity=1, floor=1)
+            Bed.objects.create(room=room, bed_number="1", is_occupied=True)
+            booking = Booking.objects.create(student=self.student1, room=room)
+            Transaction.objects.create(booking=booking, student=self.student1, amount=50000, status='paid')
+        self.client.force_authenticate(user=self.admin)
+        # query_budget fails the request if the report goes back to queries per dorm
+        response = self.client.get(reverse('dormitory-full-report'), {'group_by': 'month'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = {row['dorm_name']: row for row in response.json()}
+        self.assertEqual(report['Sahand']['total_income'], 50000)
+        self.assertEqual(report['Sahand']['students'], ["علی رضایی"])
+        self.assertEqual(report['Alborz']['total_income'], 300000)
+
     def test_filter_by_date_range(self):
         self.client.force_authenticate(user=self.admin)
         # tx2 رو از 2 روز پیش کنیم تا فیلتر نشه
@@ -217,3 +281,48 @@ class DormitoryFinanceReportAPITest(APITestCase):
         report = data[0]
         self.assertEqual(report['total_income'], 100000)  # فقط tx1 در بازه است
         self.assertEqual(report['total_transactions'], 1)
+
+    def test_group_by_jalali_month(self):
+        self.client.force_authenticate(user=self.admin)
+        # tx2 belongs to the previous Jalali month
+        today = jdatetime.date.today()
+        month_start = jdatetime.date(today.year, today.month, 1)
+        previous = month_start - jdatetime.timedelta(days=1)
+        self.tx2.created_at = timezone.make_aware(datetime.combine(previous.togregorian(), time.min))
+        self.tx2.save()
+
+        url = reverse('dormitory-full-report')
+        response = self.client.get(url, {
+            'group_by': 'month',
+            'from_jdate': jdatetime.date(previous.year, previous.month, 1).strftime('%Y/%m/%d'),
+            'to_jdate': today.strftime('%Y/%m/%d'),
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        report = response.json()[0]
+        self.assertEqual(report['total_income'], 300000)
+        self.assertEqual(
+            [(p['period'], p['total_income'], p['total_transactions']) for p in report['periods']],
+            [
+                (f"{previous.year}-{previous.month:02d}", 200000, 1),
+                (f"{today.year}-{today.month:02d}", 100000, 1),
+            ]
+        )
+
+    def test_group_by_semester(self):
+        self.client.force_authenticate(user=self.admin)
+        url = reverse('dormitory-full-report')
+        response = self.client.get(url, {'group_by': 'semester'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        periods = response.json()[0]['periods']
+        self.assertEqual(sum(p['total_income'] for p in periods), 300000)
+
+    def test_invalid_jalali_params(self):
+        self.client.force_authenticate(user=self.admin)
+        url = reverse('dormitory-full-report')
+        self.assertEqual(self.client.get(url, {'group_by': 'week'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'from_jdate': '1403-13-01'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {
+            'group_by': 'month', 'from_jdate': '1300-01-01', 'to_jdate': '1404-01-01'
+        }).status_code, status.HTTP_400_BAD_REQUEST)
@@ -4,8 +4,8 @@ from .views import (
     TransactionListAPIView,
     TransactionRetrieveAPIView,
     TransactionDeleteAPIView,
-    # StartZarinpalPaymentAPIView,
-    # ZarinpalVerifyAPIView
+    StartPaymentAPIView,
+    VerifyPaymentAPIView,
     DormitoryFullFinanceReportAPIView
 )
 
@@ -15,10 +15,10 @@ urlpatterns = [
     path('<str:pk>/', TransactionRetrieveAPIView.as_view(), name='detail-transaction'),
     path('<str:pk>/delete/', TransactionDeleteAPIView.as_view(), name='delete-transaction'),
 ]
-"""urlpatterns += [
-    path('<int:transaction_id>/pay/', StartZarinpalPaymentAPIView.as_view(), name='start-payment'),
-    path('verify/', ZarinpalVerifyAPIView.as_view(), name='verify-payment'),
-]"""
+urlpatterns += [
+    path('<int:transaction_id>/pay/', StartPaymentAPIView.as_view(), name='start-payment'),
+    path('verify/<str:gateway>/', VerifyPaymentAPIView.as_view(), name='verify-payment'),
+]
 
 urlpatterns += [
     path('admin/full-report/', DormitoryFullFinanceReportAPIView.as_view(), name='dormitory-full-report'),
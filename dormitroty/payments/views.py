@@ -5,13 +5,26 @@ from rest_framework.exceptions import ValidationError, PermissionDenied, NotFoun
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
 from .models import Transaction
 from .serializers import TransactionSerializer
+from .gateways import GatewayError, GatewayRejected, get_router
+from .pagination import TransactionCursorPagination
+from .reports import BUCKETERS, MAX_BUCKETS, bucket_expression, parse_jalali_date, to_aware
 from bookings.models import Booking
-"""from zeep import Client
-from django.conf import settings
-from django.shortcuts import get_object_or_404"""
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from rest_framework.permissions import IsAdminUser
-from dorms.models import Dorm, Bed
+from dorms.models import Dorm, Room, Bed
+from django.db import IntegrityError, transaction as db_transaction
 from django.db.models import Sum, Count, Q
+from django.utils import timezone
+from datetime import datetime, timedelta
+import jdatetime
+
+
+def parse_day(value, field):
+    try:
+        return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+    except ValueError:
+        raise ValidationError({field: "تاریخ باید به شکل YYYY-MM-DD باشد."})
 
 
 @extend_schema(
@@ -45,32 +58,69 @@ class CreateTransactionAPIView(generics.CreateAPIView):
 
         amount = booking.room.price
 
-        transaction = Transaction.objects.create(
-            student=request.user,
-            booking=booking,
-            amount=amount,
-            status='pending'
-        )
+        try:
+            # A concurrent request may win the race past the check above;
+            # the partial unique index on pending transactions rejects the loser.
+            with db_transaction.atomic():
+                transaction = Transaction.objects.create(
+                    student=request.user,
+                    booking=booking,
+                    amount=amount,
+                    status='pending'
+                )
+        except IntegrityError:
+            raise ValidationError("شما قبلاً یک تراکنش معلق برای این رزرو ایجاد کرده‌اید.")
         serializer = self.get_serializer(transaction)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+@extend_schema(
+    summary="لیست تراکنش‌ها",
+    description="لیست صفحه‌بندی‌شده (cursor) تراکنش‌ها به ترتیب جدیدترین.",
+    parameters=[
+        OpenApiParameter(name='status', required=False, type=str, description='وضعیت تراکنش'),
+        OpenApiParameter(name='gateway', required=False, type=str, description='درگاه پرداخت'),
+        OpenApiParameter(name='from_date', required=False, type=str, description='تاریخ شروع YYYY-MM-DD'),
+        OpenApiParameter(name='to_date', required=False, type=str, description='تاریخ پایان YYYY-MM-DD'),
+        OpenApiParameter(name='dorm', required=False, type=int, description='شناسه خوابگاه'),
+    ],
+    responses={
+        200: OpenApiResponse(TransactionSerializer(many=True)),
+        400: OpenApiResponse(description="پارامتر نامعتبر"),
+        401: OpenApiResponse(description="احراز هویت نشده")
+    }
+)
 class TransactionListAPIView(generics.ListAPIView):
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TransactionCursorPagination
+    # the page, plus the user when the JWT user cache misses
+    query_budget = 2
+    read_replica = True
 
-    @extend_schema(
-        summary="لیست تراکنش‌ها",
-        responses={
-            200: OpenApiResponse(TransactionSerializer(many=True)),
-            401: OpenApiResponse(description="احراز هویت نشده")
-        }
-    )
     def get_queryset(self):
         user = self.request.user
-        if user.is_staff or user.is_superuser:
-            return Transaction.objects.all().order_by('-created_at')
-        return Transaction.objects.filter(student=user).order_by('-created_at')
+        params = self.request.query_params
+        transactions = Transaction.objects.all()
+        if not (user.is_staff or user.is_superuser):
+            transactions = transactions.filter(student=user)
+
+        if params.get('status'):
+            transactions = transactions.filter(status=params['status'])
+        if params.get('gateway'):
+            transactions = transactions.filter(gateway=params['gateway'])
+        if params.get('from_date'):
+            transactions = transactions.filter(created_at__gte=parse_day(params['from_date'], 'from_date'))
+        if params.get('to_date'):
+            transactions = transactions.filter(
+                created_at__lt=parse_day(params['to_date'], 'to_date') + timedelta(days=1))
+        if params.get('dorm'):
+            if not params['dorm'].isdigit():
+                raise ValidationError({"dorm": "شناسه خوابگاه نامعتبر است."})
+            transactions = transactions.filter(booking__room__dorm_id=params['dorm'])
+
+        # Ordering comes from the cursor paginator: (-created_at, -id), served by the Meta indexes.
+        return transactions
 
 
 class TransactionRetrieveAPIView(generics.RetrieveAPIView):
@@ -125,87 +175,108 @@ class TransactionDeleteAPIView(generics.DestroyAPIView):
         return transaction
 
 
-"""
 @extend_schema(
-    summary="ساخت لینک پرداخت زرین‌پال",
-    description="این API یک تراکنش را به درگاه زرین‌پال می‌فرستد و لینک پرداخت ایجاد می‌کند.",
+    summary="ساخت لینک پرداخت",
+    description="تراکنش به سالم‌ترین درگاه فعال ارسال می‌شود و در صورت خطا درگاه بعدی امتحان می‌شود.",
+    request=None,
     responses={
         200: OpenApiResponse(
             description="لینک پرداخت با موفقیت ایجاد شد. کاربر باید به آن هدایت شود.",
             examples=[
-                {"pay_url": "https://sandbox.zarinpal.com/pg/StartPay/A0000000000000000000000001"}
+                {"gateway": "zarinpal", "pay_url": "https://payment.zarinpal.com/pg/StartPay/A0000000000000000000000001"}
             ]
         ),
         400: OpenApiResponse(description="تراکنش معتبر یا در وضعیت قابل پرداخت نبود."),
-        403: OpenApiResponse(description="دسترسی غیرمجاز به تراکنش"),
+        404: OpenApiResponse(description="تراکنش یافت نشد"),
+        502: OpenApiResponse(description="هیچ درگاهی در دسترس نیست"),
     }
 )
-class StartZarinpalPaymentAPIView(APIView):
+class StartPaymentAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, transaction_id):
         transaction = get_object_or_404(Transaction, id=transaction_id, student=request.user)
 
-        if transaction.status != 'pending':
+        if transaction.status != Transaction.Status.PENDING:
             return Response({"error": "این تراکنش قبلاً پرداخت شده یا معتبر نیست."},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        client = Client('https://sandbox.zarinpal.com/pg/services/WebGate/wsdl')
-        result = client.service.PaymentRequest(
-            MerchantID=settings.ZARINPAL_MERCHANT_ID,
-            Amount=transaction.amount,
-            Description=f"پرداخت رزرو شماره {transaction.booking.id}",
-            CallbackURL=settings.ZARINPAL_CALLBACK_URL
-        )
-
-        if result.Status == 100:
-            pay_url = f"https://sandbox.zarinpal.com/pg/StartPay/{result.Authority}"
-            return Response({"pay_url": pay_url})
-        else:
+        router = get_router()
+        try:
+            started = router.start_payment(
+                transaction,
+                lambda gateway: request.build_absolute_uri(reverse('verify-payment', args=[gateway]))
+            )
+        except GatewayError:
             return Response({"error": "خطا در برقراری ارتباط با درگاه پرداخت"},
                             status=status.HTTP_502_BAD_GATEWAY)
 
+        transaction.gateway = started.gateway
+        transaction.authority = started.authority
+        transaction.save(update_fields=['gateway', 'authority'])
+        return Response({"gateway": started.gateway, "pay_url": started.pay_url})
+
 
 @extend_schema(
     summary="تأیید وضعیت پرداخت پس از بازگشت از درگاه",
-    description="این endpoint توسط مرورگر کاربر فراخوانی می‌شود پس از پرداخت. اطلاعات از زرین‌پال دریافت و وضعیت تراکنش به روز می‌شود.",
+    description="این endpoint پس از پرداخت توسط مرورگر کاربر (یا درگاه) فراخوانی می‌شود و وضعیت تراکنش را به روز می‌کند.",
     parameters=[
-        OpenApiParameter(name='Authority', type=str, required=True, description='کد Authority دریافتی از درگاه'),
-        OpenApiParameter(name='Status', type=str, required=True, description='وضعیت پرداخت (باید OK باشد)'),
+        OpenApiParameter(name='gateway', type=str, location=OpenApiParameter.PATH,
+                         description='نام درگاه (zarinpal, idpay, payir)'),
     ],
+    request=None,
     responses={
         200: OpenApiResponse(description="پرداخت با موفقیت تأیید شد."),
         400: OpenApiResponse(description="پرداخت لغو شده یا معتبر نیست."),
         404: OpenApiResponse(description="تراکنش یافت نشد یا معتبر نیست."),
+        502: OpenApiResponse(description="درگاه در دسترس نیست"),
     }
 )
-class ZarinpalVerifyAPIView(APIView):
-    def get(self, request):
-        authority = request.GET.get('Authority')
-        status_param = request.GET.get('Status')
+class VerifyPaymentAPIView(APIView):
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def get(self, request, gateway):
+        return self.verify(request, gateway, request.query_params)
+
+    def post(self, request, gateway):
+        return self.verify(request, gateway, request.data)
 
-        if not authority or status_param != 'OK':
+    def verify(self, request, gateway, params):
+        router = get_router()
+        adapter = router.get(gateway)
+        if adapter is None:
+            return Response({'detail': 'درگاه نامعتبر است.'}, status=status.HTTP_404_NOT_FOUND)
+
+        authority = adapter.parse_callback(params)
+        if not authority:
             return Response({'detail': 'پرداخت لغو یا ناقص بود.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        transaction = Transaction.objects.filter(status='pending').order_by('-created_at').first()
+        transaction = Transaction.objects.filter(gateway=gateway, authority=authority).first()
         if not transaction:
             return Response({'detail': 'تراکنش معتبر یافت نشد.'}, status=status.HTTP_404_NOT_FOUND)
 
-        client = Client('https://sandbox.zarinpal.com/pg/services/WebGate/wsdl')
-        result = client.service.PaymentVerification(
-            MerchantID=settings.ZARINPAL_MERCHANT_ID,
-            Authority=authority,
-            Amount=transaction.amount
-        )
+        if transaction.status == Transaction.Status.PAID:
+            return Response({'detail': 'پرداخت با موفقیت انجام شد.', 'ref_id': transaction.ref_id})
 
-        if result.Status == 100:
-            transaction.mark_as_paid(ref_id=result.RefID)
+        try:
+            ref_id = router.verify(gateway, transaction, authority)
+        except GatewayRejected:
+            # Only from pending: a duplicate callback may be racing the one that marked it paid.
+            failed = Transaction.objects.filter(pk=transaction.pk, status=Transaction.Status.PENDING).update(
+                status=Transaction.Status.FAILED
+            )
+            if not failed:
+                transaction.refresh_from_db(fields=['status', 'ref_id'])
+                if transaction.status == Transaction.Status.PAID:
+                    return Response({'detail': 'پرداخت با موفقیت انجام شد.', 'ref_id': transaction.ref_id})
+            return Response({'detail': 'پرداخت تأیید نشد.'}, status=status.HTTP_400_BAD_REQUEST)
+        except GatewayError:
+            return Response({'detail': 'خطا در برقراری ارتباط با درگاه پرداخت'},
+                            status=status.HTTP_502_BAD_GATEWAY)
 
-            return Response({'detail': 'پرداخت با موفقیت انجام شد.', 'ref_id': result.RefID})
-        else:
-            return Response({'detail': 'پرداخت تأیید نشد.', 'status_code': result.Status},
-                            status=status.HTTP_400_BAD_REQUEST)
-"""
+        transaction.mark_as_paid(ref_id=ref_id)
+        return Response({'detail': 'پرداخت با موفقیت انجام شد.', 'ref_id': ref_id})
 
 
 @extend_schema(
@@ -214,57 +285,112 @@ class ZarinpalVerifyAPIView(APIView):
     parameters=[
         OpenApiParameter(name='from_date', required=False, type=str, description='تاریخ شروع YYYY-MM-DD'),
         OpenApiParameter(name='to_date', required=False, type=str, description='تاریخ پایان YYYY-MM-DD'),
+        OpenApiParameter(name='from_jdate', required=False, type=str, description='تاریخ شمسی شروع YYYY-MM-DD'),
+        OpenApiParameter(name='to_jdate', required=False, type=str, description='تاریخ شمسی پایان YYYY-MM-DD'),
+        OpenApiParameter(name='group_by', required=False, type=str, enum=list(BUCKETERS),
+                         description='گروه‌بندی درآمد بر اساس ماه یا نیمسال شمسی'),
     ],
     responses={
-        200: OpenApiResponse(description="گزارش کامل هر خوابگاه")
+        200: OpenApiResponse(description="گزارش کامل هر خوابگاه"),
+        400: OpenApiResponse(description="پارامتر نامعتبر"),
     }
 )
 class DormitoryFullFinanceReportAPIView(APIView):
     permission_classes = [IsAdminUser]
+    read_replica = True
+    # dorms, income, students, rooms, beds and the periods, plus the user when the JWT user cache misses
+    query_budget = 7
 
     def get(self, request):
         from_date = request.query_params.get('from_date')
         to_date = request.query_params.get('to_date')
+        from_jdate = request.query_params.get('from_jdate')
+        to_jdate = request.query_params.get('to_jdate')
+        group_by = request.query_params.get('group_by')
 
-        dorms = Dorm.objects.all()
-        result = []
-
-        for dorm in dorms:
-            transactions = Transaction.objects.filter(
-                status='paid',
-                booking__room__dorm=dorm
+        if group_by and group_by not in BUCKETERS:
+            raise ValidationError({"group_by": "مقدار مجاز: month یا semester"})
+        try:
+            from_jdate = parse_jalali_date(from_jdate) if from_jdate else None
+            to_jdate = parse_jalali_date(to_jdate) if to_jdate else None
+        except ValueError:
+            raise ValidationError("تاریخ شمسی باید به شکل YYYY-MM-DD باشد.")
+
+        paid = Transaction.objects.filter(status='paid')
+        if from_date:
+            paid = paid.filter(created_at__gte=from_date)
+        if to_date:
+            paid = paid.filter(created_at__lte=to_date)
+        if from_jdate:
+            paid = paid.filter(created_at__gte=to_aware(from_jdate))
+        if to_jdate:
+            paid = paid.filter(created_at__lt=to_aware(to_jdate + jdatetime.timedelta(days=1)))
+
+        periods = {}
+        if group_by:
+            today = jdatetime.date.today()
+            buckets = BUCKETERS[group_by](
+                from_jdate or jdatetime.date(today.year, 1, 1),
+                to_jdate or today,
             )
-
-            if from_date:
-                transactions = transactions.filter(created_at__gte=from_date)
-            if to_date:
-                transactions = transactions.filter(created_at__lte=to_date)
-
-            total_income = transactions.aggregate(total=Sum('amount'))['total'] or 0
-            total_transactions = transactions.count()
-
-            student_names = list(
-                transactions.values_list('student__first_name', 'student__last_name')
-                .distinct()
+            if not buckets or len(buckets) > MAX_BUCKETS:
+                raise ValidationError("بازه زمانی برای گروه‌بندی نامعتبر یا بیش از حد طولانی است.")
+            first_bucket, last_bucket = buckets[0], buckets[-1]
+            grouped = (
+                paid.filter(created_at__gte=to_aware(first_bucket[2]), created_at__lt=to_aware(last_bucket[3]))
+                .annotate(period=bucket_expression('created_at', buckets))
+                .values('booking__room__dorm', 'period')
+                .annotate(total_income=Sum('amount'), total_transactions=Count('id'))
             )
-            students = [f"{f} {l}" for f, l in student_names]
-
-            total_rooms = dorm.rooms.count()
-            total_capacity = dorm.rooms.aggregate(capacity=Sum('capacity'))['capacity'] or 0
-            total_beds = Bed.objects.filter(room__dorm=dorm).count()
-            used_beds = Bed.objects.filter(room__dorm=dorm, is_occupied=True).count()
-            empty_beds = total_beds - used_beds
+            for row in grouped:
+                periods[(row['booking__room__dorm'], row['period'])] = row
+
+        # One grouped query per figure rather than a handful per dorm.
+        income = {
+            row['booking__room__dorm']: row for row in
+            paid.order_by().values('booking__room__dorm')
+            .annotate(total_income=Sum('amount'), total_transactions=Count('id'))
+        }
+        students = {}
+        for dorm_id, first_name, last_name in (
+            paid.order_by().values_list('booking__room__dorm', 'student__first_name', 'student__last_name').distinct()
+        ):
+            students.setdefault(dorm_id, []).append(f"{first_name} {last_name}")
+        rooms = {
+            row['dorm']: row for row in
+            Room.objects.order_by().values('dorm').annotate(total_rooms=Count('id'), total_capacity=Sum('capacity'))
+        }
+        beds = {
+            row['room__dorm']: row for row in
+            Bed.objects.order_by().values('room__dorm')
+            .annotate(total_beds=Count('id'), used_beds=Count('id', filter=Q(is_occupied=True)))
+        }
 
+        result = []
+        for dorm in Dorm.objects.all():
+            dorm_beds = beds.get(dorm.id, {})
+            total_beds = dorm_beds.get('total_beds', 0)
+            used_beds = dorm_beds.get('used_beds', 0)
             result.append({
                 'dorm_name': dorm.name,
-                'total_income': total_income,
-                'total_transactions': total_transactions,
-                'students': students,
-                'total_rooms': total_rooms,
-                'total_capacity': total_capacity,
+                'total_income': income.get(dorm.id, {}).get('total_income') or 0,
+                'total_transactions': income.get(dorm.id, {}).get('total_transactions', 0),
+                'students': students.get(dorm.id, []),
+                'total_rooms': rooms.get(dorm.id, {}).get('total_rooms', 0),
+                'total_capacity': rooms.get(dorm.id, {}).get('total_capacity') or 0,
                 'total_beds': total_beds,
                 'used_beds': used_beds,
-                'empty_beds': empty_beds,
+                'empty_beds': total_beds - used_beds,
             })
+            if group_by:
+                result[-1]['periods'] = [
+                    {
+                        'period': key,
+                        'label': label,
+                        'total_income': periods.get((dorm.id, key), {}).get('total_income', 0),
+                        'total_transactions': periods.get((dorm.id, key), {}).get('total_transactions', 0),
+                    }
+                    for key, label, _, _ in buckets
+                ]
 
         return Response(result, status=status.HTTP_200_OK)
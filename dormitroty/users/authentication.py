@@ -0,0 +1,119 @@
+"""
+JWT authentication backed by a per-process user cache.
+
+simplejwt's JWTAuthentication loads the user with a query on every request. Here
+users are kept in a small LRU cache with a TTL, so a student hammering the API
+within a minute is authenticated without touching the database. A user's save or
+delete evicts them from the cache of the process that made it and bumps their
+version in the shared Django cache; every process compares a cached user's
+version on each hit, one cache lookup instead of a query, so a deactivated user
+or a changed password stops authenticating everywhere at once. With a
+per-process Django cache other processes only notice after ``AUTH_USER_CACHE_TTL``.
+"""
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from dormitroty.instrumentation import cache_stats
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def _version_key(user_id):
+    return f'jwt-user-version:{user_id}'
+
+
+class UserCache:
+    def __init__(self):
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version(self, user_id):
+        """The user's current version; read it before loading the user, and pass it to set()."""
+        return cache.get(_version_key(user_id))
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                cache_stats.miss('jwt_user')
+                return None
+            user, expires, version = entry
+            if expires < time.monotonic():
+                del self._users[user_id]
+                cache_stats.miss('jwt_user')
+                return None
+            self._users.move_to_end(user_id)
+        if self.version(user_id) != version:
+            # Saved or deleted in another process since it was cached here.
+            with self._lock:
+                if self._users.get(user_id) is entry:
+                    del self._users[user_id]
+            cache_stats.miss('jwt_user')
+            return None
+        cache_stats.hit('jwt_user')
+        # Views may modify request.user; each request gets its own copy.
+        return copy.copy(user)
+
+    def set(self, user_id, user, version=None):
+        if settings.AUTH_USER_CACHE_TTL <= 0:
+            return
+        with self._lock:
+            self._users[user_id] = (copy.copy(user), time.monotonic() + settings.AUTH_USER_CACHE_TTL, version)
+            self._users.move_to_end(user_id)
+            while len(self._users) > settings.AUTH_USER_CACHE_SIZE:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+        # Entries cached before this expire within the TTL, so the new version needs to outlive only them;
+        # once it expires, the None read back still differs from what entries cached since hold.
+        cache.set(_version_key(user_id), uuid.uuid4().hex, settings.AUTH_USER_CACHE_TTL or None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+    def __len__(self):
+        return len(self._users)
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = str(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id)
+        if user is None:
+            # Read first: an invalidation racing the load then leaves this entry stale-versioned.
+            version = user_cache.version(user_id)
+            # Loads the user and runs the active and revoked-token checks.
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user, version)
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    target_class = CachedJWTAuthentication
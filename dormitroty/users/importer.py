@@ -0,0 +1,160 @@
+"""
+Bulk import of students from CSV.
+
+Rows are validated one by one, checked for duplicates against the file and the
+database once per batch, and inserted with ``bulk_create``. Password hashing is
+what dominates an import of tens of thousands of rows, so it runs in a process
+pool; everything touching the database stays in the calling process. The
+management command starts a pool per run, the web process shares one
+(``shared_executor``) across requests rather than spawning workers per upload.
+"""
+import csv
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Q
+
+from dormitroty.persian import normalize
+
+from .models import User
+from .passwords import hash_password, init_worker
+from .serializers import StudentImportSerializer
+
+COLUMNS = StudentImportSerializer.Meta.fields
+REQUIRED_COLUMNS = ('student_code', 'national_code', 'phone_number')
+UNIQUE_FIELDS = ('student_code', 'national_code', 'phone_number')
+
+
+class ImportFileError(Exception):
+    pass
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.errors.append({'line': line, 'errors': errors})
+
+
+def _executor(workers):
+    if workers <= 1:
+        return None
+    # spawn, not fork: the parent holds open database connections.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=init_worker)
+
+
+@lru_cache(maxsize=None)
+def shared_executor(workers):
+    """A pool of ``workers`` processes kept for the life of the process, or None for 1."""
+    return _executor(workers)
+
+
+def _unique_error(field):
+    return User(**{field: ''}).unique_error_message(User, (field,)).messages
+
+
+def import_students(file, batch_size=1000, workers=None, dry_run=False, executor=None):
+    """
+    Import students from the CSV text stream ``file``, whose header names the
+    columns in ``COLUMNS``. Returns an ImportResult; a row with errors is skipped
+    and reported with its line number, the other rows are still imported.
+
+    Passwords are hashed in ``executor`` when given, which is left running,
+    else in a pool of ``workers`` processes started for this import.
+    """
+    reader = csv.DictReader(file)
+    missing = set(REQUIRED_COLUMNS) - set(reader.fieldnames or ())
+    if missing:
+        raise ImportFileError(f"Missing columns: {', '.join(sorted(missing))}")
+
+    result = ImportResult()
+    seen = {field: set() for field in UNIQUE_FIELDS}
+    workers = os.cpu_count() if workers is None else workers
+    own_executor = executor is None and not dry_run
+    if own_executor:
+        executor = _executor(workers)
+    try:
+        batch = []
+        for row in reader:
+            line = reader.line_num
+            data = {key: value.strip() for key, value in row.items()
+                    if key in COLUMNS and value and value.strip()}
+            serializer = StudentImportSerializer(data=data)
+            if not serializer.is_valid():
+                result.add_error(line, serializer.errors)
+                continue
+            data = serializer.validated_data
+            duplicate = [field for field in UNIQUE_FIELDS if data[field] in seen[field]]
+            if duplicate:
+                result.add_error(line, {field: ["Duplicate value in this file."] for field in duplicate})
+                continue
+            for field in UNIQUE_FIELDS:
+                seen[field].add(data[field])
+            batch.append((line, data))
+            if len(batch) >= batch_size:
+                _import_batch(batch, result, executor, dry_run)
+                batch = []
+        if batch:
+            _import_batch(batch, result, executor, dry_run)
+    finally:
+        if own_executor and executor:
+            executor.shutdown()
+    result.errors.sort(key=lambda error: error['line'])
+    return result
+
+
+def _import_batch(batch, result, executor, dry_run):
+    # One query for the whole batch instead of three per row.
+    condition = Q()
+    for field in UNIQUE_FIELDS:
+        condition |= Q(**{f'{field}__in': [data[field] for _, data in batch]})
+    existing = {field: set() for field in UNIQUE_FIELDS}
+    for values in User.objects.filter(condition).values_list(*UNIQUE_FIELDS):
+        for field, value in zip(UNIQUE_FIELDS, values):
+            existing[field].add(value)
+
+    rows = []
+    for line, data in batch:
+        taken = [field for field in UNIQUE_FIELDS if data[field] in existing[field]]
+        if taken:
+            result.add_error(line, {field: _unique_error(field) for field in taken})
+        else:
+            rows.append((line, data))
+    if dry_run:
+        result.created += len(rows)
+        return
+
+    passwords = [data.get('password', '') for _, data in rows]
+    if executor:
+        hashes = list(executor.map(hash_password, passwords, chunksize=64))
+    else:
+        hashes = [hash_password(password) for password in passwords]
+
+    users = []
+    for (line, data), password in zip(rows, hashes):
+        user = User(**{**data, 'password': password})
+        user.email = User.objects.normalize_email(user.email)
+        # bulk_create skips save(), which normally fills search_name.
+        user.search_name = normalize(f'{user.first_name} {user.last_name}')
+        users.append((line, user))
+
+    db = router.db_for_write(User)
+    try:
+        with transaction.atomic(using=db):
+            User.objects.using(db).bulk_create([user for _, user in users])
+        result.created += len(users)
+    except IntegrityError:
+        # Someone else inserted a conflicting user since the check; find the rows one by one.
+        for line, user in users:
+            try:
+                with transaction.atomic(using=db):
+                    user.save(using=db, force_insert=True)
+                result.created += 1
+            except IntegrityError:
+                result.add_error(line, {'non_field_errors': ["A user with these codes already exists."]})
@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.importer import ImportFileError, import_students
+
+
+class Command(BaseCommand):
+    help = ("Create students from a CSV file with the columns student_code, national_code, phone_number "
+            "and optionally first_name, last_name, email, gender and password.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Processes hashing passwords; defaults to the number of CPUs, 1 hashes inline")
+        parser.add_argument('--dry-run', action='store_true', help="Only validate the file")
+        parser.add_argument('--report', help="Write the per-row errors to this file as JSON")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as f:
+                result = import_students(f, batch_size=options['batch_size'], workers=options['workers'],
+                                         dry_run=options['dry_run'])
+        except (OSError, UnicodeDecodeError, ImportFileError) as e:
+            raise CommandError(e)
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as f:
+                json.dump(result.errors, f, ensure_ascii=False, indent=2)
+        else:
+            for error in result.errors:
+                self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+
+        verb = "would import" if options['dry_run'] else "imported"
+        self.stdout.write(f"{verb} {result.created} students, {len(result.errors)} rows with errors")
@@ -0,0 +1,69 @@
+# Generated by Django 5.2 on 2026-10-19 16:00
+
+from django.db import migrations, models
+
+from dormitroty.persian import normalize
+
+PREFIX_COLUMNS = ['student_code', 'national_code', 'phone_number']
+
+
+def backfill_search_name(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    batch = []
+    for user in User.objects.only('first_name', 'last_name').iterator(chunk_size=2000):
+        user.search_name = normalize(f'{user.first_name} {user.last_name}')
+        batch.append(user)
+        if len(batch) == 2000:
+            User.objects.bulk_update(batch, ['search_name'])
+            batch = []
+    User.objects.bulk_update(batch, ['search_name'])
+
+
+def create_search_indexes(apps, schema_editor):
+    # PostgreSQL only: the unique indexes on these columns cannot serve LIKE 'x%'
+    # outside the C locale, and name matching is LIKE '%x%'.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in PREFIX_COLUMNS:
+        schema_editor.execute(
+            f"CREATE INDEX users_user_{column}_prefix_idx ON users_user ({column} varchar_pattern_ops)"
+        )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        has_trigram = cursor.fetchone() is not None
+    if has_trigram:
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX users_user_search_name_trgm_idx ON users_user USING gin (search_name gin_trgm_ops)"
+        )
+    else:
+        # Without pg_trgm only name prefixes can use an index.
+        schema_editor.execute(
+            "CREATE INDEX users_user_search_name_prefix_idx ON users_user (search_name varchar_pattern_ops)"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in PREFIX_COLUMNS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS users_user_{column}_prefix_idx")
+    schema_editor.execute("DROP INDEX IF EXISTS users_user_search_name_trgm_idx")
+    schema_editor.execute("DROP INDEX IF EXISTS users_user_search_name_prefix_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_alter_user_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='search_name',
+            field=models.CharField(blank=True, default='', editable=False, max_length=61),
+        ),
+        migrations.RunPython(backfill_search_name, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.core.validators import MinLengthValidator
+from dormitroty.persian import normalize
 from . import managers
 from uuid import uuid4
 
@@ -22,9 +23,18 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_admin = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+    # normalize(first_name + last_name), kept by save() for the user search endpoint
+    search_name = models.CharField(max_length=61, blank=True, default='', editable=False)
     USERNAME_FIELD = 'student_code'
     REQUIRED_FIELDS = ['national_code', 'phone_number', 'gender']
     objects = managers.UserManager()
 
     def __str__(self):
         return f'{self.student_code} - {self.national_code}'
+
+    def save(self, *args, **kwargs):
+        self.search_name = normalize(f'{self.first_name} {self.last_name}')
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'first_name', 'last_name'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_name'}
+        super().save(*args, **kwargs)
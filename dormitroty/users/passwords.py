@@ -0,0 +1,15 @@
+"""
+Password hashing for ``users.importer``'s process pool. Kept apart from modules
+importing models: spawned workers unpickle these functions before Django is set up.
+"""
+import django
+from django.contrib.auth.hashers import make_password
+
+
+def init_worker():
+    django.setup()
+
+
+def hash_password(password):
+    # An empty password gets an unusable hash, as in UserManager.create_user.
+    return make_password(password or None)
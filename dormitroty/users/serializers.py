@@ -1,5 +1,8 @@
+from django.core.validators import MinLengthValidator
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from .models import User
+from .tokens import RefreshToken
 
 
 class UserRegisterSerializer(serializers.ModelSerializer):
@@ -22,11 +25,9 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        password = validated_data.pop('password')
         user_permissions = validated_data.pop('user_permissions', None)
+        # create_user hashes the password and saves once.
         user = User.objects.create_user(**validated_data)
-        user.set_password(password)
-        user.save()
         if user_permissions:
             user.user_permissions.set(user_permissions)
 
@@ -42,3 +43,47 @@ class UserRegisterSerializer(serializers.ModelSerializer):
             instance.user_permissions.set(user_permissions)
 
         return super().update(instance, validated_data)
+
+
+class UserListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('id', 'student_code', 'first_name', 'last_name', 'national_code', 'phone_number', 'gender')
+        read_only_fields = fields
+
+
+class StudentImportSerializer(UserRegisterSerializer):
+    """
+    Validates one CSV row of ``users.importer``. Uniqueness is checked by the
+    importer for the whole file at once instead of with a query per field per row.
+    """
+    class Meta:
+        model = User
+        fields = ('student_code', 'national_code', 'phone_number', 'first_name', 'last_name', 'email',
+                  'gender', 'password')
+        extra_kwargs = {
+            'student_code': {'validators': []},
+            'national_code': {'validators': [MinLengthValidator(10)]},
+            'phone_number': {'validators': [MinLengthValidator(10)]},
+            'password': {'required': False, 'allow_blank': True},
+        }
+
+
+class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Adds the claims clients and permission checks need to the refresh token; the
+    access tokens made from it copy them.
+    """
+    token_class = RefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['gender'] = user.gender
+        token['is_staff'] = user.is_staff
+        token['is_admin'] = user.is_admin
+        return token
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RefreshToken
@@ -0,0 +1,25 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(str(instance.pk))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def evict_user_with_changed_permissions(sender, instance, reverse, pk_set, **kwargs):
+    if not reverse:
+        user_cache.invalidate(str(instance.pk))
+    elif kwargs['action'] == 'pre_clear':
+        # Clearing a group's or permission's users gives no pk_set after the fact.
+        for user_id in instance.user_set.values_list('pk', flat=True):
+            user_cache.invalidate(str(user_id))
+    elif pk_set:
+        for user_id in pk_set:
+            user_cache.invalidate(str(user_id))
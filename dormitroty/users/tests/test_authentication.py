@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from users.authentication import UserCache, user_cache
+from users.models import User
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        user_cache.clear()
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            student_code="123456",
+            national_code='9876543210',
+            phone_number='09123456789',
+            gender='female',
+            password="testpassword123"
+        )
+        response = self.client.post('/api/users/token/', {"student_code": "123456", "password": "testpassword123"})
+        self.access = response.data['access']
+        self.url = f'/api/users/details/{self.user.id}/'
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+
+    def test_token_claims(self):
+        token = AccessToken(self.access)
+        self.assertEqual(token['user_id'], str(self.user.id))
+        self.assertEqual((token['gender'], token['is_staff'], token['is_admin']), ('female', False, False))
+
+    def test_cached_user_skips_query(self):
+        # the user for authentication, then the view's lookup with groups and permissions
+        with self.assertNumQueries(4):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+
+    def test_save_evicts_user(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_save_in_another_process_evicts_user(self):
+        self.client.get(self.url)
+        # Another process's cache: the save only reaches this one through the shared version.
+        with mock.patch('users.signals.user_cache', UserCache()):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(len(user_cache), 1)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_in_another_process_reloads_user(self):
+        self.client.get(self.url)
+        with mock.patch('users.signals.user_cache', UserCache()):
+            self.user.set_password("newpassword123")
+            self.user.save()
+        # the stale entry is a miss, so this request loads the user again
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+        self.assertTrue(user_cache.get(str(self.user.id)).check_password("newpassword123"))
+
+    def test_group_change_evicts_user(self):
+        self.client.get(self.url)
+        self.assertEqual(len(user_cache), 1)
+        Group.objects.create(name="supervisors").user_set.add(self.user)
+        self.assertEqual(len(user_cache), 0)
+
+    @override_settings(AUTH_USER_CACHE_TTL=0)
+    def test_cache_can_be_disabled(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+
+class UserCacheTest(TestCase):
+    @override_settings(AUTH_USER_CACHE_SIZE=2)
+    def test_least_recently_used_is_dropped(self):
+        cache = UserCache()
+        users = [User(student_code=str(i)) for i in range(3)]
+        cache.set('0', users[0])
+        cache.set('1', users[1])
+        cache.get('0')
+        cache.set('2', users[2])
+        self.assertIsNone(cache.get('1'))
+        self.assertEqual(cache.get('0').student_code, '0')
+        self.assertIsNot(cache.get('0'), cache.get('0'))
+
+    @override_settings(AUTH_USER_CACHE_TTL=-1)
+    def test_expired(self):
+        cache = UserCache()
+        cache._users['0'] = (User(student_code='0'), 0, None)
+        self.assertIsNone(cache.get('0'))
+        self.assertEqual(len(cache), 0)
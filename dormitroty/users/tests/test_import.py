@@ -0,0 +1,155 @@
+import io
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from users.importer import ImportFileError, import_students, shared_executor
+from users.models import User
+
+HEADER = "student_code,national_code,phone_number,first_name,last_name,email,gender,password\n"
+
+
+def csv_file(*rows):
+    return io.StringIO(HEADER + "".join(row + "\n" for row in rows))
+
+
+class ImportStudentsTest(TestCase):
+    def setUp(self):
+        User.objects.create_user(
+            email="old@example.com",
+            student_code="100",
+            national_code="1000000000",
+            phone_number="09120000000",
+            password="password123"
+        )
+
+    def test_imports_valid_rows(self):
+        result = import_students(csv_file(
+            "401,1111111111,9121111111,علي,رضايي,a@example.com,male,secret1",
+            "402,2222222222,+989122222222,Sara,Ahmadi,,female,",
+        ), workers=1)
+        self.assertEqual((result.created, result.errors), (2, []))
+
+        first = User.objects.get(student_code="401")
+        self.assertTrue(first.check_password("secret1"))
+        self.assertEqual(first.phone_number, "09121111111")
+        self.assertEqual(first.search_name, "علی رضایی")
+        second = User.objects.get(student_code="402")
+        self.assertEqual((second.phone_number, second.gender), ("09122222222", "female"))
+        self.assertFalse(second.has_usable_password())
+
+    def test_reports_row_errors(self):
+        result = import_students(csv_file(
+            "401,1111111111,09121111111,,,,,x",
+            "100,3333333333,09123333333,,,,,x",        # student code taken
+            "403,111,09124444444,,,,,x",               # national code too short
+            "404,4444444444,1234567890,,,,,x",         # phone must start with 0 or 9
+            "405,1111111111,09125555555,,,,,x",        # national code repeated in the file
+            "406,6666666666,09126666666,,,,robot,x",   # bad gender
+        ), workers=1)
+        self.assertEqual(result.created, 1)
+        self.assertEqual([e['line'] for e in result.errors], [3, 4, 5, 6, 7])
+        errors = {e['line']: e['errors'] for e in result.errors}
+        self.assertIn('student_code', errors[3])
+        self.assertIn('national_code', errors[4])
+        self.assertEqual(errors[5]['non_field_errors'], ["Phone number must start with 0 or 9."])
+        self.assertEqual(errors[6], {'national_code': ["Duplicate value in this file."]})
+        self.assertIn('gender', errors[7])
+
+    def test_batches_are_bulk_inserted(self):
+        rows = [f"5{i:02d},50000000{i:02d},091250000{i:02d},,,,,x" for i in range(30)]
+        # per batch of 10: the duplicate check, and the insert in a savepoint
+        with self.assertNumQueries(3 * 4):
+            result = import_students(csv_file(*rows), batch_size=10, workers=1)
+        self.assertEqual(result.created, 30)
+
+    def test_dry_run(self):
+        result = import_students(csv_file("401,1111111111,09121111111,,,,,x"), workers=1, dry_run=True)
+        self.assertEqual(result.created, 1)
+        self.assertFalse(User.objects.filter(student_code="401").exists())
+
+    def test_missing_columns(self):
+        with self.assertRaises(ImportFileError):
+            import_students(io.StringIO("student_code,phone_number\n1,2\n"), workers=1)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'students.csv')
+            report = os.path.join(tmp, 'errors.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(csv_file("401,1111111111,09121111111,,,,,x", "100,2,3,,,,,x").getvalue())
+            out = StringIO()
+            call_command('import_students', path, '--workers', '1', '--report', report, stdout=out)
+            self.assertIn("imported 1 students, 1 rows with errors", out.getvalue())
+            with open(report, encoding='utf-8') as f:
+                self.assertEqual([e['line'] for e in json.load(f)], [3])
+
+
+class ImportStudentsProcessPoolTest(TransactionTestCase):
+    def test_hashes_in_worker_processes(self):
+        rows = [f"7{i:02d},70000000{i:02d},091270000{i:02d},,,,,pass{i}" for i in range(20)]
+        result = import_students(csv_file(*rows), batch_size=8, workers=2)
+        self.assertEqual((result.created, result.errors), (20, []))
+        self.assertTrue(User.objects.get(student_code="705").check_password("pass5"))
+
+
+@override_settings(USER_IMPORT_WORKERS=1)
+class UserImportViewTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com",
+            student_code="67890",
+            national_code="1234567890",
+            phone_number="0987654321",
+            password="adminpassword"
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def upload(self, content, **data):
+        upload = SimpleUploadedFile('students.csv', content.encode('utf-8'), content_type='text/csv')
+        return self.client.post('/api/users/import/', {'file': upload, **data}, format='multipart')
+
+    def test_import(self):
+        response = self.upload(csv_file("401,1111111111,09121111111,,,,,x", "402,1,2,,,,,x").getvalue())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual([e['line'] for e in response.data['errors']], [3])
+        self.assertTrue(User.objects.filter(student_code="401").exists())
+
+    def test_dry_run(self):
+        response = self.upload(csv_file("401,1111111111,09121111111,,,,,x").getvalue(), dry_run='true')
+        self.assertEqual(response.data['created'], 1)
+        self.assertFalse(User.objects.filter(student_code="401").exists())
+
+    def test_bad_file(self):
+        self.assertEqual(self.client.post('/api/users/import/', {}, format='multipart').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.upload("a,b\n1,2\n").status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requests_share_one_pool(self):
+        pool = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(pool.shutdown)
+        self.addCleanup(shared_executor.cache_clear)
+        shared_executor.cache_clear()
+        with override_settings(USER_IMPORT_WORKERS=2), \
+                mock.patch('users.importer._executor', return_value=pool) as start_pool:
+            self.upload(csv_file("401,1111111111,09121111111,,,,,x").getvalue())
+            response = self.upload(csv_file("402,2222222222,09122222222,,,,,y").getvalue())
+        self.assertEqual(response.data['created'], 1)
+        start_pool.assert_called_once_with(2)
+        self.assertTrue(User.objects.get(student_code="402").check_password("y"))
+
+    def test_staff_only(self):
+        self.client.force_authenticate(user=User.objects.create_user(
+            student_code="1", national_code="1111111111", phone_number="09121111111", password="x"
+        ))
+        response = self.upload(csv_file("401,2222222222,09122222222,,,,,x").getvalue())
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
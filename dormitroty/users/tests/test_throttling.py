@@ -0,0 +1,75 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from users.models import User
+from users.throttling import TokenBucketThrottle
+
+URL = '/api/users/token/'
+
+
+@override_settings(
+    TOKEN_THROTTLE_RATES={'login_ip': '10/min', 'login_student_code': '3/min'},
+    LOGIN_LOCKOUT_FAILURES=3,
+)
+class TokenThrottleTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            student_code="123456",
+            national_code='9876543210',
+            phone_number='09123456789',
+            gender='female',
+            password="testpassword123"
+        )
+
+    def login(self, student_code="123456", password="testpassword123", ip='10.0.0.1'):
+        return self.client.post(URL, {"student_code": student_code, "password": password}, REMOTE_ADDR=ip)
+
+    def test_student_code_bucket(self):
+        for _ in range(3):
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        response = self.login(ip='10.0.0.2')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+    def test_ip_bucket(self):
+        for i in range(10):
+            self.login(student_code=f"code{i}")
+        self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.login(ip='10.0.0.2').status_code, status.HTTP_200_OK)
+
+    def test_bucket_refills(self):
+        for _ in range(3):
+            self.login()
+        with mock.patch.object(TokenBucketThrottle, 'timer', return_value=time.time() + 20):
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    def test_throttled_request_skips_hashing(self):
+        for _ in range(3):
+            self.login()
+        with mock.patch('django.contrib.auth.hashers.PBKDF2PasswordHasher.encode') as encode:
+            self.login()
+        encode.assert_not_called()
+
+    @override_settings(TOKEN_THROTTLE_RATES={})
+    def test_lockout_after_failures(self):
+        for _ in range(3):
+            self.assertEqual(self.login(password="wrong").status_code, status.HTTP_401_UNAUTHORIZED)
+        with mock.patch('django.contrib.auth.hashers.PBKDF2PasswordHasher.encode') as encode:
+            response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        encode.assert_not_called()
+
+    @override_settings(TOKEN_THROTTLE_RATES={})
+    def test_success_resets_failures(self):
+        for _ in range(2):
+            self.login(password="wrong")
+        self.login()
+        for _ in range(2):
+            self.login(password="wrong")
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from users.models import User
+from users.tokens import RefreshToken
+
+
+class CachedBlacklistTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            student_code="123456",
+            national_code='9876543210',
+            phone_number='09123456789',
+            gender='female',
+            password="testpassword123"
+        )
+        self.refresh = str(RefreshToken.for_user(self.user))
+
+    def test_check_is_cached(self):
+        RefreshToken(self.refresh)
+        with self.assertNumQueries(0):
+            RefreshToken(self.refresh)
+
+    def test_blacklist_is_seen_despite_cached_check(self):
+        RefreshToken(self.refresh)
+        RefreshToken(self.refresh).blacklist()
+        with self.assertNumQueries(0):
+            with self.assertRaises(TokenError):
+                RefreshToken(self.refresh)
+
+    @override_settings(TOKEN_BLACKLIST_CACHE_TTL=0)
+    def test_cache_can_be_disabled(self):
+        RefreshToken(self.refresh)
+        with self.assertNumQueries(1):
+            RefreshToken(self.refresh)
+
+    def test_refresh_rotates_and_rejects_old_token(self):
+        response = self.client.post('/api/users/token/refresh/', {"refresh": self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data['refresh'], self.refresh)
+        response = self.client.post('/api/users/token/refresh/', {"refresh": self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PruneTokensCommandTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            student_code="123456",
+            national_code='9876543210',
+            phone_number='09123456789',
+            gender='female',
+            password="testpassword123"
+        )
+        RefreshToken.for_user(self.user)
+        past = timezone.now() - timedelta(days=1)
+        for jti in ('a', 'b', 'c'):
+            token = OutstandingToken.objects.create(user=self.user, jti=jti, token=jti, expires_at=past)
+            BlacklistedToken.objects.create(token=token)
+
+    def test_deletes_only_expired(self):
+        out = StringIO()
+        call_command('prune_tokens', batch_size=2, stdout=out)
+        self.assertIn("deleted 3 expired tokens", out.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command('prune_tokens', dry_run=True, stdout=out)
+        self.assertIn("3 expired tokens would be deleted", out.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 4)
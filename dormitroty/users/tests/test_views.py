@@ -256,3 +256,59 @@ class LogoutViewTest(APITestCase):
         })
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['message'], 'Successfully logged out')
+
+
+class UserSearchViewTest(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            student_code="900001",
+            national_code="0000000001",
+            phone_number="09000000001",
+            password="adminpassword123"
+        )
+        self.ali = User.objects.create_user(
+            first_name="علي", last_name="كريمي",
+            student_code="401234", national_code="1234567890", phone_number="09121112233",
+        )
+        self.sara = User.objects.create_user(
+            first_name="سارا", last_name="احمدی",
+            student_code="402000", national_code="2234567890", phone_number="09351112233",
+            gender="female",
+        )
+        self.client.force_authenticate(user=self.admin)
+        self.url = '/api/users/search/'
+
+    def ids(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [user['id'] for user in response.data['results']]
+
+    def test_search_name_is_normalized(self):
+        self.ali.refresh_from_db()
+        self.assertEqual(self.ali.search_name, "علی کریمی")
+        self.assertEqual(self.ids(q="كريمي"), [str(self.ali.id)])
+        self.assertEqual(self.ids(q="علی کریم"), [str(self.ali.id)])
+
+    def test_search_by_code_prefix(self):
+        self.assertEqual(self.ids(q="40"), [str(self.ali.id), str(self.sara.id)])
+        self.assertEqual(self.ids(q="۴۰۲"), [str(self.sara.id)])
+        self.assertEqual(self.ids(q="22345"), [str(self.sara.id)])
+        self.assertEqual(self.ids(q="+98912"), [str(self.ali.id)])
+        self.assertEqual(self.ids(q="40", gender="female"), [str(self.sara.id)])
+
+    def test_light_paginated_response(self):
+        response = self.client.get(self.url, {'q': "40", 'page_size': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNotNone(response.data['next'])
+        self.assertNotIn('password', response.data['results'][0])
+        self.assertNotIn('email', response.data['results'][0])
+
+    def test_name_update_refreshes_search_name(self):
+        self.sara.last_name = "رضایی"
+        self.sara.save(update_fields=['last_name'])
+        self.assertEqual(self.ids(q="رضایی"), [str(self.sara.id)])
+
+    def test_requires_query_and_staff(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=self.ali)
+        self.assertEqual(self.client.get(self.url, {'q': "40"}).status_code, status.HTTP_403_FORBIDDEN)
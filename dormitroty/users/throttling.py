@@ -0,0 +1,108 @@
+"""
+Throttles for the token endpoint.
+
+Every login attempt runs a PBKDF2 hash, so a burst of attempts can take the CPU
+from everyone else. The throttles here run before the serializer and therefore
+before any hashing: a token bucket per client IP, one per ``student_code``, and a
+lockout that rejects a student code with a single cache read once it has failed
+``LOGIN_LOCKOUT_FAILURES`` times in a row. State lives in the Django cache, so
+limits are per process unless it points at a shared backend.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+FAILURES_KEY = 'login-failures:'
+LOCKOUT_KEY = 'login-lockout:'
+
+
+def _student_code(request):
+    code = request.data.get('student_code')
+    if not isinstance(code, str) or not code.strip():
+        return None
+    return code.strip()
+
+
+def record_login_failure(request):
+    """Counts a failed login and locks the student code out once it reaches the limit."""
+    student_code = _student_code(request)
+    if student_code is None:
+        return
+    key = FAILURES_KEY + student_code
+    cache.add(key, 0, settings.LOGIN_LOCKOUT_SECONDS)
+    try:
+        failures = cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr().
+        failures = 1
+        cache.set(key, failures, settings.LOGIN_LOCKOUT_SECONDS)
+    if failures >= settings.LOGIN_LOCKOUT_FAILURES:
+        cache.set(LOCKOUT_KEY + student_code, time.time() + settings.LOGIN_LOCKOUT_SECONDS,
+                  settings.LOGIN_LOCKOUT_SECONDS)
+        cache.delete(key)
+
+
+def clear_login_failures(request):
+    student_code = _student_code(request)
+    if student_code is not None:
+        cache.delete(FAILURES_KEY + student_code)
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    A SimpleRateThrottle that refills continuously instead of keeping a request
+    history: a rate of ``5/min`` allows a burst of 5 and then one request every
+    12 seconds. The bucket is read and written without a lock, so concurrent
+    requests may occasionally both take the last token.
+    """
+    def get_rate(self):
+        return settings.TOKEN_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        refill = self.num_requests / self.duration
+        now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        tokens = min(self.num_requests, tokens + (now - updated) * refill)
+        if tokens < 1:
+            self._wait = (1 - tokens) / refill
+            return False
+        self.cache.set(self.key, (tokens - 1, now), self.duration)
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginStudentCodeThrottle(TokenBucketThrottle):
+    scope = 'login_student_code'
+
+    def get_cache_key(self, request, view):
+        code = _student_code(request)
+        if code is None:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': code}
+
+
+class LoginLockoutThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        code = _student_code(request)
+        self.locked_until = cache.get(LOCKOUT_KEY + code) if code else None
+        return self.locked_until is None
+
+    def wait(self):
+        return max(self.locked_until - time.time(), 0)
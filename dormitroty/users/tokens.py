@@ -0,0 +1,51 @@
+"""
+Refresh tokens whose blacklist checks go through the cache.
+
+Every refresh request checks its token against ``token_blacklist``. Here the
+answer is cached until the token expires if it is blacklisted, which never
+changes, and for ``TOKEN_BLACKLIST_CACHE_TTL`` seconds if it is not, so an
+active client refreshing every few minutes hits the database about once per TTL.
+Blacklisting writes the cache entry too, so a logout is seen at once by every
+process sharing the cache; with a per-process cache other processes may accept
+the token for up to the TTL.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from dormitroty.instrumentation import cache_stats
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+KEY_PREFIX = 'token-blacklist:'
+
+
+def _remaining_seconds(token):
+    # At least a second: 0 means "never expire" to some cache backends.
+    return max(int((datetime_from_epoch(token['exp']) - token.current_time).total_seconds()), 1)
+
+
+class RefreshToken(BaseRefreshToken):
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        key = KEY_PREFIX + jti
+        blacklisted = cache.get(key)
+        if blacklisted is None:
+            cache_stats.miss('token_blacklist')
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            if blacklisted:
+                cache.set(key, True, _remaining_seconds(self))
+            elif settings.TOKEN_BLACKLIST_CACHE_TTL > 0:
+                # add(), not set(): never overwrite a blacklisting that happened since the query.
+                cache.add(key, False, min(settings.TOKEN_BLACKLIST_CACHE_TTL, _remaining_seconds(self)))
+        else:
+            cache_stats.hit('token_blacklist')
+        if blacklisted:
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        result = super().blacklist()
+        cache.set(KEY_PREFIX + self.payload[api_settings.JTI_CLAIM], True, _remaining_seconds(self))
+        return result
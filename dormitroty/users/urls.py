@@ -1,10 +1,14 @@
 from django.urls import path
-from .views import UserRegisterView, LogoutView, UserDetailView
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .views import (
+    UserRegisterView, LogoutView, UserDetailView, UserSearchView, UserImportView, UserTokenObtainPairView,
+)
+from rest_framework_simplejwt.views import TokenRefreshView
 urlpatterns = [
     path('', UserRegisterView.as_view(), name='user-register'),
+    path('search/', UserSearchView.as_view(), name='user-search'),
+    path('import/', UserImportView.as_view(), name='user-import'),
     path('details/<str:user_id>/', UserDetailView.as_view(), name='user-details'),
-    path('token/', TokenObtainPairView.as_view(), name='token-obtain'),
+    path('token/', UserTokenObtainPairView.as_view(), name='token-obtain'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('logout/', LogoutView.as_view(), name='logout'),
 ]
@@ -1,9 +1,23 @@
+import io
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db.models import Q
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, permissions
-from .serializers import UserRegisterSerializer
+from rest_framework import generics, status, permissions
+from rest_framework.parsers import MultiPartParser
+from dormitroty.persian import normalize
+from .importer import ImportFileError, import_students, shared_executor
+from .pagination import UserCursorPagination
+from .serializers import UserListSerializer, UserRegisterSerializer
+from .throttling import (
+    LoginIPThrottle, LoginLockoutThrottle, LoginStudentCodeThrottle, clear_login_failures, record_login_failure,
+)
+from .tokens import RefreshToken
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework_simplejwt.views import TokenObtainPairView
 from . import models
 
 
@@ -75,6 +89,94 @@ class UserRegisterView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@extend_schema(
+    summary="Search users",
+    description="""
+    Paginated user search for the admin panel. A single word is matched as a prefix of
+    student code, national code or phone number, or anywhere in the name; several words
+    must all appear in the name. Persian/Arabic letters and digits are normalized first.
+    """,
+    parameters=[
+        OpenApiParameter(name='q', type=str, required=True, description='Search text'),
+        OpenApiParameter(name='gender', type=str, enum=models.User.EnumGender.values, description='Filter by gender'),
+    ],
+    responses={
+        200: UserListSerializer(many=True),
+        400: {'description': 'Missing search text'},
+    }
+)
+class UserSearchView(generics.ListAPIView):
+    serializer_class = UserListSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = UserCursorPagination
+
+    def get_queryset(self):
+        terms = normalize(self.request.query_params.get('q', '')).split()
+        if not terms:
+            raise ValidationError({'q': 'This parameter is required.'})
+
+        condition = Q()
+        for term in terms:
+            condition &= Q(search_name__contains=term)
+        if len(terms) == 1:
+            code = terms[0]
+            phone = '0' + code[3:] if code.startswith('+98') else code
+            condition |= (Q(student_code__startswith=code) | Q(national_code__startswith=code)
+                          | Q(phone_number__startswith=phone))
+
+        users = models.User.objects.filter(condition).only(*UserListSerializer.Meta.fields)
+        gender = self.request.query_params.get('gender')
+        if gender:
+            users = users.filter(gender=gender)
+        return users
+
+
+class UserImportView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    @extend_schema(
+        summary="Import students from CSV",
+        description="""
+        Creates students from an uploaded CSV file with the columns student_code, national_code,
+        phone_number and optionally first_name, last_name, email, gender and password. Rows with
+        errors are skipped and reported by line number; the other rows are imported.
+        """,
+        request={
+            'multipart/form-data': {
+                'type': 'object',
+                'properties': {
+                    'file': {'type': 'string', 'format': 'binary'},
+                    'dry_run': {'type': 'boolean'},
+                },
+                'required': ['file'],
+            }
+        },
+        responses={
+            200: {'description': 'Number of imported students and the errors of the skipped rows'},
+            400: {'description': 'Missing or unreadable file'},
+        }
+    )
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': 'This field is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = request.data.get('dry_run') in ('1', 'true', 'True')
+        try:
+            result = import_students(
+                io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''),
+                dry_run=dry_run,
+                executor=shared_executor(settings.USER_IMPORT_WORKERS),
+            )
+        except (UnicodeDecodeError, ImportFileError) as e:
+            return Response({'file': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next import.
+            shared_executor.cache_clear()
+            raise
+        return Response({'created': result.created, 'errors': result.errors}, status=status.HTTP_200_OK)
+
+
 class UserDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -126,6 +228,23 @@ class UserDetailView(APIView):
         return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+class UserTokenObtainPairView(TokenObtainPairView):
+    """
+    Throttled before the password is hashed; failed logins count towards a lockout
+    of the student code.
+    """
+    throttle_classes = [LoginLockoutThrottle, LoginIPThrottle, LoginStudentCodeThrottle]
+
+    def post(self, request, *args, **kwargs):
+        try:
+            response = super().post(request, *args, **kwargs)
+        except AuthenticationFailed:
+            record_login_failure(request)
+            raise
+        clear_login_failures(request)
+        return response
+
+
 class LogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     """